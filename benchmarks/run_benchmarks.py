@@ -0,0 +1,337 @@
+"""
+Offline benchmark suite.
+
+Runs the bot's hot paths against local CoinGecko and Telegram stubs, so no
+network access or real credentials are needed, and writes the results to a
+JSON file that can be compared across commits:
+
+    python benchmarks/run_benchmarks.py [--quick] [--output FILE] [--compare PREVIOUS.json]
+    python benchmarks/run_benchmarks.py --record bitcoin ethereum  # refresh recordings (needs network)
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import asyncio
+import argparse
+import logging
+import platform
+import tempfile
+import warnings
+import subprocess
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "src")]
+
+import numpy as np
+from benchmarks.stubs import DATA_DIR, CoinGeckoStub, TelegramStub
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+COINGECKO_PUBLIC_API = "https://api.coingecko.com/api/v3"
+
+
+def configure_environment(work_dir, coingecko_url, telegram_url):
+    """
+    Points the bot at the stubs and at a scratch directory.
+    Must run before the bot's modules are imported, as they read their config at import.
+    """
+    os.environ.update({
+        "COINGECKO_API": coingecko_url,
+        "TELEGRAM_API_URL": telegram_url,
+        "PRICE_CACHE_DIR": os.path.join(work_dir, "price_cache"),
+        "MODEL_PATH": os.path.join(work_dir, "trading_agent.zip"),
+        "CHECKPOINT_DIR": os.path.join(work_dir, "checkpoints"),
+    })
+    for name, value in {
+        "INITIAL_BALANCE": "1000",
+        "POLICY_LOSS_THRESHOLD": "0.5",
+        "VALUE_LOSS_THRESHOLD": "1e12",
+        "ENTROPY_LOSS_THRESHOLD": "0.0001",
+        "ASSET_IDS": "bitcoin",
+        "CHECK_INTERVAL": "60",
+        "MODEL_CHECK_IMPROVEMENT_INTERVAL": "600",
+        "TRADE_ALERT_THRESHOLD": "1",
+        "METRICS_PORT": "0",
+    }.items():
+        os.environ.setdefault(name, value)
+
+
+def latency(func, repeat):
+    """
+    Calls `func` `repeat` times and returns latency statistics in milliseconds.
+    """
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples = np.array(samples)
+    return {
+        "runs": repeat,
+        "mean_ms": float(samples.mean()),
+        "p50_ms": float(np.percentile(samples, 50)),
+        "p95_ms": float(np.percentile(samples, 95)),
+        "min_ms": float(samples.min()),
+        "max_ms": float(samples.max()),
+    }
+
+
+STARTUP_SNIPPETS = {
+    "import_main": "import main",
+    "bot_ready": "from telegram_bot import TelegramBot; TelegramBot('123:TOKEN', 'CHAT')",
+    "import_model_training": "import model_training",
+}
+
+
+def bench_startup(repeat):
+    """
+    Times imports in fresh interpreters: the bot's entry points, and
+    model_training (torch + stable-baselines3) for reference.
+    """
+    env = dict(os.environ, PYTHONPATH=os.path.join(ROOT, "src"), PYTHONWARNINGS="ignore")
+    results = {}
+    for name, snippet in STARTUP_SNIPPETS.items():
+        code = (
+            "import sys, time; start = time.perf_counter(); "
+            f"{snippet}; "
+            "print(time.perf_counter() - start, 'torch' in sys.modules)"
+        )
+        samples = []
+        for _ in range(repeat):
+            output = subprocess.check_output([sys.executable, "-c", code], env=env, text=True, cwd=ROOT)
+            seconds, torch_loaded = output.strip().splitlines()[-1].split()
+            samples.append(float(seconds) * 1000)
+        results[name] = {"p50_ms": float(np.percentile(samples, 50)), "min_ms": min(samples), "torch_loaded": torch_loaded == "True"}
+    return results
+
+
+def bench_env_steps(steps):
+    from trading_env import CryptoTradingEnv
+    from vec_trading_env import BatchedCryptoTradingEnv
+
+    env = CryptoTradingEnv()
+    actions = np.random.default_rng(0).integers(0, 3, size=steps)
+    env.reset()
+    start = time.perf_counter()
+    for action in actions:
+        _, _, done, _ = env.step(int(action))
+        if done:
+            env.reset()
+    single = steps / (time.perf_counter() - start)
+
+    n_envs = 64
+    batched_env = BatchedCryptoTradingEnv(n_envs=n_envs, seed=0)
+    batched_actions = np.random.default_rng(0).integers(0, 3, size=(steps // 10, n_envs))
+    batched_env.reset()
+    start = time.perf_counter()
+    for action in batched_actions:
+        batched_env.step(action)
+    batched = batched_actions.size / (time.perf_counter() - start)
+
+    return {"single_steps_per_sec": single, "batched_64_samples_per_sec": batched}
+
+
+def bench_training(timesteps):
+    import model_training
+
+    _, total_timesteps = model_training.scale_rollout(timesteps, model_training.TRAIN_N_ENVS)
+    start = time.perf_counter()
+    model_training.continue_training(total_timesteps=timesteps)
+    elapsed = time.perf_counter() - start
+    return {"timesteps": total_timesteps, "seconds": elapsed, "timesteps_per_sec": total_timesteps / elapsed}
+
+
+def bench_evaluate(repeat):
+    import inference
+    from model_registry import model_registry, policy_registry
+
+    # Cold: empty price cache and no loaded model on either inference backend
+    shutil.rmtree(os.environ["PRICE_CACHE_DIR"], ignore_errors=True)
+    model_registry.invalidate()
+    policy_registry.invalidate()
+    cold = latency(inference.evaluate_model, 1)["mean_ms"]
+
+    return {"cold_ms": cold, "warm": latency(inference.evaluate_model, repeat)}
+
+
+def bench_backtest(points):
+    import backtest
+    from model_registry import model_registry
+
+    # Hourly random walk of `points` prices (4380 is six months)
+    prices = 30000 * np.exp(np.cumsum(np.random.default_rng(0).normal(0, 0.01, points)))
+    model = model_registry.get(os.environ["MODEL_PATH"])
+    start = time.perf_counter()
+    backtest.backtest(model, prices)
+    elapsed = time.perf_counter() - start
+    return {"points": points, "seconds": elapsed, "points_per_sec": points / elapsed}
+
+
+def bench_health_check(repeat):
+    import model_training
+
+    return {
+        "persisted": latency(model_training.is_model_optimal, repeat),
+        "fresh": latency(lambda: model_training.is_model_optimal(fresh=True), max(1, repeat // 10)),
+    }
+
+
+def bench_telegram(repeat, telegram_url):
+    from telegram_sender import TelegramSender
+
+    sender = TelegramSender("TOKEN", "CHAT", api_url=telegram_url, coalesce_seconds=0, min_interval=0)
+    sender.start()
+    try:
+        async def send_all():
+            samples = []
+            for i in range(repeat):
+                start = time.perf_counter()
+                await sender.send(f"benchmark message {i}")
+                samples.append((time.perf_counter() - start) * 1000)
+            return samples
+
+        samples = np.array(asyncio.run(send_all()))
+        start = time.perf_counter()
+        for i in range(repeat):
+            sender.enqueue(f"queued message {i}")
+        sender.flush(timeout=60)
+        queued = time.perf_counter() - start
+    finally:
+        sender.stop()
+
+    return {
+        "send_p50_ms": float(np.percentile(samples, 50)),
+        "send_p95_ms": float(np.percentile(samples, 95)),
+        "send_mean_ms": float(samples.mean()),
+        "enqueue_flush_seconds": queued,
+        "messages": repeat,
+    }
+
+
+def git_revision():
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+        dirty = bool(subprocess.check_output(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT, text=True).strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def run(quick=False):
+    """
+    Runs every benchmark and returns the results document.
+    """
+    sizes = {"env_steps": 20000, "train_timesteps": 2048, "repeat": 10, "backtest_points": 4380} if quick else \
+            {"env_steps": 200000, "train_timesteps": 8192, "repeat": 50, "backtest_points": 43800}
+    work_dir = tempfile.mkdtemp(prefix="bench-")
+
+    with CoinGeckoStub() as coingecko, TelegramStub() as telegram:
+        configure_environment(work_dir, coingecko.url, telegram.url)
+        results = {}
+        try:
+            for name, bench in [
+                ("startup", lambda: bench_startup(3 if quick else 10)),
+                ("env_steps", lambda: bench_env_steps(sizes["env_steps"])),
+                ("continue_training", lambda: bench_training(sizes["train_timesteps"])),
+                ("evaluate_model", lambda: bench_evaluate(sizes["repeat"])),
+                ("backtest", lambda: bench_backtest(sizes["backtest_points"])),
+                ("is_model_optimal", lambda: bench_health_check(sizes["repeat"])),
+                ("telegram_send", lambda: bench_telegram(sizes["repeat"], telegram.url)),
+            ]:
+                print(f"⏱️ Running {name}...")
+                results[name] = bench()
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        coingecko_requests = len(coingecko.requests)
+
+    commit, dirty = git_revision()
+    return {
+        "commit": commit,
+        "dirty": dirty,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "quick": quick,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "coingecko_requests": coingecko_requests,
+        "results": results,
+    }
+
+
+def flatten(results, prefix=""):
+    """
+    Flattens nested results into {"a.b.c": number}.
+    """
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def compare(previous, current):
+    """
+    Prints every metric next to its value in a previous run.
+    """
+    before, after = flatten(previous["results"]), flatten(current["results"])
+    print(f"\n📊 {previous.get('commit')} → {current.get('commit')}")
+    for key in sorted(after):
+        if key in before and before[key]:
+            print(f"  {key:<45} {before[key]:>14.3f} → {after[key]:>14.3f}  ({after[key] / before[key]:.2f}x)")
+
+
+def record(asset_ids, api_url):
+    """
+    Saves live `market_chart` responses as recordings for the CoinGecko stub.
+    """
+    from market_data import MarketDataClient
+
+    os.makedirs(DATA_DIR, exist_ok=True)
+    client = MarketDataClient(api_url, min_interval=2.0)  # The public API allows ~30 requests/minute
+    endpoints = [(f"/coins/{asset_id}/market_chart", {"vs_currency": "usd", "days": 7}) for asset_id in asset_ids]
+    for asset_id, payload in zip(asset_ids, client.get_many(endpoints)):
+        if isinstance(payload, Exception):
+            raise payload
+        with open(os.path.join(DATA_DIR, f"{asset_id}.json"), "w") as f:
+            json.dump({"prices": payload["prices"]}, f)
+        print(f"✅ Recorded {asset_id}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks against local CoinGecko and Telegram stubs.")
+    parser.add_argument("--quick", action="store_true", help="smaller workloads for a fast smoke run")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<time>_<commit>.json)")
+    parser.add_argument("--compare", help="previous results file to compare against")
+    parser.add_argument("--record", nargs="+", metavar="ASSET_ID", help="record live market_chart responses and exit")
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.record, os.getenv("COINGECKO_API") or COINGECKO_PUBLIC_API)
+        return
+
+    logging.basicConfig(level=logging.WARNING)
+    warnings.filterwarnings("ignore")
+    document = run(quick=args.quick)
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{stamp}_{document['commit'] or 'unknown'}.json")
+    with open(output, "w") as f:
+        json.dump(document, f, indent=2)
+    print(f"💾 Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), document)
+    else:
+        print(json.dumps(document["results"], indent=2))
+
+
+if __name__ == "__main__":
+    main()
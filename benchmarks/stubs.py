@@ -0,0 +1,166 @@
+import os
+import json
+import hashlib
+import time
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+MS_PER_DAY = 24 * 60 * 60 * 1000
+
+
+class _StubServer:
+    """
+    Local HTTP server on a free port, serving requests from a background thread.
+    Usable as a context manager; `url` is the base URL to point clients at.
+    """
+
+    handler_class = None
+
+    def __init__(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.handler_class)
+        self.server.stub = self
+        self.lock = threading.Lock()
+        self.requests = []
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name=type(self).__name__, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def record(self, path):
+        with self.lock:
+            self.requests.append((time.monotonic(), path))
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class _JSONHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def send_json(self, status, data, headers=None):
+        payload = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class _CoinGeckoHandler(_JSONHandler):
+    def do_GET(self):
+        stub = self.server.stub
+        stub.record(self.path)
+        failure = stub.next_failure()
+        if failure is not None:
+            status, retry_after = failure
+            return self.send_json(status, {"error": "injected failure"},
+                                  {"Retry-After": str(retry_after)} if retry_after is not None else None)
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        parts = url.path.strip("/").split("/")
+
+        # /coins/{id}/market_chart and /coins/{id}/market_chart/range
+        if len(parts) < 3 or parts[0] != "coins" or parts[2] != "market_chart":
+            return self.send_json(404, {"error": "Not found"})
+        rows = stub.market_chart(parts[1])
+        if rows is None:
+            return self.send_json(404, {"error": "coin not found"})
+
+        if parts[3:] == ["range"]:
+            start = float(query["from"][0]) * 1000
+            end = float(query["to"][0]) * 1000
+            rows = [row for row in rows if start <= row[0] <= end]
+        else:
+            days = float(query.get("days", ["1"])[0])
+            rows = [row for row in rows if row[0] >= rows[-1][0] - days * MS_PER_DAY]
+
+        # Like the real API, every response carries an ETag that conditional requests can match
+        data = {"prices": rows}
+        etag = '"' + hashlib.sha1(json.dumps(data).encode()).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_json(200, data, {"ETag": etag})
+
+
+class CoinGeckoStub(_StubServer):
+    """
+    Serves recorded `market_chart` responses from `data_dir/<asset_id>.json`.
+    Recordings are shifted in time so their last point is "now", which keeps
+    the client's `days` and `/range` queries meaningful whenever it runs.
+    `fail_next` makes the next requests fail, to exercise retries.
+    """
+
+    handler_class = _CoinGeckoHandler
+
+    def __init__(self, data_dir=None):
+        super().__init__()
+        self.data_dir = data_dir or DATA_DIR
+        self._recordings = {}
+        self._failures = []
+        self._started_at = int(time.time()) * 1000  # Whole seconds, like the API's `to` parameter
+
+    def fail_next(self, status, times=1, retry_after=None):
+        """
+        Answers the next `times` requests with `status` (and a Retry-After header).
+        """
+        with self.lock:
+            self._failures.extend([(status, retry_after)] * times)
+
+    def next_failure(self):
+        with self.lock:
+            return self._failures.pop(0) if self._failures else None
+
+    def market_chart(self, asset_id):
+        """
+        Returns the recorded [timestamp_ms, price] rows of an asset, or None.
+        """
+        with self.lock:
+            if asset_id not in self._recordings:
+                path = os.path.join(self.data_dir, f"{asset_id}.json")
+                if not os.path.exists(path):
+                    return None
+                with open(path) as f:
+                    prices = json.load(f)["prices"]
+                shift = self._started_at - prices[-1][0]
+                self._recordings[asset_id] = [[timestamp + shift, price] for timestamp, price in prices]
+            return self._recordings[asset_id]
+
+
+class _TelegramHandler(_JSONHandler):
+    def do_POST(self):
+        stub = self.server.stub
+        stub.record(self.path)
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_json(200, {"ok": True, "result": {}})
+
+
+class TelegramStub(_StubServer):
+    """
+    Accepts every `sendMessage` call, like a healthy Telegram Bot API.
+    """
+
+    handler_class = _TelegramHandler
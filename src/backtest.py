@@ -0,0 +1,171 @@
+"""
+Vectorized backtesting over a full price history.
+
+The policy's action at every step comes from one batched forward pass over
+all observation windows; the resulting position, cash and equity paths are
+array scans (forward fill, cumulative product), never a per-tick loop.
+Trades follow CryptoTradingEnv: buy converts all cash, sell converts all
+holdings, anything else holds.
+
+    python src/backtest.py                  # every stored checkpoint on bitcoin
+    python src/backtest.py --versions 3 4 --fee 0.002
+"""
+import time
+import argparse
+import logging
+import numpy as np
+from checkpoint_store import CheckpointStore
+from model_registry import model_registry
+from settings import get_settings
+from trading_env import load_price_history, observation_windows
+
+settings = get_settings()
+INITIAL_BALANCE = settings.initial_balance
+BACKTEST_FEE = settings.backtest_fee
+BACKTEST_SLIPPAGE = settings.backtest_slippage
+
+BUY, HOLD, SELL = 0, 1, 2
+HOURS_PER_YEAR = 365 * 24
+
+
+def positions(actions):
+    """
+    Position held after each action (1 invested, 0 in cash), starting in cash:
+    the last buy or sell carried forward over holds.
+    """
+    actions = np.asarray(actions)
+    signal = np.where(actions == BUY, 1, np.where(actions == SELL, 0, -1))
+    steps = np.arange(actions.shape[-1])
+    last_signal = np.maximum.accumulate(np.where(signal >= 0, steps, -1), axis=-1)
+    filled = np.take_along_axis(signal, np.maximum(last_signal, 0), axis=-1)
+    return np.where(last_signal >= 0, filled, 0).astype(np.int8)
+
+
+def simulate(prices, actions, fee=None, slippage=None, initial_balance=None):
+    """
+    Replays one action per step (the action at step t trades at prices[t],
+    so there is one action fewer than prices) with a proportional `fee` per
+    trade and `slippage` against the trader on every fill.
+    Returns (equity, position): the mark-to-market value at every price, and
+    the position held after every action.
+    """
+    fee = BACKTEST_FEE if fee is None else fee
+    slippage = BACKTEST_SLIPPAGE if slippage is None else slippage
+    initial_balance = INITIAL_BALANCE if initial_balance is None else initial_balance
+    prices = np.asarray(prices, dtype=np.float64)
+    position = positions(actions)
+    if position.shape[-1] != prices.shape[-1] - 1:
+        raise ValueError(f"Expected {prices.shape[-1] - 1} actions, got {position.shape[-1]}")
+
+    previous = np.concatenate([np.zeros_like(position[..., :1]), position[..., :-1]], axis=-1)
+    trade_cost = np.where(position > previous, (1 - fee) / (1 + slippage),
+                          np.where(position < previous, (1 - fee) * (1 - slippage), 1.0))
+    market = np.where(position == 1, prices[..., 1:] / prices[..., :-1], 1.0)
+
+    growth = np.ones_like(prices)
+    growth[..., :-1] *= trade_cost
+    growth[..., 1:] *= market
+    return initial_balance * np.cumprod(growth, axis=-1), position
+
+
+def periods_per_year(timestamps):
+    """ Price points per year, from the median spacing of millisecond timestamps (hourly without) """
+    if timestamps is None or len(timestamps) < 2:
+        return HOURS_PER_YEAR
+    spacing = float(np.median(np.diff(np.asarray(timestamps, dtype=np.float64))))
+    return 365 * 24 * 3600 * 1000 / spacing if spacing > 0 else HOURS_PER_YEAR
+
+
+def risk_metrics(equity, position, prices, periods=HOURS_PER_YEAR):
+    """ PnL, annualized Sharpe ratio, max drawdown and trade statistics of one equity path """
+    returns = equity[1:] / equity[:-1] - 1
+    std = returns.std()
+    drawdown = 1 - equity / np.maximum.accumulate(equity)
+    changes = np.diff(position, prepend=0)
+    return {
+        "pnl": float(equity[-1] - equity[0]),
+        "return": float(equity[-1] / equity[0] - 1),
+        "sharpe": float(returns.mean() / std * np.sqrt(periods)) if std > 0 else 0.0,
+        "max_drawdown": float(drawdown.max()),
+        "trades": int(np.count_nonzero(changes)),
+        "exposure": float(position.mean()),
+        "buy_and_hold_return": float(prices[-1] / prices[0] - 1),
+    }
+
+
+def backtest_actions(model, windows, deterministic=True):
+    """ Actions of `model` for every observation window, in one batched forward pass """
+    actions, _ = model.predict(np.asarray(windows, dtype=np.float32), deterministic=deterministic)
+    return np.asarray(actions).reshape(len(windows))
+
+
+def backtest(model, prices, timestamps=None, windows=None, fee=None, slippage=None):
+    """
+    Backtests `model` over a whole price series (a PPO model or a NumpyPolicy).
+    `windows` are the precomputed observations of `prices`, to share them across models.
+    Returns the risk metrics of the run (see `risk_metrics`).
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    if windows is None:
+        windows = observation_windows(prices)
+    actions = backtest_actions(model, windows[:-1])
+    equity, position = simulate(prices, actions, fee, slippage)
+    return risk_metrics(equity, position, prices, periods_per_year(timestamps))
+
+
+def compare_checkpoints(model_path=None, versions=None, asset_id="bitcoin", fee=None, slippage=None):
+    """
+    Backtests stored checkpoint versions (all of them by default) on the
+    asset's full price history. Returns one result per version, oldest first;
+    versions whose observation shape differs from the current features are skipped.
+    """
+    store = CheckpointStore(model_path or settings.require("model_path").model_path)
+    current = store.current_version()
+    stored = {metadata["version"]: metadata for metadata in store.versions()}
+    versions = sorted(stored) if versions is None else list(versions)
+
+    timestamps, prices = load_price_history(asset_id)
+    windows = observation_windows(prices, asset_ids=[asset_id], timestamps=timestamps)
+    results = []
+    for version in versions:
+        if version not in stored:
+            logging.warning(f"⚠️ Checkpoint v{version} not found in {store.checkpoint_dir}")
+            continue
+        start = time.perf_counter()
+        model = model_registry.get(store.path_for(version))
+        if model.observation_space.shape != windows.shape[1:]:
+            logging.warning(f"⚠️ Skipping v{version}: it observes {model.observation_space.shape}, not {windows.shape[1:]}")
+            continue
+        metrics = backtest(model, prices, timestamps, windows, fee, slippage)
+        results.append({
+            "version": version,
+            "current": version == current,
+            "timesteps": stored[version].get("num_timesteps"),
+            "seconds": time.perf_counter() - start,
+            **metrics,
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest stored checkpoints over the full price history.")
+    parser.add_argument("--model-path", help="published model whose checkpoints to compare (default: MODEL_PATH)")
+    parser.add_argument("--versions", type=int, nargs="+", help="checkpoint versions (default: all)")
+    parser.add_argument("--asset", default="bitcoin", help="CoinGecko asset ID")
+    parser.add_argument("--fee", type=float, help=f"fee per trade (default: BACKTEST_FEE={BACKTEST_FEE})")
+    parser.add_argument("--slippage", type=float, help=f"slippage per fill (default: BACKTEST_SLIPPAGE={BACKTEST_SLIPPAGE})")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    start = time.perf_counter()
+    results = compare_checkpoints(args.model_path, args.versions, args.asset, args.fee, args.slippage)
+    print(f"{'version':>8} {'pnl':>10} {'return':>8} {'sharpe':>7} {'max_dd':>7} {'trades':>6} {'exposure':>8} {'b&h':>8}")
+    for result in results:
+        marker = "*" if result["current"] else " "
+        print(f"{marker}v{result['version']:<6} {result['pnl']:>10.2f} {result['return']:>8.2%} {result['sharpe']:>7.2f} "
+              f"{result['max_drawdown']:>7.2%} {result['trades']:>6} {result['exposure']:>8.2%} {result['buy_and_hold_return']:>8.2%}")
+    print(f"⏱️ {len(results)} checkpoint(s) backtested in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
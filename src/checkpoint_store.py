@@ -0,0 +1,182 @@
+import os
+import json
+import time
+import fcntl
+import shutil
+import logging
+from contextlib import contextmanager
+from settings import get_settings
+
+settings = get_settings()
+CHECKPOINT_DIR = settings.checkpoint_dir
+CHECKPOINT_KEEP = settings.checkpoint_keep
+
+
+def atomic_write_json(path, data):
+    """
+    Writes JSON to a temp file in the same directory and renames it into place.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class CheckpointStore:
+    """
+    Versioned model checkpoints with atomic publishing.
+    Every save is kept as `vNNNNN.zip` plus a `vNNNNN.json` metadata file in the
+    checkpoint directory, and the published model at `model_path` is replaced
+    with a single rename, so readers never see a missing or partial file.
+    """
+
+    def __init__(self, model_path, checkpoint_dir=None, keep=None):
+        self.model_path = model_path
+        default_dir = os.path.join(os.path.dirname(os.path.abspath(model_path)), "checkpoints")
+        self.checkpoint_dir = checkpoint_dir or CHECKPOINT_DIR or default_dir
+        self.keep = CHECKPOINT_KEEP if keep is None else keep
+        self._current_path = os.path.join(self.checkpoint_dir, "CURRENT")
+
+    @contextmanager
+    def _locked(self):
+        """
+        Holds an exclusive lock on the checkpoint directory, so concurrent
+        saves (threads or processes) never pick the same version.
+        """
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        with open(os.path.join(self.checkpoint_dir, ".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def _version_path(self, version, extension="zip"):
+        return os.path.join(self.checkpoint_dir, f"v{version:05d}.{extension}")
+
+    def versions(self):
+        """
+        Returns the metadata of all stored versions, oldest first.
+        """
+        if not os.path.isdir(self.checkpoint_dir):
+            return []
+        versions = []
+        for name in sorted(os.listdir(self.checkpoint_dir)):
+            if name.startswith("v") and name.endswith(".json"):
+                try:
+                    with open(os.path.join(self.checkpoint_dir, name)) as f:
+                        versions.append(json.load(f))
+                except (OSError, ValueError):
+                    continue
+        return versions
+
+    def current_version(self):
+        """
+        Returns the version currently published at `model_path`, or None.
+        """
+        try:
+            with open(self._current_path) as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return None
+
+    def metadata(self, version=None):
+        """
+        Returns the metadata of a stored version (the published one by default), or None.
+        """
+        version = self.current_version() if version is None else version
+        if version is None:
+            return None
+        try:
+            with open(self._version_path(version, "json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def path_for(self, version):
+        """
+        Returns the checkpoint file of a stored version.
+        """
+        return self._version_path(version)
+
+    def save(self, model, metadata=None, publish=True):
+        """
+        Stores the model as a new version and, by default, publishes it.
+        Returns the new version number.
+        """
+        with self._locked():
+            versions = self.versions()
+            version = versions[-1]["version"] + 1 if versions else 1
+
+            # SB3 keeps an explicit ".zip" suffix, so the temp file must end with it
+            tmp_path = os.path.join(self.checkpoint_dir, f".v{version:05d}.{os.getpid()}.tmp.zip")
+            model.save(tmp_path)
+            os.replace(tmp_path, self._version_path(version))
+
+            atomic_write_json(self._version_path(version, "json"), {
+                "version": version,
+                "timestamp": time.time(),
+                "num_timesteps": int(getattr(model, "num_timesteps", 0)),
+                **(metadata or {}),
+            })
+
+            if publish:
+                self._publish(version)
+            self._prune()
+        return version
+
+    def publish(self, version):
+        """
+        Atomically replaces the model at `model_path` with a stored version.
+        """
+        with self._locked():
+            self._publish(version)
+
+    def _publish(self, version):
+        source = self._version_path(version)
+        if not os.path.exists(source):
+            raise FileNotFoundError(f"Checkpoint version {version} not found in {self.checkpoint_dir}")
+
+        model_dir = os.path.dirname(os.path.abspath(self.model_path))
+        tmp_path = os.path.join(model_dir, f".{os.path.basename(self.model_path)}.{os.getpid()}.tmp")
+        shutil.copyfile(source, tmp_path)
+        with open(tmp_path, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.model_path)
+
+        tmp_current = f"{self._current_path}.{os.getpid()}.tmp"
+        with open(tmp_current, "w") as f:
+            f.write(str(version))
+        os.replace(tmp_current, self._current_path)
+        logging.info(f"📦 Published checkpoint v{version} to {self.model_path}")
+
+    def rollback(self, version=None):
+        """
+        Publishes `version`, or the version saved before the current one.
+        Returns the version now being served.
+        """
+        if version is None:
+            stored = [v["version"] for v in self.versions()]
+            current = self.current_version()
+            older = [v for v in stored if current is None or v < current]
+            if not older:
+                raise ValueError("No older checkpoint to roll back to")
+            version = older[-1]
+        self.publish(version)
+        return version
+
+    def _prune(self):
+        """
+        Deletes all but the newest `keep` versions, never the published one.
+        """
+        if self.keep <= 0:
+            return
+        current = self.current_version()
+        stored = [v["version"] for v in self.versions()]
+        for version in stored[:-self.keep]:
+            if version == current:
+                continue
+            for extension in ("zip", "json"):
+                try:
+                    os.remove(self._version_path(version, extension))
+                except FileNotFoundError:
+                    pass
@@ -0,0 +1,143 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from lazy_imports import LazyFunction
+from metrics import metrics, profiler
+from price_cache import PriceCache
+from settings import get_settings
+
+settings = get_settings()
+MODEL_PATH = settings.model_path
+ASSET_IDS = list(settings.asset_ids)
+EVAL_CACHE_TTL = settings.eval_cache_ttl  # Seconds an evaluation result is reused
+EVAL_WORKERS = settings.eval_workers
+
+# Loaded on the first evaluation; it needs no torch while the model's NumPy export is current
+evaluate_assets = LazyFunction("inference", "evaluate_assets")
+
+evaluation_requests = metrics.counter(
+    "evaluation_requests_total", "Opportunity evaluation requests, by how they were served", ["result"])
+
+
+class SingleFlightEvaluator:
+    """
+    Runs an evaluation on a worker pool, sharing it between concurrent callers.
+    Callers asking for the same key while an evaluation is in flight wait on that
+    evaluation, and its result is reused for `ttl` seconds afterwards.
+    """
+
+    def __init__(self, evaluate, key_func, ttl=None, max_workers=None):
+        self._evaluate = evaluate
+        self._key_func = key_func
+        self.ttl = EVAL_CACHE_TTL if ttl is None else ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or EVAL_WORKERS, thread_name_prefix="evaluation")
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._cached_key = None
+        self._cached_result = None
+        self._cached_until = 0.0
+        self.evaluations = 0
+        self.cache_hits = 0
+        self.shared = 0
+
+    def submit(self):
+        """
+        Returns a concurrent Future resolving to the evaluation result.
+        """
+        key = self._key_func()
+        with self._lock:
+            if key == self._cached_key and time.monotonic() < self._cached_until:
+                self.cache_hits += 1
+                evaluation_requests.inc(result="cached")
+                future = Future()
+                future.set_result(self._cached_result)
+                return future
+
+            future = self._inflight.get(key)
+            if future is not None:
+                self.shared += 1
+                evaluation_requests.inc(result="shared")
+                return future
+
+            self.evaluations += 1
+            evaluation_requests.inc(result="evaluated")
+            future = self._executor.submit(self._run, key)
+            self._inflight[key] = future
+            return future
+
+    def _run(self, key):
+        try:
+            result = self._evaluate()
+            # The evaluation may have refreshed the price cache, so cache the
+            # result under the key of the data it actually used
+            cached_key = self._key_func()
+            with self._lock:
+                self._cached_key = cached_key
+                self._cached_result = result
+                self._cached_until = time.monotonic() + self.ttl
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def evaluate(self, timeout=None):
+        """
+        Blocking entry point for threads such as the main loop.
+        """
+        return self.submit().result(timeout)
+
+    async def evaluate_async(self):
+        """
+        Awaitable entry point that keeps the calling event loop free.
+        """
+        return await asyncio.wrap_future(self.submit())
+
+    def invalidate(self):
+        """
+        Drops the cached result.
+        """
+        with self._lock:
+            self._cached_key = None
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def evaluation_key():
+    """
+    Identifies the inputs of an evaluation: the model file version and the
+    timestamp of the latest cached price of every watched asset.
+    """
+    try:
+        stat = os.stat(MODEL_PATH)
+        model_version = (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        model_version = None
+    return model_version, tuple(PriceCache(asset_id).last_timestamp() for asset_id in ASSET_IDS)
+
+
+def rank_opportunities(rewards, min_reward=None):
+    """
+    Sorts {asset_id: estimated reward} by reward, best first, keeping only
+    rewards above `min_reward` when it is given.
+    Returns a list of (asset_id, reward) pairs.
+    """
+    ranked = sorted(rewards.items(), key=lambda item: item[1], reverse=True)
+    if min_reward is not None:
+        ranked = [(asset_id, reward) for asset_id, reward in ranked if reward > min_reward]
+    return ranked
+
+
+@profiler.profiled("evaluation")
+def _evaluate_opportunity():
+    start = time.perf_counter()
+    rewards = evaluate_assets(ASSET_IDS)
+    logging.info(f"🧮 Evaluated {len(rewards)} asset(s) in {time.perf_counter() - start:.3f}s")
+    return rewards
+
+
+# Shared by /check and the main loop's opportunity checks; results are {asset_id: reward}
+opportunity_evaluator = SingleFlightEvaluator(_evaluate_opportunity, evaluation_key)
@@ -0,0 +1,204 @@
+import math
+import threading
+import numpy as np
+from settings import get_settings
+
+OBSERVATION_FEATURES = list(get_settings().observation_features)
+
+EMA_FAST_SPAN = 12
+EMA_SLOW_SPAN = 26
+RSI_PERIOD = 14
+VOLATILITY_SPAN = 20
+
+# Columns of the feature matrix
+FEATURES = (
+    "price",       # Raw price
+    "return",      # Log return since the previous tick
+    "ema_gap",     # Fast EMA / slow EMA - 1 (normalized MACD)
+    "norm_price",  # Price / slow EMA - 1
+    "rsi",         # Wilder's RSI scaled to [0, 1]
+    "volatility",  # Exponentially weighted RMS of log returns
+)
+
+
+def ema(values, alpha, initial):
+    """
+    Exponential moving average y[t] = y[t-1] + alpha * (x[t] - y[t-1]), with
+    y[-1] = `initial`, computed without a per-element Python loop.
+    Returns (averages, last average).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    decay = 1.0 - alpha
+    out = np.empty_like(values)
+    if decay <= 0:
+        out[:] = values
+        return out, (float(values[-1]) if len(values) else initial)
+
+    # Closed form within chunks short enough that decay ** -chunk stays well inside float64
+    chunk = max(1, int(math.log(1e8) / -math.log(decay)))
+    powers = decay ** np.arange(chunk + 1)
+    inverse = 1.0 / powers[:-1]
+    previous = initial
+    for start in range(0, len(values), chunk):
+        x = values[start:start + chunk]
+        n = len(x)
+        y = powers[1:n + 1] * previous + alpha * powers[:n] * np.cumsum(x * inverse[:n])
+        out[start:start + n] = y
+        previous = y[-1]
+    return out, float(previous)
+
+
+class FeaturePipeline:
+    """
+    Float32 feature matrix of one price series (see FEATURES), stored
+    column-wise as (n_features, n_ticks).
+    `fit` computes it for a whole series in one vectorized pass; `update`
+    appends a tick in O(1) from the running EMA/RSI/volatility state, so a
+    live series never needs recomputing.
+    """
+
+    def __init__(self, features=None, capacity=1024):
+        self.features = list(features or FEATURES)
+        unknown = set(self.features) - set(FEATURES)
+        if unknown:
+            raise ValueError(f"Unknown features: {sorted(unknown)} (available: {', '.join(FEATURES)})")
+        self._columns = [FEATURES.index(feature) for feature in self.features]
+        self._buffer = np.empty((len(FEATURES), capacity), dtype=np.float32)
+        self._start = 0
+        self._end = 0
+        self._state = None
+
+    def __len__(self):
+        return self._end - self._start
+
+    @property
+    def matrix(self):
+        """ The selected feature columns, shape (n_features, n_ticks) """
+        return self._buffer[self._columns, self._start:self._end]
+
+    def fit(self, prices):
+        """
+        Recomputes every feature for `prices` in one pass, replacing any previous ticks.
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        if len(prices) == 0:
+            raise ValueError("Cannot compute features of an empty price series")
+        returns = np.zeros_like(prices)
+        returns[1:] = np.log(prices[1:] / prices[:-1])
+        changes = np.zeros_like(prices)
+        changes[1:] = np.diff(prices)
+
+        ema_fast, last_fast = ema(prices, 2 / (EMA_FAST_SPAN + 1), prices[0])
+        ema_slow, last_slow = ema(prices, 2 / (EMA_SLOW_SPAN + 1), prices[0])
+        avg_gain, last_gain = ema(np.maximum(changes, 0), 1 / RSI_PERIOD, 0.0)
+        avg_loss, last_loss = ema(np.maximum(-changes, 0), 1 / RSI_PERIOD, 0.0)
+        variance, last_variance = ema(returns ** 2, 2 / (VOLATILITY_SPAN + 1), 0.0)
+
+        total = avg_gain + avg_loss
+        rsi = np.divide(avg_gain, total, out=np.full_like(total, 0.5), where=total > 0)
+
+        self._reserve(len(prices), keep=False)
+        rows = self._buffer[:, :len(prices)]
+        rows[0] = prices
+        rows[1] = returns
+        rows[2] = ema_fast / ema_slow - 1
+        rows[3] = prices / ema_slow - 1
+        rows[4] = rsi
+        rows[5] = np.sqrt(variance)
+        self._start, self._end = 0, len(prices)
+        self._state = [float(prices[-1]), last_fast, last_slow, last_gain, last_loss, last_variance]
+        return self
+
+    def update(self, price):
+        """
+        Appends one tick in O(1) and returns its feature row.
+        """
+        if self._state is None:
+            return self.fit([price]).matrix[:, -1]
+        last_price, ema_fast, ema_slow, avg_gain, avg_loss, variance = self._state
+        change = price - last_price
+        log_return = math.log(price / last_price)
+
+        ema_fast += 2 / (EMA_FAST_SPAN + 1) * (price - ema_fast)
+        ema_slow += 2 / (EMA_SLOW_SPAN + 1) * (price - ema_slow)
+        avg_gain += (max(change, 0.0) - avg_gain) / RSI_PERIOD
+        avg_loss += (max(-change, 0.0) - avg_loss) / RSI_PERIOD
+        variance += 2 / (VOLATILITY_SPAN + 1) * (log_return ** 2 - variance)
+        self._state = [price, ema_fast, ema_slow, avg_gain, avg_loss, variance]
+
+        total = avg_gain + avg_loss
+        self._reserve(1)
+        self._buffer[:, self._end] = (
+            price, log_return, ema_fast / ema_slow - 1, price / ema_slow - 1,
+            avg_gain / total if total > 0 else 0.5, math.sqrt(variance),
+        )
+        self._end += 1
+        return self._buffer[self._columns, self._end - 1]
+
+    def extend(self, prices):
+        """
+        Appends several ticks, O(1) each.
+        """
+        for price in np.asarray(prices, dtype=np.float64):
+            self.update(float(price))
+        return self
+
+    def tail(self, count):
+        """
+        Returns the last `count` rows and drops older ones, so a rolling
+        window's memory stays bounded.
+        """
+        self._start = max(self._start, self._end - count)
+        return self.matrix
+
+    def _reserve(self, count, keep=True):
+        """ Makes room for `count` more ticks, compacting or growing the buffer """
+        needed = (len(self) if keep else 0) + count
+        if keep and self._end + count <= self._buffer.shape[1]:
+            return
+        if not keep and needed <= self._buffer.shape[1]:
+            return
+        capacity = max(needed * 2, self._buffer.shape[1])
+        buffer = np.empty((len(FEATURES), capacity), dtype=np.float32)
+        if keep:
+            buffer[:, :len(self)] = self._buffer[:, self._start:self._end]
+            self._end = len(self)
+            self._start = 0
+        self._buffer = buffer
+
+
+class FeatureCache:
+    """
+    Keeps one FeaturePipeline per asset so that a series which only gained
+    new ticks since the last call is extended incrementally instead of refitted.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pipelines = {}
+
+    def matrix(self, asset_id, timestamps, prices, features=None):
+        """
+        Returns the (n_features, len(prices)) feature matrix of an asset's series.
+        """
+        features = list(features or OBSERVATION_FEATURES)
+        prices = np.asarray(prices, dtype=np.float64)
+        timestamps = np.asarray(timestamps)
+        key = (asset_id, tuple(features))
+        with self._lock:
+            pipeline = None
+            cached = self._pipelines.get(key)
+            if cached is not None:
+                cached_pipeline, last_timestamp = cached
+                position = int(np.searchsorted(timestamps, last_timestamp))
+                # Extend only if the cached ticks end inside this series and cover its overlap
+                if position < len(timestamps) and timestamps[position] == last_timestamp and len(cached_pipeline) > position:
+                    pipeline = cached_pipeline.extend(prices[position + 1:])
+            if pipeline is None:
+                pipeline = FeaturePipeline(features).fit(prices)
+            self._pipelines[key] = (pipeline, timestamps[-1])
+            return pipeline.tail(len(prices))
+
+
+# Shared by every env built from an asset's price history
+feature_cache = FeatureCache()
@@ -0,0 +1,129 @@
+"""
+Serving-side evaluation of the model: estimated rewards of the watched
+assets for alerts and /check. Nothing here imports torch or
+stable-baselines3; they load only if the model has no current NumPy export.
+"""
+import os
+import logging
+import numpy as np
+from lockstep_env import LockstepTradingEnv
+from metrics import metrics
+from model_registry import model_registry, policy_registry
+from numpy_policy import policy_path
+from settings import get_settings
+from trading_env import ASSET_IDS, align_price_histories, load_price_histories
+
+settings = get_settings()
+MODEL_PATH = settings.model_path
+
+# Evaluation Config
+EVAL_MODE = settings.eval_mode
+EVAL_ROLLOUTS = settings.eval_rollouts
+EVAL_STEPS = settings.eval_steps
+EVAL_ROLLOUT_STRIDE = settings.eval_rollout_stride
+REWARD_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+INFERENCE_BACKEND = settings.inference_backend
+
+predict_seconds = metrics.histogram("predict_seconds", "Latency of one batched policy forward pass")
+evaluation_seconds = metrics.histogram("evaluation_seconds", "Time to estimate rewards, including env and model setup", ["kind"])
+
+def estimate_rewards(model, env, steps=None):
+    """ Runs every env of `env` in lockstep and returns each one's summed reward """
+    steps = steps or EVAL_STEPS
+    obs = env.reset()
+    total_reward = np.zeros(env.num_envs, dtype=np.float64)
+    for _ in range(steps):
+        with predict_seconds.time():
+            action, _ = model.predict(obs)  # One batched forward pass for all envs
+        obs, reward, done, _ = env.step(action)
+        total_reward += reward
+    return total_reward
+
+def inference_model(model_path=None):
+    """
+    Returns the policy used for alerts: the NumPy export of the model when it
+    was made from the current checkpoint file, otherwise the SB3 model (the
+    only case that loads torch). The checkpoint is re-hashed only when its
+    mtime or size changes.
+    """
+    model_path = model_path or MODEL_PATH
+    exported = policy_path(model_path)
+    if INFERENCE_BACKEND == "numpy" and os.path.exists(exported):
+        policy = policy_registry.get(exported)
+        if policy.model_sha256 == model_registry.digest(model_path):
+            return policy
+        logging.info(f"⚠️ {exported} is stale, predicting with the SB3 model")
+    return model_registry.get(model_path)
+
+def evaluate_model():
+    """ Runs the model and returns estimated reward """
+    with evaluation_seconds.time(kind="single"):
+        env = LockstepTradingEnv(random_start=False)
+        model = inference_model()
+        return float(estimate_rewards(model, env)[0])
+
+def recent_start_offsets(length, rollouts, steps, stride=1):
+    """
+    Start offsets of the `rollouts` most recent windows of a series that still
+    leave room for `steps` steps, newest first.
+    """
+    last_start = max(0, length - 1 - steps)
+    return np.maximum(last_start - np.arange(rollouts) * stride, 0)
+
+def reward_statistics(rewards):
+    """ Mean, variance and quantiles of a sample of rollout rewards """
+    rewards = np.asarray(rewards, dtype=np.float64)
+    quantiles = np.quantile(rewards, REWARD_QUANTILES)
+    variance = float(rewards.var(ddof=1)) if len(rewards) > 1 else 0.0
+    return {
+        "mean": float(rewards.mean()),
+        "variance": variance,
+        "std": float(np.sqrt(variance)),
+        "min": float(rewards.min()),
+        "max": float(rewards.max()),
+        "quantiles": {f"p{round(q * 100):02d}": float(value) for q, value in zip(REWARD_QUANTILES, quantiles)},
+        "rollouts": len(rewards),
+    }
+
+def monte_carlo_rewards(model, data, rollouts=None, steps=None, stride=None):
+    """
+    Runs `rollouts` episodes per price series, started at the most recent
+    offsets, in lockstep: each step is one batched predict over every
+    rollout of every series. `data` is one series or an (n_series, length) matrix.
+    Returns a (rollouts, n_series) array of summed rewards.
+    """
+    rollouts = rollouts or EVAL_ROLLOUTS
+    steps = steps or EVAL_STEPS
+    stride = stride or EVAL_ROLLOUT_STRIDE
+    data = np.asarray(data, dtype=np.float64)
+    n_series = 1 if data.ndim == 1 else len(data)
+
+    offsets = recent_start_offsets(data.shape[-1], rollouts, steps, stride)
+    env = LockstepTradingEnv(n_envs=rollouts * n_series, data=data, start_offsets=np.repeat(offsets, n_series))
+    return estimate_rewards(model, env, steps).reshape(rollouts, n_series)
+
+def evaluate_distribution(asset_ids=None, rollouts=None, steps=None):
+    """
+    Monte-Carlo evaluation of every asset (ASSET_IDS by default).
+    Returns {asset_id: reward statistics} (see `reward_statistics`).
+    """
+    asset_ids = list(asset_ids or ASSET_IDS)
+    with evaluation_seconds.time(kind="monte_carlo"):
+        _, data = align_price_histories(load_price_histories(asset_ids))
+        model = inference_model()
+        rewards = monte_carlo_rewards(model, data, rollouts, steps)
+    return {asset_id: reward_statistics(rewards[:, i]) for i, asset_id in enumerate(asset_ids)}
+
+def evaluate_assets(asset_ids=None):
+    """
+    Estimates the reward of every asset: the mean over EVAL_ROLLOUTS recent
+    rollouts, or with EVAL_MODE=single one rollout per asset from its oldest point.
+    Returns {asset_id: estimated reward} in the order of `asset_ids` (ASSET_IDS by default).
+    """
+    asset_ids = list(asset_ids or ASSET_IDS)
+    if EVAL_MODE == "monte_carlo":
+        return {asset_id: stats["mean"] for asset_id, stats in evaluate_distribution(asset_ids).items()}
+    with evaluation_seconds.time(kind="assets"):
+        env = LockstepTradingEnv(asset_ids=asset_ids, random_start=False)
+        model = inference_model()
+        return dict(zip(asset_ids, estimate_rewards(model, env).tolist()))
@@ -0,0 +1,25 @@
+import importlib
+
+
+class LazyFunction:
+    """
+    Stand-in for `module.name` that imports the module on first call, so
+    heavy dependencies (torch, stable-baselines3, gym) load only when used.
+    Instances pickle by module and name, so they work as process targets.
+    """
+
+    def __init__(self, module, name):
+        self.module = module
+        self.__name__ = name
+        self._function = None
+
+    def __call__(self, *args, **kwargs):
+        if self._function is None:
+            self._function = getattr(importlib.import_module(self.module), self.__name__)
+        return self._function(*args, **kwargs)
+
+    def __getstate__(self):
+        return {"module": self.module, "__name__": self.__name__, "_function": None}
+
+    def __repr__(self):
+        return f"<lazy {self.module}.{self.__name__}>"
@@ -0,0 +1,153 @@
+import time
+import numpy as np
+from gymnasium import spaces
+from trading_env import (
+    INITIAL_BALANCE, align_price_histories, env_build_seconds, load_price_histories, load_price_history,
+    observation_size, observation_windows
+)
+
+
+class LockstepTradingEnv:
+    """
+    N CryptoTradingEnvs advanced in lockstep, without torch or SB3.
+    Balance, holdings and step index of all N environments live in NumPy arrays
+    and are advanced together by a single `step_wait` call. Serving evaluates
+    on it directly; BatchedCryptoTradingEnv wraps it as an SB3 VecEnv.
+
+    `data` is one price series shared by every env, or an (n_series, length)
+    matrix where env i trades series i % n_series. With `asset_ids` the series
+    are the assets' price histories, loaded concurrently and aligned on their
+    most recent points; `n_envs` then defaults to one env per asset.
+    `start_offsets` fixes the step each env starts (and restarts) its episodes at.
+    `focus_on_recent` makes random starts favour the most recent ticks.
+    """
+
+    STATE_ATTRIBUTES = ("balance", "crypto_held", "current_step")
+
+    def __init__(self, n_envs=None, data=None, random_start=True, seed=None, asset_ids=None, start_offsets=None):
+        start = time.perf_counter()
+        self.asset_ids = list(asset_ids) if asset_ids else None
+        self.timestamps = None
+        series_ids = None
+        if data is None and self.asset_ids:
+            self.timestamps, data = align_price_histories(load_price_histories(self.asset_ids))
+            series_ids = self.asset_ids
+        elif data is None:
+            self.timestamps, data = load_price_history()
+            series_ids = ["bitcoin"]
+        self.data = np.asarray(data, dtype=np.float64)
+        self._series = self.data.reshape(-1, self.data.shape[-1])
+
+        n_envs = len(self._series) if n_envs is None else n_envs
+        observation_space = spaces.Box(low=-np.inf, high=np.inf, shape=(observation_size(),), dtype=np.float32)
+        action_space = spaces.Discrete(3)  # 0: Buy, 1: Hold, 2: Sell
+        self._init_spaces(n_envs, observation_space, action_space)
+
+        self.series_index = np.arange(n_envs) % len(self._series)
+        self.windows = observation_windows(self._series, asset_ids=series_ids, timestamps=self.timestamps)
+        self.initial_balance = INITIAL_BALANCE
+        self.random_start = random_start
+        self._last_step = self._series.shape[1] - 1
+        self._rng = np.random.default_rng(seed)
+        self.start_offsets = None
+        self.recent_start = None
+        self.replay_fraction = 0.0
+        if start_offsets is not None:
+            self.start_offsets = np.clip(np.asarray(start_offsets, dtype=np.int64).reshape(n_envs), 0, max(0, self._last_step - 1))
+
+        self.balance = np.full(n_envs, self.initial_balance, dtype=np.float64)
+        self.crypto_held = np.zeros(n_envs, dtype=np.float64)
+        self.current_step = np.zeros(n_envs, dtype=np.int64)
+        self.actions = np.ones(n_envs, dtype=np.int64)
+        self._obs = np.zeros((n_envs,) + observation_space.shape, dtype=np.float32)
+        env_build_seconds.observe(time.perf_counter() - start, env="batched")
+
+    def _init_spaces(self, n_envs, observation_space, action_space):
+        self.num_envs = n_envs
+        self.observation_space = observation_space
+        self.action_space = action_space
+        self._seeds = [None] * n_envs
+
+    def _reset_seeds(self):
+        self._seeds = [None] * self.num_envs
+
+    def focus_on_recent(self, recent_start, replay_fraction=0.0):
+        """
+        Starts random episodes at or after step `recent_start`, except for a
+        `replay_fraction` of them that start uniformly before it.
+        """
+        self.recent_start = int(np.clip(recent_start, 0, max(0, self._last_step - 1)))
+        self.replay_fraction = float(replay_fraction)
+
+    def _start_offsets(self, mask):
+        """
+        Returns episode start offsets for the masked envs: their fixed
+        `start_offsets`, random positions in the series, or 0.
+        """
+        if self.start_offsets is not None:
+            return self.start_offsets[mask]
+        count = int(np.count_nonzero(mask))
+        if not self.random_start:
+            return np.zeros(count, dtype=np.int64)
+        if not self.recent_start:
+            return self._rng.integers(0, max(1, self._last_step), size=count)
+        recent = self._rng.integers(self.recent_start, max(self.recent_start + 1, self._last_step), size=count)
+        replay = self._rng.integers(0, self.recent_start, size=count)
+        return np.where(self._rng.random(count) < self.replay_fraction, replay, recent)
+
+    def _reset_envs(self, mask):
+        """
+        Resets the environments selected by the boolean `mask`.
+        """
+        self.balance[mask] = self.initial_balance
+        self.crypto_held[mask] = 0
+        self.current_step[mask] = self._start_offsets(mask)
+        self._obs[mask] = self.windows[self.series_index[mask], self.current_step[mask]]
+
+    def reset(self):
+        """
+        Resets all environments and returns the stacked observations.
+        """
+        if self._seeds[0] is not None:
+            self._rng = np.random.default_rng(self._seeds[0])
+        self._reset_seeds()
+        self._reset_envs(np.ones(self.num_envs, dtype=bool))
+        return self._obs.copy()
+
+    def step(self, actions):
+        self.step_async(actions)
+        return self.step_wait()
+
+    def step_async(self, actions):
+        self.actions = np.asarray(actions).reshape(self.num_envs)
+
+    def step_wait(self):
+        """
+        Executes one trade per environment and advances all of them by one step.
+        """
+        prices = self._series[self.series_index, self.current_step]
+
+        buy = (self.actions == 0) & (self.balance > 0)
+        sell = (self.actions == 2) & (self.crypto_held > 0)
+
+        self.crypto_held += np.where(buy, self.balance / prices, 0)
+        self.balance[buy] = 0
+        self.balance += np.where(sell, self.crypto_held * prices, 0)
+        self.crypto_held[sell] = 0
+        rewards = np.where(sell, self.balance - self.initial_balance, 0).astype(np.float32)  # Profit/Loss
+
+        self.current_step += 1
+        dones = self.current_step >= self._last_step
+        self._obs[:] = self.windows[self.series_index, self.current_step]
+
+        infos = [{} for _ in range(self.num_envs)]
+        if dones.any():
+            for env_idx in np.flatnonzero(dones):
+                infos[env_idx]["terminal_observation"] = self._obs[env_idx].copy()
+                infos[env_idx]["TimeLimit.truncated"] = False
+            self._reset_envs(dones)
+
+        return self._obs.copy(), rewards, dones, infos
+
+    def close(self):
+        pass
@@ -1,107 +1,241 @@
-import os
 import time
+import signal
+import asyncio
 import threading
 import logging
-import numpy as np
-from dotenv import load_dotenv
-from telegram_bot import TelegramBot
-from model_training import continue_training, evaluate_model, is_model_optimal
-from stable_baselines3 import PPO
-from stable_baselines3.common.vec_env import DummyVecEnv
-from trading_env import CryptoTradingEnv
-
-# Load environment variables
-load_dotenv()
-
-# Fetch environment variables
-TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
-CHAT_ID = os.getenv("CHAT_ID")
-CHECK_INTERVAL = int(os.getenv("CHECK_INTERVAL"))
-MODEL_CHECK_IMPROVEMENT_INTERVAL = int(os.getenv("MODEL_CHECK_IMPROVEMENT_INTERVAL"))
-TRADE_ALERT_THRESHOLD = float(os.getenv("TRADE_ALERT_THRESHOLD"))
-INITIAL_BALANCE = float(os.getenv("INITIAL_BALANCE"))
-MODEL_PATH = os.getenv("MODEL_PATH")
-TELEGRAM_ENABLE = int(os.getenv("TELEGRAM_ENABLE"))
+import multiprocessing
+from checkpoint_store import CheckpointStore
+from evaluation_service import opportunity_evaluator, rank_opportunities
+from lazy_imports import LazyFunction
+from metrics import metrics, profiler, start_metrics_server
+from scheduler import Scheduler
+from settings import get_settings
+
+settings = get_settings().require(
+    "check_interval", "model_check_improvement_interval", "trade_alert_threshold", "model_path",
+    "policy_loss_threshold", "value_loss_threshold", "entropy_loss_threshold",
+)
+TELEGRAM_TOKEN = settings.telegram_token
+CHAT_ID = settings.chat_id
+CHECK_INTERVAL = settings.check_interval
+MODEL_CHECK_IMPROVEMENT_INTERVAL = settings.model_check_improvement_interval
+TRADE_ALERT_THRESHOLD = settings.trade_alert_threshold
+INITIAL_BALANCE = settings.initial_balance
+MODEL_PATH = settings.model_path
+TELEGRAM_ENABLE = settings.telegram_enable
+ASSET_IDS = list(settings.asset_ids)
 
 # Model Thresholds
-POLICY_LOSS_THRESHOLD = float(os.getenv("POLICY_LOSS_THRESHOLD"))
-VALUE_LOSS_THRESHOLD = float(os.getenv("VALUE_LOSS_THRESHOLD"))
-ENTROPY_LOSS_THRESHOLD = float(os.getenv("ENTROPY_LOSS_THRESHOLD"))
+POLICY_LOSS_THRESHOLD = settings.policy_loss_threshold
+VALUE_LOSS_THRESHOLD = settings.value_loss_threshold
+ENTROPY_LOSS_THRESHOLD = settings.entropy_loss_threshold
+
+# Training and health checks load torch and stable-baselines3 on first use, after the bot is up
+continue_training = LazyFunction("model_training", "continue_training")
+is_model_optimal = LazyFunction("model_training", "is_model_optimal")
 
 # Logging configuration
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
-# Initialize Telegram Bot only if Telegram is enabled
-if TELEGRAM_ENABLE:
-    telegram_bot = TelegramBot(TELEGRAM_TOKEN, CHAT_ID)
-    bot_thread = threading.Thread(target=telegram_bot.run, daemon=True)
-    bot_thread.start()
-else:
-    telegram_bot = None
+opportunity_alerts = metrics.counter("opportunity_alerts_total", "Opportunity alerts raised")
+retraining_runs = metrics.counter("retraining_runs_total", "Background retraining runs, by outcome", ["result"])
+retraining_in_progress = metrics.gauge("retraining_in_progress", "1 while a background retraining runs")
+
+# Telegram Bot, started by main() only if Telegram is enabled
+telegram_bot = None
+
+
+def start_telegram_bot():
+    """
+    Starts the Telegram bot on its own thread if Telegram is enabled.
+    Kept out of module import so retraining subprocesses don't start a second bot.
+    """
+    global telegram_bot
+    if TELEGRAM_ENABLE:
+        from telegram_bot import TelegramBot
+
+        telegram_bot = TelegramBot(TELEGRAM_TOKEN, CHAT_ID)
+        bot_thread = threading.Thread(target=telegram_bot.run, daemon=True)
+        bot_thread.start()
 
 
 def check_for_opportunity():
     """
-    Evaluates the model and sends a Telegram alert if a trading opportunity meets the threshold.
+    Evaluates the model on every watched asset and sends one Telegram alert
+    listing the assets whose opportunity meets the threshold, best first.
     """
-    logging.info("🔍 Checking for trading opportunities...")
+    logging.info(f"🔍 Checking for trading opportunities in {len(ASSET_IDS)} asset(s)...")
 
-    estimated_reward = evaluate_model()
-    profit_percentage = (estimated_reward / INITIAL_BALANCE) * 100
+    rewards = opportunity_evaluator.evaluate()
+    ranked = rank_opportunities(rewards, min_reward=(TRADE_ALERT_THRESHOLD / 100) * INITIAL_BALANCE)
 
-    if estimated_reward > (TRADE_ALERT_THRESHOLD / 100) * INITIAL_BALANCE:
+    if ranked:
+        lines = [
+            f"{rank}. **{asset_id}**: ${estimated_reward:.2f} ({(estimated_reward / INITIAL_BALANCE) * 100:.2f}%)"
+            for rank, (asset_id, estimated_reward) in enumerate(ranked, start=1)
+        ]
         message = (
             "📊 **Trading Opportunity Detected!**\n"
-            f"💰 **Estimated Profit:** ${estimated_reward:.2f} ({profit_percentage:.2f}%)\n"
+            "💰 **Estimated Profit:**\n" + "\n".join(lines) + "\n"
             "🚀 **Market conditions are favorable!**"
         )
+        opportunity_alerts.inc()
         logging.info(message)
         if TELEGRAM_ENABLE:
             telegram_bot.send_message(message)
 
 
+class BackgroundRetrainer:
+    """
+    Runs continue_training in a separate process so opportunity checks keep
+    running at CHECK_INTERVAL while the model retrains. The champion keeps
+    serving until a challenger is promoted, by an atomic file replace.
+    Health checks and the bot's /retrain share one instance, so at most one
+    retraining runs at a time.
+    """
+
+    def __init__(self):
+        self._context = multiprocessing.get_context("spawn")
+        self._start_lock = threading.Lock()
+        self.process = None
+        self.runs = 0
+        self.last_duration = 0.0
+        self.store = CheckpointStore(MODEL_PATH)
+
+    @property
+    def running(self):
+        return self.process is not None and self.process.is_alive()
+
+    async def run(self, notify=True):
+        """
+        Starts a retraining process and waits for it without blocking the loop.
+        Returns the outcome message, which is also sent to Telegram with `notify`,
+        or None without starting anything if a retraining is already running.
+        """
+        with self._start_lock:  # The bot's loop and the scheduler's may both get here
+            if self.running:
+                return None
+            # Not daemonic: with TRAIN_PARALLEL the retraining starts its own env workers.
+            # run_scheduler's shutdown terminates and joins it instead.
+            self.process = self._context.Process(target=continue_training, name="retrain", daemon=False)
+            previous = self.store.versions()[-1:]
+            start = time.perf_counter()
+            self.process.start()
+        retraining_in_progress.set(1)
+        try:
+            await asyncio.to_thread(self.process.join)
+        finally:
+            retraining_in_progress.set(0)
+
+        self.runs += 1
+        self.last_duration = time.perf_counter() - start
+        retraining_runs.inc(result="ok" if self.process.exitcode == 0 else "failed")
+        if self.process.exitcode == 0:
+            logging.info(f"✅ Background retraining finished in {self.last_duration:.1f}s")
+            message = f"✅ **Retraining finished** in {self.last_duration:.0f}s"
+            latest = self.store.versions()[-1:]
+            promotion = latest[0].get("promotion") if latest and latest != previous else None
+            if promotion:
+                outcome = "promoted" if promotion["promoted"] else "rejected, the champion keeps serving"
+                summary = (f"🥊 Challenger v{latest[0]['version']}: ${promotion['challenger_score']:.2f} "
+                           f"vs champion ${promotion['champion_score']:.2f} on held-out data, {outcome}")
+                logging.info(summary)
+                message += f"\n{summary}"
+            if notify and TELEGRAM_ENABLE:
+                telegram_bot.send_message(message)
+        else:
+            logging.error(f"❌ Background retraining exited with code {self.process.exitcode}")
+            message = f"❌ **Retraining failed** with exit code {self.process.exitcode}"
+        return message
+
+    def terminate(self):
+        if self.running:
+            logging.info("🛑 Terminating background retraining...")
+            self.process.terminate()
+            self.process.join(5)
+
+
+async def check_model_health(retrainer, background_tasks):
+    """
+    Checks the model's losses and starts background retraining if they are out of bounds.
+    """
+    logging.info("🔍 Checking model health...")
+
+    # Log values before making a retraining decision
+    logging.info("🔎 Checking if model needs retraining...")
+    optimal, policy_loss, value_loss, entropy_loss = await asyncio.to_thread(is_model_optimal)
+
+    logging.info(f"🔎 Evaluated Model -> Policy Loss: {policy_loss:.4f}, "
+                 f"Value Loss: {value_loss:.4f}, Entropy Loss: {entropy_loss:.4f}")
+    logging.info(f"🔎 Model optimal? {optimal}")
+
+    if optimal:
+        return
+    if retrainer.running:
+        logging.info("⏳ Retraining already in progress, skipping.")
+        return
+
+    logging.info(f"🔄 Retraining the model due to suboptimal performance!")
+    logging.info(f"📊 Policy Loss: {policy_loss:.4f} (Threshold: {POLICY_LOSS_THRESHOLD})")
+    logging.info(f"📊 Value Loss: {value_loss:.4f} (Threshold: {VALUE_LOSS_THRESHOLD})")
+    logging.info(f"📊 Entropy Loss: {entropy_loss:.4f} (Min Required: {ENTROPY_LOSS_THRESHOLD})")
+
+    task = asyncio.create_task(retrainer.run())
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
+    if TELEGRAM_ENABLE:
+        telegram_bot.send_message(
+            f"🔄 **Retraining Triggered!**\n"
+            f"📊 **Policy Loss:** {policy_loss:.4f} (Threshold: {POLICY_LOSS_THRESHOLD})\n"
+            f"📊 **Value Loss:** {value_loss:.4f} (Threshold: {VALUE_LOSS_THRESHOLD})\n"
+            f"📊 **Entropy Loss:** {entropy_loss:.4f} (Min Required: {ENTROPY_LOSS_THRESHOLD})\n"
+            "⚠️ **Model performance dropped below acceptable levels. Retraining now!**"
+        )
+
+
+async def run_scheduler():
+    """
+    Runs opportunity checks and model health checks as independent fixed-rate jobs.
+    """
+    retrainer = BackgroundRetrainer()
+    background_tasks = set()
+    if telegram_bot is not None:
+        telegram_bot.retrainer = retrainer
+
+    async def model_health_job():
+        await check_model_health(retrainer, background_tasks)
+
+    scheduler = Scheduler()
+    if hasattr(signal, "SIGUSR1"):
+        # `kill -USR1 <pid>` profiles the next evaluation
+        asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, profiler.arm)
+    scheduler.add_job("opportunity_check", CHECK_INTERVAL, check_for_opportunity)
+    scheduler.add_job("model_health", MODEL_CHECK_IMPROVEMENT_INTERVAL, model_health_job)
+    logging.info(f"⏳ Checking opportunities every {CHECK_INTERVAL}s, "
+                 f"model health every {MODEL_CHECK_IMPROVEMENT_INTERVAL}s")
+
+    try:
+        await scheduler.run()
+    finally:
+        retrainer.terminate()
+        for task in background_tasks:
+            task.cancel()
+        await asyncio.gather(*background_tasks, return_exceptions=True)
+        opportunity_evaluator.shutdown()
+        if telegram_bot is not None:
+            telegram_bot.sender.stop()
+        for name, job_metrics in scheduler.metrics().items():
+            logging.info(f"📈 Job '{name}': {job_metrics}")
+
+
 def main():
     """
     Runs the bot continuously, checking for opportunities and retraining if needed.
     """
-    last_model_check = 0
-
-    while True:
-        check_for_opportunity()
-
-        current_time = time.time()
-        if current_time - last_model_check >= MODEL_CHECK_IMPROVEMENT_INTERVAL:
-            logging.info("🔍 Checking model health...")
-            
-            # Log values before making a retraining decision
-            logging.info("🔎 Checking if model needs retraining...")
-            optimal, policy_loss, value_loss, entropy_loss = is_model_optimal()
-
-
-            logging.info(f"🔎 Evaluated Model -> Policy Loss: {policy_loss:.4f}, "
-                         f"Value Loss: {value_loss:.4f}, Entropy Loss: {entropy_loss:.4f}")
-            logging.info(f"🔎 Model optimal? {optimal}")
-
-            if not optimal:
-                logging.info(f"🔄 Retraining the model due to suboptimal performance!")
-                logging.info(f"📊 Policy Loss: {policy_loss:.4f} (Threshold: {POLICY_LOSS_THRESHOLD})")
-                logging.info(f"📊 Value Loss: {value_loss:.4f} (Threshold: {VALUE_LOSS_THRESHOLD})")
-                logging.info(f"📊 Entropy Loss: {entropy_loss:.4f} (Min Required: {ENTROPY_LOSS_THRESHOLD})")
-                
-                continue_training()
-                if TELEGRAM_ENABLE:
-                    telegram_bot.send_message(
-                        f"🔄 **Retraining Triggered!**\n"
-                        f"📊 **Policy Loss:** {policy_loss:.4f} (Threshold: {POLICY_LOSS_THRESHOLD})\n"
-                        f"📊 **Value Loss:** {value_loss:.4f} (Threshold: {VALUE_LOSS_THRESHOLD})\n"
-                        f"📊 **Entropy Loss:** {entropy_loss:.4f} (Min Required: {ENTROPY_LOSS_THRESHOLD})\n"
-                        "⚠️ **Model performance dropped below acceptable levels. Retraining now!**"
-                    )
-
-            last_model_check = time.time()
-
-        logging.info(f"⏳ Waiting {CHECK_INTERVAL} seconds before next check...")
-        time.sleep(CHECK_INTERVAL)
+    start_metrics_server()
+    start_telegram_bot()
+    asyncio.run(run_scheduler())
 
 if __name__ == "__main__":
     main()
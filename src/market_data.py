@@ -0,0 +1,228 @@
+"""
+HTTP client for market data (CoinGecko-compatible APIs).
+
+One process-wide client (see `get_client`) owns a pooled session, a token
+bucket shared by every thread, retries with jittered exponential backoff
+and ETag / Last-Modified revalidation of repeated requests.
+"""
+import time
+import random
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from metrics import metrics
+from settings import get_settings
+
+settings = get_settings()
+COINGECKO_API = settings.coingecko_api
+COINGECKO_MAX_CONNECTIONS = settings.coingecko_max_connections  # Concurrent requests to the API
+COINGECKO_MIN_INTERVAL = settings.coingecko_min_interval  # Seconds between request starts
+COINGECKO_BURST = settings.coingecko_burst
+COINGECKO_MAX_RETRIES = settings.coingecko_max_retries
+COINGECKO_BACKOFF = settings.coingecko_backoff
+MAX_BACKOFF = 30.0
+REQUEST_TIMEOUT = 5
+REVALIDATION_ENTRIES = 64  # Responses kept for conditional requests
+RANGE_END_STEP = 3600  # Seconds the end of a range query is rounded up to, so polls in between share one URL
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+coingecko_request_seconds = metrics.histogram(
+    "coingecko_request_seconds", "Latency of CoinGecko market_chart requests", ["outcome"])
+
+
+class MarketDataError(Exception):
+    """ A request that failed for good; `status` is its HTTP status, if any """
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` requests per second on average, with up
+    to `burst` at once. Callers reserve a token and sleep until it is theirs,
+    so waiting threads are served in order. A rate of 0 never waits.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """ Blocks until a token is available; returns the seconds waited """
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class MarketDataClient:
+    """
+    Rate-limited, retrying JSON client of one market-data API.
+    Connection errors, timeouts, 429 and 5xx responses are retried up to
+    `max_retries` times, sleeping a random time up to `backoff * 2 ** attempt`
+    seconds (at least the server's Retry-After). Responses with an ETag or
+    Last-Modified header are revalidated when the same URL is requested again.
+    """
+
+    def __init__(self, base_url=None, max_connections=None, min_interval=None, burst=None,
+                 max_retries=None, backoff=None, timeout=REQUEST_TIMEOUT):
+        self.base_url = (base_url or COINGECKO_API or "").rstrip("/")
+        self.max_connections = max_connections or COINGECKO_MAX_CONNECTIONS
+        min_interval = COINGECKO_MIN_INTERVAL if min_interval is None else min_interval
+        self.bucket = TokenBucket(1 / min_interval if min_interval > 0 else 0, burst or COINGECKO_BURST)
+        self.max_retries = COINGECKO_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff = COINGECKO_BACKOFF if backoff is None else backoff
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_connections)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._validated = OrderedDict()  # url -> (validators, payload)
+        self._validated_lock = threading.Lock()
+        self._rng = random.Random()
+
+    def _retry_delay(self, attempt, response=None):
+        delay = self._rng.uniform(0, min(MAX_BACKOFF, self.backoff * 2 ** attempt))
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.strip().isdigit():
+            delay = max(delay, min(MAX_BACKOFF, float(retry_after)))
+        return delay
+
+    def _conditional_headers(self, url):
+        with self._validated_lock:
+            entry = self._validated.get(url)
+        if entry is None:
+            return {}, None
+        validators, payload = entry
+        headers = {}
+        if "etag" in validators:
+            headers["If-None-Match"] = validators["etag"]
+        if "last_modified" in validators:
+            headers["If-Modified-Since"] = validators["last_modified"]
+        return headers, payload
+
+    def _remember(self, url, response, payload):
+        validators = {}
+        if response.headers.get("ETag"):
+            validators["etag"] = response.headers["ETag"]
+        if response.headers.get("Last-Modified"):
+            validators["last_modified"] = response.headers["Last-Modified"]
+        if not validators:
+            return
+        with self._validated_lock:
+            self._validated[url] = (validators, payload)
+            self._validated.move_to_end(url)
+            while len(self._validated) > REVALIDATION_ENTRIES:
+                self._validated.popitem(last=False)
+
+    def get_json(self, path, params=None):
+        """
+        GETs `base_url + path` and returns the decoded JSON body.
+        Raises MarketDataError once the request has failed for good.
+        """
+        url = requests.Request("GET", f"{self.base_url}{path}", params=params).prepare().url
+        for attempt in range(self.max_retries + 1):
+            headers, cached = self._conditional_headers(url)
+            self.bucket.acquire()
+            start = time.perf_counter()
+            response = None
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+                if response.status_code == 304 and cached is not None:
+                    coingecko_request_seconds.observe(time.perf_counter() - start, outcome="not_modified")
+                    return cached
+                response.raise_for_status()
+                payload = response.json()
+            except (requests.exceptions.RequestException, ValueError) as e:
+                status = response.status_code if response is not None else None
+                coingecko_request_seconds.observe(time.perf_counter() - start,
+                                                  outcome="rate_limited" if status == 429 else "error")
+                retryable = status in RETRY_STATUSES or isinstance(
+                    e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+                print(f"⚠️ API Error (Attempt {attempt + 1}/{self.max_retries + 1}): {e}")
+                if not retryable or attempt == self.max_retries:
+                    raise MarketDataError(str(e), status) from e
+                delay = self._retry_delay(attempt, response)
+                print(f"⏳ Waiting {delay:.1f} seconds before retrying...")
+                time.sleep(delay)
+                continue
+            coingecko_request_seconds.observe(time.perf_counter() - start, outcome="ok")
+            self._remember(url, response, payload)
+            return payload
+
+    def map(self, function, items):
+        """
+        Calls `function(item)` for every item concurrently, at most
+        `max_connections` at a time. Returns the results in order.
+        """
+        items = list(items)
+        workers = max(1, min(len(items), self.max_connections))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="market-data") as executor:
+            return list(executor.map(function, items))
+
+    def get_many(self, endpoints):
+        """
+        Fetches several (path, params) endpoints concurrently; returns their
+        JSON bodies in order, or the MarketDataError of each failed one.
+        """
+        def fetch(request):
+            try:
+                return self.get_json(*request)
+            except MarketDataError as e:
+                return e
+        return self.map(fetch, endpoints)
+
+    def market_chart(self, asset_id, days=None, since=None):
+        """
+        Returns the asset's (timestamp_ms, USD price) rows: the last `days`,
+        or with `since` (ms) only the points newer than that timestamp.
+        The range's end is rounded up to RANGE_END_STEP, so polls with no
+        new points repeat the same URL and are revalidated.
+        Returns None if the API is unavailable.
+        """
+        if since is None:
+            path, params = f"/coins/{asset_id}/market_chart", {"vs_currency": "usd", "days": days}
+        else:
+            path = f"/coins/{asset_id}/market_chart/range"
+            to = -(-int(time.time()) // RANGE_END_STEP) * RANGE_END_STEP  # An end in the future returns up to now
+            params = {"vs_currency": "usd", "from": int(since // 1000) + 1, "to": to}
+        try:
+            payload = self.get_json(path, params)
+            return np.array(payload["prices"], dtype=np.float64).reshape(-1, 2)
+        except (MarketDataError, KeyError, TypeError, ValueError) as e:
+            logging.warning(f"⚠️ No market chart for {asset_id}: {e}")
+            return None
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Returns the process-wide market-data client, created on first use.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = MarketDataClient()
+        return _client
@@ -0,0 +1,287 @@
+import os
+import io
+import time
+import pstats
+import bisect
+import cProfile
+import logging
+import threading
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from settings import get_settings
+
+settings = get_settings()
+METRICS_HOST = settings.metrics_host
+METRICS_PORT = settings.metrics_port  # 0 disables the endpoint
+PROFILE_DIR = settings.profile_dir
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    """ One metric family: a value per combination of label values """
+    type = None
+
+    def __init__(self, name, description, label_names=()):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"Metric '{self.name}' expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self):
+        with self._lock:
+            return [(self.name, key, (), value) for key, value in self._values.items()]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.type}"]
+        for name, key, extra, value in self._samples():
+            lines.append(f"{name}{_format_labels(self.label_names, key, extra)} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """ Monotonically increasing count """
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    """ Value that can go up and down """
+    type = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class _HistogramValue:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, size):
+        self.counts = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram(_Metric):
+    """ Distribution of observed values (typically durations in seconds) """
+    type = "histogram"
+
+    def __init__(self, name, description, label_names=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, description, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = _HistogramValue(len(self.buckets) + 1)
+            entry.counts[index] += 1
+            entry.sum += value
+            entry.count += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """ Observes the duration of the `with` block, also when it raises """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def value(self, **labels):
+        """ Returns (count, sum) of the observations """
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return (entry.count, entry.sum) if entry is not None else (0, 0.0)
+
+    def _samples(self):
+        samples = []
+        with self._lock:
+            for key, entry in self._values.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), entry.counts):
+                    cumulative += count
+                    samples.append((f"{self.name}_bucket", key, (("le", _format_value(bound)),), cumulative))
+                samples.append((f"{self.name}_sum", key, (), entry.sum))
+                samples.append((f"{self.name}_count", key, (), entry.count))
+        return samples
+
+
+class MetricsRegistry:
+    """
+    Process-wide collection of counters, gauges and histograms.
+    Asking for an existing name returns the same metric, so modules can
+    declare what they record at import time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _get_or_create(self, cls, name, description, label_names, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, description, label_names, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric '{name}' is already registered as a {metric.type}")
+            return metric
+
+    def counter(self, name, description, label_names=()):
+        return self._get_or_create(Counter, name, description, label_names)
+
+    def gauge(self, name, description, label_names=()):
+        return self._get_or_create(Gauge, name, description, label_names)
+
+    def histogram(self, name, description, label_names=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, description, label_names, buckets=buckets)
+
+    def render(self):
+        """
+        Returns every metric in the Prometheus text exposition format.
+        """
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        payload = self.server.registry.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_metrics_server(port=None, host=None, registry=None):
+    """
+    Serves `/metrics` in the Prometheus text format from a daemon thread.
+    Returns the server, or None when the port is 0.
+    """
+    port = METRICS_PORT if port is None else port
+    if not port:
+        return None
+    server = ThreadingHTTPServer((host or METRICS_HOST, port), _MetricsHandler)
+    server.daemon_threads = True
+    server.registry = registry or metrics
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    logging.info(f"📈 Serving metrics on http://{server.server_address[0]}:{server.server_address[1]}/metrics")
+    return server
+
+
+class Profiler:
+    """
+    On-demand cProfile of a hot path.
+    `arm()` (from a signal handler or a command) makes the next call of each
+    `profiled` function run under cProfile; the stats are dumped to
+    `profile_dir` and a summary of the top functions is logged and passed to
+    the `on_dump` callbacks.
+    """
+
+    def __init__(self, profile_dir=None, top=15):
+        self.profile_dir = profile_dir or PROFILE_DIR
+        self.top = top
+        self.on_dump = []
+        self._lock = threading.Lock()
+        self._armed = 0
+
+    def arm(self, count=1):
+        """
+        Profiles the next `count` calls; safe to call from signal handlers and threads.
+        """
+        with self._lock:
+            self._armed = max(self._armed, count)
+        logging.info(f"🧪 Profiling the next {count} evaluation(s)")
+
+    def _take(self):
+        with self._lock:
+            if self._armed <= 0:
+                return False
+            self._armed -= 1
+            return True
+
+    def profiled(self, name):
+        """
+        Decorator: runs the function under cProfile when the profiler is armed.
+        """
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self._take():
+                    return func(*args, **kwargs)
+                profile = cProfile.Profile()
+                try:
+                    return profile.runcall(func, *args, **kwargs)
+                finally:
+                    self._dump(name, profile)
+            return wrapper
+        return decorator
+
+    def _dump(self, name, profile):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        path = os.path.join(self.profile_dir, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.prof")
+        profile.dump_stats(path)
+
+        stream = io.StringIO()
+        pstats.Stats(profile, stream=stream).sort_stats("cumulative").print_stats(self.top)
+        summary = stream.getvalue()
+        logging.info(f"🧪 Profile of '{name}' written to {path}\n{summary}")
+        for callback in list(self.on_dump):
+            try:
+                callback(path, summary)
+            except Exception:
+                logging.exception("❌ Profile callback failed")
+
+
+# Shared by every instrumented module
+metrics = MetricsRegistry()
+profiler = Profiler()
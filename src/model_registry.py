@@ -0,0 +1,136 @@
+import io
+import os
+import time
+import hashlib
+import logging
+import threading
+from metrics import metrics
+from numpy_policy import NumpyPolicy
+
+model_load_seconds = metrics.histogram("model_load_seconds", "Time to deserialize a model checkpoint")
+model_cache_hits = metrics.counter("model_cache_hits_total", "Model requests served from the registry cache")
+
+
+def load_ppo(source):
+    """ Loads an SB3 PPO checkpoint, importing stable-baselines3 on first use """
+    from stable_baselines3 import PPO
+
+    return PPO.load(source)
+
+
+class _LoadedModel:
+    """ A loaded model plus the file state it was loaded from """
+    def __init__(self, model, mtime_ns, size, digest):
+        self.model = model
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.digest = digest
+
+
+class ModelRegistry:
+    """
+    Process-wide, thread-safe cache of loaded models.
+    A model is reloaded only when its file's mtime/size changes *and* its
+    content hash differs from the cached copy.
+    """
+
+    def __init__(self, loader=load_ppo):
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._models = {}
+        self._digests = {}  # path -> ((mtime_ns, size), sha256)
+        self.load_count = 0
+        self.hit_count = 0
+        self.load_seconds = []
+
+    def get(self, path):
+        """
+        Returns the model stored at `path`, loading it only if the file changed.
+        """
+        stat = os.stat(path)
+
+        with self._lock:
+            entry = self._models.get(path)
+            if entry is not None and (entry.mtime_ns, entry.size) == (stat.st_mtime_ns, stat.st_size):
+                self.hit_count += 1
+                model_cache_hits.inc()
+                return entry.model
+
+            with open(path, "rb") as f:
+                content = f.read()
+            digest = hashlib.sha256(content).hexdigest()
+
+            if entry is not None and entry.digest == digest:
+                # Touched but unchanged: keep the loaded model
+                entry.mtime_ns, entry.size = stat.st_mtime_ns, stat.st_size
+                self.hit_count += 1
+                model_cache_hits.inc()
+                return entry.model
+
+            start = time.perf_counter()
+            model = self._loader(io.BytesIO(content))
+            elapsed = time.perf_counter() - start
+            model_load_seconds.observe(elapsed)
+
+            self._models[path] = _LoadedModel(model, stat.st_mtime_ns, stat.st_size, digest)
+            self._digests[path] = ((stat.st_mtime_ns, stat.st_size), digest)
+            self.load_count += 1
+            self.load_seconds.append(elapsed)
+            logging.info(f"📂 Loaded model from {path} in {elapsed:.3f}s (load #{self.load_count})")
+            return model
+
+    def digest(self, path):
+        """
+        Returns the SHA-256 of the file at `path`, re-hashed only when its
+        mtime/size changes.
+        """
+        stat = os.stat(path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._digests.get(path)
+            if cached is not None and cached[0] == stamp:
+                return cached[1]
+        with open(path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        with self._lock:
+            self._digests[path] = (stamp, digest)
+        return digest
+
+    def version(self, path):
+        """
+        Returns the content hash of the currently loaded model, or None.
+        """
+        with self._lock:
+            entry = self._models.get(path)
+            return entry.digest if entry is not None else None
+
+    def invalidate(self, path=None):
+        """
+        Drops one cached model, or all of them.
+        """
+        with self._lock:
+            if path is None:
+                self._models.clear()
+                self._digests.clear()
+            else:
+                self._models.pop(path, None)
+                self._digests.pop(path, None)
+
+    def stats(self):
+        """
+        Returns load-count and load-latency statistics.
+        """
+        with self._lock:
+            load_seconds = list(self.load_seconds)
+            return {
+                "loads": self.load_count,
+                "hits": self.hit_count,
+                "last_load_seconds": load_seconds[-1] if load_seconds else 0.0,
+                "mean_load_seconds": sum(load_seconds) / len(load_seconds) if load_seconds else 0.0,
+                "max_load_seconds": max(load_seconds) if load_seconds else 0.0,
+            }
+
+
+# Shared by the main loop and the Telegram thread
+model_registry = ModelRegistry()
+policy_registry = ModelRegistry(loader=NumpyPolicy.load)  # NumPy exports of the models
@@ -1,96 +1,385 @@
 import os
+import json
+import time
+import hashlib
 import numpy as np
 import logging
-import time
-from dotenv import load_dotenv
+import torch
 from stable_baselines3 import PPO
+from stable_baselines3.common.buffers import RolloutBuffer
 from stable_baselines3.common.callbacks import BaseCallback
-from stable_baselines3.common.vec_env import DummyVecEnv
-from trading_env import CryptoTradingEnv
+from stable_baselines3.common.utils import obs_as_tensor
+from checkpoint_store import CheckpointStore
+from inference import EVAL_STEPS, evaluation_seconds, inference_model, recent_start_offsets
+from metrics import metrics
+from model_registry import model_registry
+from numpy_policy import export_policy, policy_path
+from settings import get_settings
+from trading_env import load_price_history
+from vec_trading_env import BatchedCryptoTradingEnv, SharedPriceSubprocVecEnv
 
-# Load environment variables
-load_dotenv()
+settings = get_settings().require(
+    "model_path", "policy_loss_threshold", "value_loss_threshold", "entropy_loss_threshold")
 
-INITIAL_BALANCE = float(os.getenv("INITIAL_BALANCE"))
-MODEL_PATH = os.getenv("MODEL_PATH")
+INITIAL_BALANCE = settings.initial_balance
+MODEL_PATH = settings.model_path
 
 # Model Health Thresholds
-POLICY_LOSS_THRESHOLD = float(os.getenv("POLICY_LOSS_THRESHOLD"))
-VALUE_LOSS_THRESHOLD = float(os.getenv("VALUE_LOSS_THRESHOLD"))
-ENTROPY_LOSS_THRESHOLD = float(os.getenv("ENTROPY_LOSS_THRESHOLD"))
+POLICY_LOSS_THRESHOLD = settings.policy_loss_threshold
+VALUE_LOSS_THRESHOLD = settings.value_loss_threshold
+ENTROPY_LOSS_THRESHOLD = settings.entropy_loss_threshold
+HEALTH_CHECK_ROLLOUTS = settings.health_check_rollouts
+HEALTH_CHECK_N_STEPS = settings.health_check_n_steps
+
+# Training Config
+TRAIN_TIMESTEPS = settings.train_timesteps
+TRAIN_N_ENVS = settings.train_n_envs
+TRAIN_PARALLEL = settings.train_parallel
+TRAIN_N_STEPS = settings.train_n_steps
+TRAIN_MODE = settings.train_mode
+TRAIN_REPLAY_FRACTION = settings.train_replay_fraction
+TRAIN_TIMESTEPS_PER_NEW_POINT = settings.train_timesteps_per_new_point
+EARLY_STOP_PATIENCE = settings.early_stop_patience
+EARLY_STOP_MIN_DELTA = settings.early_stop_min_delta
+
+# Promotion
+SHADOW_TRAINING = settings.shadow_training
+PROMOTION_HOLDOUT = settings.promotion_holdout
+PROMOTION_MARGIN = settings.promotion_margin
+
+
+health_check_seconds = metrics.histogram("health_check_seconds", "Time to decide if the model needs retraining", ["source"])
+learn_seconds = metrics.histogram("learn_seconds", "Time spent in PPO.learn per training run")
+training_timesteps = metrics.counter("training_timesteps_total", "Timesteps trained by continue_training")
+promotions = metrics.counter("challenger_promotions_total", "Shadow-trained challengers, by outcome", ["result"])
 
 class TrainingMetricsCallback(BaseCallback):
-    """ Extracts training loss metrics """
-    def __init__(self):
+    """
+    Records policy, value and entropy losses once per rollout.
+    With `patience`, stops training once the value loss has not improved by
+    a relative `min_delta` on its best value for `patience` rollouts.
+    `monitor(callback)` is called after every recorded rollout and stops
+    training by returning False (e.g. to prune a sweep trial).
+    """
+    LOSS_KEYS = {
+        "policy_loss": ("train/policy_gradient_loss", "train/policy_loss"),
+        "value_loss": ("train/value_loss",),
+        "entropy_loss": ("train/entropy_loss",),
+    }
+
+    def __init__(self, patience=0, min_delta=0.0, monitor=None):
         super().__init__()
         self.policy_loss = []
         self.value_loss = []
         self.entropy_loss = []
+        self.patience = patience
+        self.min_delta = min_delta
+        self.monitor = monitor
+        self.stopped_early = False
+        self.stopped_by_monitor = False
+        self._last_update = None
+        self._best_value_loss = None
+        self._stale_rollouts = 0
 
-    def _on_step(self) -> bool:
+    def _record_losses(self):
+        """ Appends the losses of the last gradient update, once per update """
         logs = self.model.logger.name_to_value
-        if "train/policy_loss" in logs:
-            self.policy_loss.append(logs["train/policy_loss"])
-        if "train/value_loss" in logs:
-            self.value_loss.append(logs["train/value_loss"])
-        if "train/entropy_loss" in logs:
-            self.entropy_loss.append(logs["train/entropy_loss"])
-        return True
-
-def evaluate_model():
-    """ Runs the model and returns estimated reward """
-    env = DummyVecEnv([lambda: CryptoTradingEnv()])
-    model = PPO.load(MODEL_PATH)
-    
-    obs = env.reset()
-    total_reward = 0
-    for _ in range(10):
-        action, _ = model.predict(obs)
-        obs, reward, done, _ = env.step(action)
-        total_reward += reward
+        n_updates = logs.get("train/n_updates")
+        if n_updates is None or n_updates == self._last_update:
+            return
+        self._last_update = n_updates
+        for name, keys in self.LOSS_KEYS.items():
+            for key in keys:
+                if key in logs:
+                    getattr(self, name).append(float(logs[key]))
+                    break
+        self._check_improvement()
+        if self.monitor is not None and self.monitor(self) is False:
+            self.stopped_by_monitor = True
+
+    def _check_improvement(self):
+        """ Counts the rollouts since the value loss last improved """
+        if not self.patience or not self.value_loss:
+            return
+        latest = self.value_loss[-1]
+        if self._best_value_loss is None or latest < self._best_value_loss * (1 - self.min_delta):
+            self._best_value_loss = latest
+            self._stale_rollouts = 0
+            return
+        self._stale_rollouts += 1
+        if self._stale_rollouts >= self.patience and not self.stopped_early:
+            self.stopped_early = True
+            logging.info(f"⏹️ Value loss has not improved for {self._stale_rollouts} rollouts, stopping early")
+
+    def _on_rollout_start(self) -> None:
+        # Losses from the previous update are still in the logger at this point
+        self._record_losses()
 
-    return float(total_reward.item())
+    def _on_training_end(self) -> None:
+        self._record_losses()
 
-def is_model_optimal():
+    def _on_step(self) -> bool:
+        return not (self.stopped_early or self.stopped_by_monitor)
+
+    def summary(self):
+        """ Returns the losses of the last recorded update """
+        return {
+            name: getattr(self, name)[-1] if getattr(self, name) else None
+            for name in self.LOSS_KEYS
+        }
+
+    def save(self, model_path):
+        """ Writes the recorded losses as a sidecar next to the saved model """
+        metrics = {
+            "model_sha256": file_sha256(model_path),
+            "num_timesteps": int(self.model.num_timesteps),
+            "policy_loss": self.policy_loss,
+            "value_loss": self.value_loss,
+            "entropy_loss": self.entropy_loss,
+        }
+        sidecar = metrics_path(model_path)
+        tmp_path = f"{sidecar}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(metrics, f)
+        os.replace(tmp_path, sidecar)
+
+def file_sha256(path):
+    """ Returns the SHA-256 of a file's content """
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def metrics_path(model_path):
+    """ Sidecar path holding the training metrics of a saved model """
+    return f"{os.path.splitext(model_path)[0]}.metrics.json"
+
+def load_training_metrics(model_path=None):
     """
-    Evaluates if the model meets the required thresholds.
-    Returns a tuple: (bool, policy_loss, value_loss, entropy_loss)
+    Returns the persisted training metrics of the model, or None if there is
+    no sidecar or it belongs to a different version of the model file.
     """
-    if not os.path.exists(MODEL_PATH):
-        return False, 0, 0, 0  # ✅ Model does not exist, force retraining
+    model_path = model_path or MODEL_PATH
+    try:
+        with open(metrics_path(model_path)) as f:
+            metrics = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if metrics.get("model_sha256") != file_sha256(model_path) or not metrics.get("value_loss"):
+        return None
+    return metrics
+
+def compute_rollout_losses(model, env, n_steps=None):
+    """
+    Computes PPO's policy, value and entropy losses on one deterministic rollout
+    without taking any optimizer step. Returns (policy_loss, value_loss, entropy_loss).
+    """
+    n_steps = n_steps or HEALTH_CHECK_N_STEPS
+    policy = model.policy
+    buffer = RolloutBuffer(n_steps, env.observation_space, env.action_space, device=model.device,
+                           gamma=model.gamma, gae_lambda=model.gae_lambda, n_envs=env.num_envs)
 
-    model = PPO.load(MODEL_PATH)
-    env = DummyVecEnv([lambda: CryptoTradingEnv()])
-    model.set_env(env)
+    with torch.no_grad():
+        obs = env.reset()
+        episode_starts = np.ones(env.num_envs, dtype=bool)
+        for _ in range(n_steps):
+            actions, values, log_probs = policy(obs_as_tensor(obs, model.device), deterministic=True)
+            actions = actions.cpu().numpy()
+            new_obs, rewards, dones, _ = env.step(actions)
+            buffer.add(obs, actions.reshape(-1, 1), rewards, episode_starts, values, log_probs)
+            obs, episode_starts = new_obs, dones
 
-    callback = TrainingMetricsCallback()
-    model.learn(total_timesteps=200, callback=callback)
+        buffer.compute_returns_and_advantage(policy.predict_values(obs_as_tensor(obs, model.device)), dones)
+        size = n_steps * env.num_envs
+        observations = buffer.to_torch(buffer.observations.reshape(size, -1))
+        old_log_prob = buffer.to_torch(buffer.log_probs.reshape(size))
+        returns = buffer.to_torch(buffer.returns.reshape(size))
+        advantages = buffer.to_torch(buffer.advantages.reshape(size))
+        values, log_prob, entropy = policy.evaluate_actions(observations, buffer.to_torch(buffer.actions.reshape(size)).long())
 
-    avg_policy_loss = np.mean(callback.policy_loss) if callback.policy_loss else 0
-    avg_value_loss = np.mean(callback.value_loss) if callback.value_loss else 0
-    avg_entropy_loss = np.mean(callback.entropy_loss) if callback.entropy_loss else 0
+        if model.normalize_advantage and len(advantages) > 1:
+            advantages = (advantages - advantages.mean()) / (advantages.std() + 1e-8)
+        clip_range = model.clip_range(model._current_progress_remaining)
+        ratio = torch.exp(log_prob - old_log_prob)
+        policy_loss = -torch.min(advantages * ratio, advantages * torch.clamp(ratio, 1 - clip_range, 1 + clip_range)).mean()
+        value_loss = torch.nn.functional.mse_loss(returns, values.flatten())
+        entropy_loss = -torch.mean(entropy)
 
-    needs_retraining = (
-        (abs(avg_policy_loss) > POLICY_LOSS_THRESHOLD and avg_policy_loss > 0) or
-        (abs(avg_value_loss) > VALUE_LOSS_THRESHOLD and avg_value_loss > 0) or
-        (avg_entropy_loss < ENTROPY_LOSS_THRESHOLD and avg_entropy_loss > 0)
+    return policy_loss.item(), value_loss.item(), entropy_loss.item()
+
+def needs_retraining(policy_loss, value_loss, entropy_loss, thresholds=None):
+    """
+    Applies the health thresholds to a model's losses. `thresholds` is a
+    (policy, value, entropy) tuple, by default the *_LOSS_THRESHOLD settings.
+    """
+    policy_threshold, value_threshold, entropy_threshold = thresholds or (
+        POLICY_LOSS_THRESHOLD, VALUE_LOSS_THRESHOLD, ENTROPY_LOSS_THRESHOLD)
+    return (
+        (abs(policy_loss) > policy_threshold and policy_loss > 0) or
+        (abs(value_loss) > value_threshold and value_loss > 0) or
+        (entropy_loss < entropy_threshold and entropy_loss > 0)
     )
 
+def is_model_optimal(fresh=False, model_path=None):
+    """
+    Evaluates if the model meets the required thresholds.
+    Uses the losses persisted by the last training run; with `fresh`, or when
+    they are missing, computes them on a new rollout without updating the model.
+    Returns a tuple: (bool, policy_loss, value_loss, entropy_loss)
+    """
+    model_path = model_path or MODEL_PATH
+    if not os.path.exists(model_path):
+        return False, 0, 0, 0  # ✅ Model does not exist, force retraining
+
+    start = time.perf_counter()
+    training_metrics = None if fresh else load_training_metrics(model_path)
+    if training_metrics is not None:
+        logging.info("📄 Using persisted training metrics")
+        avg_policy_loss = float(np.mean(training_metrics["policy_loss"][-HEALTH_CHECK_ROLLOUTS:])) if training_metrics["policy_loss"] else 0.0
+        avg_value_loss = float(np.mean(training_metrics["value_loss"][-HEALTH_CHECK_ROLLOUTS:]))
+        avg_entropy_loss = float(np.mean(training_metrics["entropy_loss"][-HEALTH_CHECK_ROLLOUTS:])) if training_metrics["entropy_loss"] else 0.0
+        health_check_seconds.observe(time.perf_counter() - start, source="persisted")
+    else:
+        logging.info("🧮 Computing losses on a fresh rollout (no optimizer steps)")
+        model = model_registry.get(model_path)
+        env = BatchedCryptoTradingEnv(random_start=False)
+        avg_policy_loss, avg_value_loss, avg_entropy_loss = compute_rollout_losses(model, env)
+        health_check_seconds.observe(time.perf_counter() - start, source="fresh")
+
+    retrain = needs_retraining(avg_policy_loss, avg_value_loss, avg_entropy_loss)
+
     logging.info(f"🔎 Model Evaluation -> Policy Loss: {avg_policy_loss:.4f}, Value Loss: {avg_value_loss:.4f}, Entropy Loss: {avg_entropy_loss:.4f}")
     logging.info(f"🔎 Thresholds -> Policy: {POLICY_LOSS_THRESHOLD}, Value: {VALUE_LOSS_THRESHOLD}, Entropy: {ENTROPY_LOSS_THRESHOLD}")
-    logging.info(f"🔎 Needs retraining? {'Yes' if needs_retraining else 'No'}")
+    logging.info(f"🔎 Needs retraining? {'Yes' if retrain else 'No'}")
+
+    return not retrain, avg_policy_loss, avg_value_loss, avg_entropy_loss
+
+def data_range(env):
+    """ Returns the [first, last] price timestamps (ms) an env was built from """
+    timestamps = getattr(env, "timestamps", None)
+    if timestamps is None or np.size(timestamps) == 0:
+        return None
+    timestamps = np.asarray(timestamps)
+    return [int(timestamps[..., 0].min()), int(timestamps[..., -1].max())]
+
+def rollback_model(version=None):
+    """
+    Publishes an earlier checkpoint (the previous one by default).
+    Returns the version now being served.
+    """
+    return CheckpointStore(MODEL_PATH).rollback(version)
+
+def make_training_env(n_envs, parallel, data=None, timestamps=None):
+    """
+    Builds the training env: one subprocess worker per env when `parallel`,
+    otherwise a single in-process batched env. Trains on the latest price
+    history, or on `data` (with its `timestamps`) when given.
+    """
+    if parallel and n_envs > 1:
+        env = SharedPriceSubprocVecEnv(n_envs, data=data)
+    else:
+        env = BatchedCryptoTradingEnv(n_envs=n_envs, data=data)
+    if data is not None:
+        env.timestamps = timestamps
+    return env
+
+def score_models(models, data, rollouts=None, steps=None):
+    """
+    Scores several models on the same recent rollouts in one pass: at every
+    step the rollouts' observations, identical for all models, go through
+    each model as one batch (argmax actions) and each model trades its own
+    copy of the rollouts. `rollouts` defaults to every window starting in the
+    last PROMOTION_HOLDOUT points.
+    Returns each model's mean mark-to-market profit at the end of the rollouts,
+    which, unlike the sell rewards, also counts positions still held.
+    """
+    steps = steps or EVAL_STEPS
+    rollouts = rollouts or max(1, PROMOTION_HOLDOUT - steps - 1)
+    data = np.asarray(data, dtype=np.float64)
+    # One step of slack: an env that reaches the last price resets before it can be marked
+    offsets = recent_start_offsets(len(data), rollouts, steps + 1)
+    env = BatchedCryptoTradingEnv(n_envs=rollouts * len(models), data=data, start_offsets=np.tile(offsets, len(models)))
+    obs = env.reset()
+    for _ in range(steps):
+        shared = obs[:rollouts]
+        actions = np.concatenate([np.asarray(model.predict(shared, deterministic=True)[0]).reshape(rollouts) for model in models])
+        obs, _, _, _ = env.step(actions)
+    equity = env.balance + env.crypto_held * data[env.current_step]
+    return (equity - env.initial_balance).reshape(len(models), rollouts).mean(axis=1)
+
+def load_champion(model_path):
+    """ The serving model, or None if its file is gone """
+    try:
+        return inference_model(model_path)
+    except FileNotFoundError as e:
+        logging.warning(f"⚠️ No serving model to compare with, the challenger wins by default: {e}")
+        return None
+    except Exception:
+        logging.exception(f"❌ Cannot load the serving model {model_path} to score the challenger")
+        raise
+
+def scale_rollout(total_timesteps, n_envs, rollout_size=None):
+    """
+    Splits the rollout (`rollout_size` samples, TRAIN_N_STEPS by default)
+    across `n_envs` workers so each collects 1/n_envs of it, and rounds the
+    training budget up to whole rollouts.
+    Returns (n_steps per env, total timesteps).
+    """
+    n_steps = max(16, (rollout_size or TRAIN_N_STEPS) // n_envs)
+    rollout_size = n_steps * n_envs
+    rollouts = max(1, -(-total_timesteps // rollout_size))
+    return n_steps, rollouts * rollout_size
+
+def new_data_start(timestamps, metadata):
+    """
+    Index of the first price point newer than the data a checkpoint was
+    trained on (from its `data_range` metadata), or None if unknown.
+    """
+    trained_range = (metadata or {}).get("data_range")
+    if not trained_range or timestamps is None or np.size(timestamps) == 0:
+        return None
+    timestamps = np.asarray(timestamps)
+    latest = timestamps if timestamps.ndim == 1 else timestamps.min(axis=0)
+    return int(np.searchsorted(latest, trained_range[1], side="right"))
 
-    return not needs_retraining, avg_policy_loss, avg_value_loss, avg_entropy_loss
+def incremental_timesteps(new_points, max_timesteps):
+    """ Training budget proportional to the number of new price points """
+    return min(max_timesteps, new_points * TRAIN_TIMESTEPS_PER_NEW_POINT)
 
-def continue_training():
+def continue_training(n_envs=None, parallel=None, total_timesteps=None, mode=None,
+                      model_path=None, env=None, ppo_kwargs=None, monitor=None, checkpoint_dir=None, shadow=None):
     """
     Retrains the model only if necessary, based on technical indicators.
+    In "incremental" mode an existing model is warm-started on episodes that
+    mostly begin in data newer than its checkpoint, with a budget proportional
+    to how much data is new; "full" trains on the whole series for the full budget,
+    as does "incremental" when nothing is newer than the checkpoint.
+    Training stops early once the value loss stops improving.
+    `n_envs`, `parallel`, `total_timesteps` and `mode` default to TRAIN_N_ENVS,
+    TRAIN_PARALLEL, TRAIN_TIMESTEPS and TRAIN_MODE. `model_path` (MODEL_PATH),
+    a prebuilt `env`, PPO hyperparameters (`ppo_kwargs`, where `n_steps` is
+    the rollout size across all envs), a per-rollout `monitor` (see
+    TrainingMetricsCallback) and a `checkpoint_dir` let sweeps train their own models.
+    In shadow mode (`shadow`, SHADOW_TRAINING by default) the retrained model
+    is a challenger: it trains without the last PROMOTION_HOLDOUT prices,
+    is scored against the serving model on them (see `score_models`), and is
+    published only if it wins by more than PROMOTION_MARGIN; otherwise it is only stored.
+    A holdout shorter than EVAL_STEPS + 2 points leaves nothing unseen to score
+    on, so the model is then trained on everything and published directly.
+    Returns the new checkpoint's metadata, or None if no training was needed.
     """
-    model_exists = os.path.exists(MODEL_PATH)
+    n_envs = TRAIN_N_ENVS if n_envs is None else n_envs
+    parallel = TRAIN_PARALLEL if parallel is None else parallel
+    total_timesteps = TRAIN_TIMESTEPS if total_timesteps is None else total_timesteps
+    mode = mode or TRAIN_MODE
+    model_path = model_path or MODEL_PATH
+    shadow = SHADOW_TRAINING if shadow is None else shadow
+    ppo_kwargs = dict(ppo_kwargs or {})
+    rollout_size = ppo_kwargs.pop("n_steps", None)
+
+    model_exists = os.path.exists(model_path)
     logging.info(f"🔍 Model file exists: {model_exists}")
 
     if model_exists:
-        optimal, policy_loss, value_loss, entropy_loss = is_model_optimal()
+        optimal, policy_loss, value_loss, entropy_loss = is_model_optimal(model_path=model_path)
         logging.info(f"🔍 Model optimal? {optimal} (Policy Loss: {policy_loss}, Value Loss: {value_loss}, Entropy Loss: {entropy_loss})")
         
         if optimal:
@@ -103,39 +392,104 @@ def continue_training():
 
     # Log before training
     if model_exists:
-        before_training_time = os.path.getmtime(MODEL_PATH)
+        before_training_time = os.path.getmtime(model_path)
         logging.info(f"🕒 Model file timestamp before training: {before_training_time}")
 
     # Initialize environment
-    env = DummyVecEnv([lambda: CryptoTradingEnv()])
-    
-    if model_exists:
-        logging.info("📂 Loading existing model...")
-        model = PPO.load(MODEL_PATH)
-        model.set_env(env)
-    else:
-        logging.info("📢 Initializing new PPO model...")
-        model = PPO("MlpPolicy", env, verbose=1)
-
-    logging.info("⏳ Training the model for 5000 timesteps...")
-    model.learn(total_timesteps=5000)
+    shadow = shadow and model_exists and env is None
+    if shadow:
+        timestamps, prices = load_price_history()
+        holdout = min(PROMOTION_HOLDOUT, len(prices) // 2)
+        min_holdout = EVAL_STEPS + 2  # Room for one scoring rollout that starts at the first held-out point
+        if holdout < min_holdout:
+            logging.warning(f"⚠️ A {holdout}-point holdout cannot score a challenger on unseen data "
+                            f"(at least {min_holdout} needed), publishing the retrained model directly")
+            shadow = False
+            env = make_training_env(n_envs, parallel, data=prices, timestamps=timestamps)
+        else:
+            env = make_training_env(n_envs, parallel, data=prices[:-holdout], timestamps=timestamps[:-holdout])
+            logging.info(f"🥊 Shadow training: holding out the last {holdout} price points to score the challenger")
+    elif env is None:
+        env = make_training_env(n_envs, parallel)
+    n_envs = env.num_envs
+    store = CheckpointStore(model_path, checkpoint_dir)
+    recent_start = new_data_start(env.timestamps, store.metadata()) if model_exists and mode == "incremental" else None
+    new_points = None
+    if recent_start is not None:
+        new_points = int(np.shape(env.timestamps)[-1]) - recent_start
+    if new_points == 0:
+        # Episodes focused past the last tick would be one step long
+        logging.info("🆕 No price points newer than the checkpoint, training on the whole series")
+        recent_start = None
+    elif recent_start is not None:
+        total_timesteps = incremental_timesteps(new_points, total_timesteps)
+        if hasattr(env, "focus_on_recent"):
+            env.focus_on_recent(recent_start, TRAIN_REPLAY_FRACTION)
+        else:
+            logging.info("⚠️ Subprocess workers sample episodes uniformly, only the budget is incremental")
+        logging.info(f"🆕 {new_points} new price point(s) since the checkpoint, "
+                     f"replaying {TRAIN_REPLAY_FRACTION:.0%} older windows")
+    n_steps, total_timesteps = scale_rollout(total_timesteps, n_envs, rollout_size)
+    logging.info(f"🧵 Training on {n_envs} env(s) ({'subprocess workers' if parallel and n_envs > 1 else 'in-process'}), "
+                 f"n_steps={n_steps}")
 
-    logging.info("💾 Deleting old model and saving new one...")
+    try:
+        if model_exists:
+            logging.info("📂 Loading existing model...")
+            model = PPO.load(model_path, env=env, n_steps=n_steps, **ppo_kwargs)
+        else:
+            logging.info("📢 Initializing new PPO model...")
+            model = PPO("MlpPolicy", env, n_steps=n_steps, **{"verbose": 1, **ppo_kwargs})
 
-    # Ensure we delete the old model first
-    if os.path.exists(MODEL_PATH):
-        os.remove(MODEL_PATH)
-        time.sleep(1)
+        logging.info(f"⏳ Training the model for up to {total_timesteps} timesteps...")
+        callback = TrainingMetricsCallback(EARLY_STOP_PATIENCE, EARLY_STOP_MIN_DELTA, monitor)
+        with learn_seconds.time():
+            model.learn(total_timesteps=total_timesteps, callback=callback)
+        trained_timesteps = int(model.num_timesteps)
+        training_timesteps.inc(trained_timesteps)
+    finally:
+        env.close()
 
-    # Save new model
-    model.save(MODEL_PATH)
-    time.sleep(1)
+    metadata = {
+        "timesteps": trained_timesteps,
+        "mode": mode if recent_start is not None else "full",
+        "new_points": new_points,
+        "stopped_early": callback.stopped_early,
+        "losses": callback.summary(),
+        "data_range": data_range(env),
+    }
+    promote = True
+    if shadow:
+        champion = load_champion(model_path)
+        if champion is not None:
+            with evaluation_seconds.time(kind="promotion"):
+                champion_score, challenger_score = score_models([champion, model], prices, holdout - EVAL_STEPS - 1)
+            margin = PROMOTION_MARGIN / 100 * INITIAL_BALANCE
+            promote = bool(challenger_score > champion_score + margin)
+            metadata["promotion"] = {
+                "champion_version": store.current_version(),
+                "champion_score": float(champion_score),
+                "challenger_score": float(challenger_score),
+                "margin": margin,
+                "holdout": holdout,
+                "promoted": promote,
+            }
+            logging.info(f"🥊 Held-out reward: champion {champion_score:.2f}, challenger {challenger_score:.2f} "
+                         f"(margin {margin:.2f}) -> {'promoting the challenger' if promote else 'keeping the champion'}")
+        promotions.inc(result="promoted" if promote else "rejected")
 
-    # Force update file timestamp
-    os.utime(MODEL_PATH, (time.time(), time.time()))
+    logging.info(f"💾 Saving new checkpoint after {trained_timesteps} timesteps...")
+    version = store.save(model, metadata=metadata, publish=promote)
+    if not promote:
+        logging.info(f"🛡️ Challenger v{version} stored, the champion keeps serving")
+        return {"version": version, **metadata}
+    callback.save(model_path)
+    export_policy(model, policy_path(model_path), file_sha256(model_path))
+    logging.info(f"📦 Checkpoint v{version} is now live")
 
     # Log after training
-    after_training_time = os.path.getmtime(MODEL_PATH)
+    after_training_time = os.path.getmtime(model_path)
     logging.info(f"🕒 Model file timestamp after saving: {after_training_time}")
 
-    logging.info("✅ Model updated and saved.")
\ No newline at end of file
+    logging.info("✅ Model updated and saved.")
+    return {"version": version, **metadata}
\ No newline at end of file
@@ -0,0 +1,127 @@
+import io
+import os
+import sys
+import json
+import hashlib
+import logging
+import numpy as np
+
+FORMAT_VERSION = 1
+ACTIVATIONS = {
+    "Tanh": np.tanh,
+    "ReLU": lambda x: np.maximum(x, 0),
+}
+
+
+def policy_path(model_path):
+    """ Path of the NumPy export that sits next to a saved model """
+    return f"{os.path.splitext(model_path)[0]}.npz"
+
+
+def export_policy(model, path, model_sha256=None):
+    """
+    Writes the actor of an SB3 PPO MlpPolicy (Box observations, Discrete
+    actions) to a compact `.npz`, atomically. `model_sha256` ties the export
+    to the checkpoint file it was made from.
+    """
+    policy = model.policy
+    if type(policy.features_extractor).__name__ != "FlattenExtractor":
+        raise ValueError(f"Unsupported features extractor: {type(policy.features_extractor).__name__}")
+    if not hasattr(model.action_space, "n"):
+        raise ValueError(f"Unsupported action space: {model.action_space}")
+    activation = policy.activation_fn.__name__
+    if activation not in ACTIVATIONS:
+        raise ValueError(f"Unsupported activation: {activation}")
+
+    state = {name: tensor.detach().cpu().numpy().astype(np.float32) for name, tensor in policy.state_dict().items()}
+    prefix = "mlp_extractor.policy_net."
+    indices = sorted({int(name[len(prefix):].split(".")[0]) for name in state if name.startswith(prefix)})
+    arrays = {}
+    for layer, index in enumerate(indices):
+        arrays[f"w{layer}"] = state[f"{prefix}{index}.weight"]
+        arrays[f"b{layer}"] = state[f"{prefix}{index}.bias"]
+    arrays["action_w"] = state["action_net.weight"]
+    arrays["action_b"] = state["action_net.bias"]
+    arrays["meta"] = np.array(json.dumps({
+        "format": FORMAT_VERSION,
+        "activation": activation,
+        "layers": len(indices),
+        "observation_shape": list(model.observation_space.shape),
+        "model_sha256": model_sha256,
+    }))
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **arrays)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return path
+
+
+class NumpyPolicy:
+    """
+    Forward pass of an exported PPO actor in plain NumPy (float32).
+    `predict` mirrors `PPO.predict`: argmax of the action logits when
+    `deterministic`, otherwise a sample from their softmax.
+    """
+
+    def __init__(self, layers, action_layer, activation, observation_shape, model_sha256=None, seed=None):
+        # Weights are kept transposed so a batch is `x @ w + b`
+        self.layers = [(np.ascontiguousarray(w.T), b) for w, b in layers]
+        self.action_w = np.ascontiguousarray(action_layer[0].T)
+        self.action_b = action_layer[1]
+        self.activation = ACTIVATIONS[activation]
+        self.observation_shape = tuple(observation_shape)
+        self.model_sha256 = model_sha256
+        self._rng = np.random.default_rng(seed)
+
+    @classmethod
+    def load(cls, source):
+        """
+        Loads an export written by `export_policy` from a path or file object.
+        """
+        with np.load(source) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta.get("format") != FORMAT_VERSION:
+                raise ValueError(f"Unsupported policy export format: {meta.get('format')}")
+            layers = [(data[f"w{i}"], data[f"b{i}"]) for i in range(meta["layers"])]
+            action_layer = (data["action_w"], data["action_b"])
+        return cls(layers, action_layer, meta["activation"], meta["observation_shape"], meta.get("model_sha256"))
+
+    def logits(self, obs):
+        """ Action logits of a batch of observations, shape (n, n_actions) """
+        x = np.asarray(obs, dtype=np.float32).reshape(-1, int(np.prod(self.observation_shape)))
+        for w, b in self.layers:
+            x = self.activation(x @ w + b)
+        return x @ self.action_w + self.action_b
+
+    def predict(self, observation, state=None, episode_start=None, deterministic=False):
+        """
+        Returns (actions, None) for one observation or a batch of them.
+        """
+        observation = np.asarray(observation)
+        vectorized = observation.shape != self.observation_shape
+        logits = self.logits(observation)
+        if deterministic:
+            actions = logits.argmax(axis=1)
+        else:
+            probs = np.exp(logits - logits.max(axis=1, keepdims=True))
+            cumulative = np.cumsum(probs, axis=1)
+            draws = self._rng.random((len(logits), 1)) * cumulative[:, -1:]
+            actions = np.minimum((cumulative <= draws).sum(axis=1), logits.shape[1] - 1)
+        return (actions if vectorized else actions[0]), None
+
+
+if __name__ == "__main__":
+    # Exports an existing checkpoint: python src/numpy_policy.py trading_agent.zip
+    from stable_baselines3 import PPO
+
+    logging.basicConfig(level=logging.INFO)
+    from settings import get_settings
+
+    model_path = sys.argv[1] if len(sys.argv) > 1 else get_settings().model_path
+    with open(model_path, "rb") as f:
+        content = f.read()
+    export_path = export_policy(PPO.load(io.BytesIO(content)), policy_path(model_path), hashlib.sha256(content).hexdigest())
+    logging.info(f"📦 Exported the policy of {model_path} to {export_path}")
@@ -0,0 +1,129 @@
+import os
+import time
+import tempfile
+import threading
+import numpy as np
+from settings import get_settings
+
+settings = get_settings()
+PRICE_CACHE_DIR = settings.price_cache_dir
+PRICE_CACHE_TTL = settings.price_cache_ttl
+PRICE_HISTORY_DAYS = settings.price_history_days
+
+MS_PER_DAY = 24 * 60 * 60 * 1000
+
+_path_locks = {}
+_path_locks_lock = threading.Lock()
+
+
+def _path_lock(path):
+    """ One lock per cache file, shared by every PriceCache of that asset in the process """
+    with _path_locks_lock:
+        return _path_locks.setdefault(path, threading.Lock())
+
+
+class PriceCache:
+    """
+    Persistent (timestamp, price) cache for one asset.
+    Rows are stored as an (N, 2) float64 `.npy` file: column 0 holds the
+    CoinGecko timestamp in milliseconds, column 1 the USD price.
+    """
+
+    def __init__(self, asset_id="bitcoin", cache_dir=None, ttl=None, history_days=None):
+        self.asset_id = asset_id
+        self.cache_dir = cache_dir or PRICE_CACHE_DIR
+        self.ttl = PRICE_CACHE_TTL if ttl is None else ttl
+        self.history_days = PRICE_HISTORY_DAYS if history_days is None else history_days
+        self.path = os.path.join(self.cache_dir, f"{asset_id}_usd.npy")
+
+    def load(self):
+        """
+        Returns the cached rows as a read-only memmap, or None if nothing is cached.
+        """
+        if not os.path.exists(self.path):
+            return None
+        try:
+            rows = np.load(self.path, mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        if rows.ndim != 2 or rows.shape[1] != 2 or len(rows) == 0:
+            return None
+        return rows
+
+    def is_fresh(self):
+        """
+        True if the cache file was written less than `ttl` seconds ago.
+        """
+        if not os.path.exists(self.path):
+            return False
+        return time.time() - os.path.getmtime(self.path) < self.ttl
+
+    def last_timestamp(self):
+        """
+        Returns the newest cached timestamp (ms), or None if the cache is empty.
+        """
+        rows = self.load()
+        if rows is None:
+            return None
+        return int(rows[-1, 0])
+
+    def append(self, new_rows):
+        """
+        Appends rows newer than the last cached timestamp, trims the series to
+        the configured history window and atomically replaces the cache file.
+        Threads appending to the same asset take turns, so no update is lost.
+        Returns the updated rows.
+        """
+        new_rows = np.asarray(new_rows, dtype=np.float64).reshape(-1, 2)
+        with _path_lock(self.path):
+            cached = self.load()
+            if cached is not None:
+                new_rows = new_rows[new_rows[:, 0] > cached[-1, 0]]
+                new_rows = self._match_spacing(cached, new_rows)
+                rows = np.concatenate([cached, new_rows]) if len(new_rows) else np.array(cached)
+            else:
+                rows = new_rows[np.argsort(new_rows[:, 0], kind="stable")]
+
+            if len(rows):
+                cutoff = rows[-1, 0] - self.history_days * MS_PER_DAY
+                rows = rows[rows[:, 0] >= cutoff]
+
+            self._write(rows)
+        return rows
+
+    def touch(self):
+        """
+        Marks the cache as fresh without changing its contents.
+        """
+        if os.path.exists(self.path):
+            os.utime(self.path, None)
+
+    @staticmethod
+    def _match_spacing(cached, new_rows):
+        """
+        Incremental fetches over short ranges come back at a finer granularity
+        than the full chart. Keep only points spaced like the cached series so
+        the observation window covers the same span of time.
+        """
+        if len(cached) < 2 or len(new_rows) == 0:
+            return new_rows
+        spacing = float(np.median(np.diff(cached[-min(len(cached), 50):, 0])))
+        kept = []
+        last_ts = cached[-1, 0]
+        for row in new_rows:
+            if row[0] - last_ts >= spacing * 0.95:
+                kept.append(row)
+                last_ts = row[0]
+        return np.array(kept, dtype=np.float64).reshape(-1, 2)
+
+    def _write(self, rows):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=f"{self.asset_id}_usd.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, rows)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
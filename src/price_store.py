@@ -0,0 +1,198 @@
+"""
+Append-only columnar store of long price histories.
+
+Each asset is a directory with one raw little-endian float64 file per
+column (timestamp, open, high, low, close, volume) and a `meta.json`
+holding the committed row count. Readers memory-map the columns, so every
+process reading an asset shares the same pages through the OS page cache
+and only the ranges actually read are paged in. Timestamps are strictly
+increasing, so time ranges resolve to row ranges by binary search.
+
+    python src/price_store.py import bitcoin btc_1m.csv   # timestamp,open,high,low,close,volume
+    python src/price_store.py info bitcoin
+"""
+import os
+import sys
+import csv
+import json
+import fcntl
+import argparse
+import numpy as np
+from settings import get_settings
+
+settings = get_settings()
+PRICE_STORE_DIR = settings.price_store_dir
+
+COLUMNS = ("timestamp", "open", "high", "low", "close", "volume")
+DTYPE = np.dtype("<f8")
+IMPORT_BATCH_ROWS = 100_000
+
+
+class PriceStore:
+    """
+    Columnar (timestamp, OHLCV) history of one asset.
+    Appends write the new rows at the end of every column file and then
+    commit them by atomically replacing `meta.json`, so readers never see a
+    partial append; `refresh` maps rows committed since the store was opened.
+    """
+
+    def __init__(self, asset_id="bitcoin", root=None):
+        self.asset_id = asset_id
+        self.path = os.path.join(root or PRICE_STORE_DIR, asset_id)
+        self._meta_path = os.path.join(self.path, "meta.json")
+        self._columns = {}
+        self.length = 0
+        self.refresh()
+
+    def _column_path(self, name):
+        return os.path.join(self.path, f"{name}.f8")
+
+    def refresh(self):
+        """
+        Re-reads the committed length and remaps the columns if rows were appended.
+        Returns the number of rows.
+        """
+        try:
+            with open(self._meta_path) as f:
+                length = json.load(f)["length"]
+        except (OSError, ValueError, KeyError):
+            length = 0
+        if length != self.length or not self._columns:
+            self.length = length
+            self._columns = {
+                name: np.memmap(self._column_path(name), dtype=DTYPE, mode="r", shape=(length,))
+                if length else np.empty(0, dtype=DTYPE)
+                for name in COLUMNS
+            }
+        return self.length
+
+    def __len__(self):
+        return self.length
+
+    def column(self, name, start=0, stop=None):
+        """
+        Rows [start, stop) of a column as a read-only view of the mapped file (no copy).
+        """
+        if name not in COLUMNS:
+            raise ValueError(f"Unknown column: {name} (available: {', '.join(COLUMNS)})")
+        return self._columns[name][start:stop]
+
+    def first_timestamp(self):
+        return float(self._columns["timestamp"][0]) if self.length else None
+
+    def last_timestamp(self):
+        return float(self._columns["timestamp"][-1]) if self.length else None
+
+    def row_range(self, start_ms=None, end_ms=None):
+        """
+        Returns the [start, stop) rows whose timestamps lie in [start_ms, end_ms),
+        found by binary search on the timestamp column. None leaves a side open.
+        """
+        timestamps = self._columns["timestamp"]
+        start = 0 if start_ms is None else int(np.searchsorted(timestamps, start_ms, side="left"))
+        stop = self.length if end_ms is None else int(np.searchsorted(timestamps, end_ms, side="left"))
+        return start, max(start, stop)
+
+    def read(self, start_ms=None, end_ms=None, columns=("timestamp", "close")):
+        """
+        Returns {column: view} of the rows in a time range (see `row_range`).
+        """
+        start, stop = self.row_range(start_ms, end_ms)
+        return {name: self.column(name, start, stop) for name in columns}
+
+    def append(self, timestamps, **columns):
+        """
+        Appends rows newer than the last stored timestamp and commits them.
+        `columns` are arrays named after COLUMNS; missing ones are stored as
+        NaN, and a lone `price` fills open, high, low and close.
+        Returns the number of rows appended.
+        """
+        timestamps = np.asarray(timestamps, dtype=DTYPE).reshape(-1)
+        if "price" in columns:
+            price = columns.pop("price")
+            for name in ("open", "high", "low", "close"):
+                columns.setdefault(name, price)
+        unknown = set(columns) - set(COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown columns: {sorted(unknown)} (available: {', '.join(COLUMNS)})")
+        values = {
+            name: np.broadcast_to(np.asarray(columns.get(name, np.nan), dtype=DTYPE), timestamps.shape)
+            for name in COLUMNS[1:]
+        }
+        if np.any(np.diff(timestamps) <= 0):
+            raise ValueError("Timestamps must be strictly increasing")
+
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, ".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)  # One writer at a time per asset
+            self.refresh()
+            last = self.last_timestamp()
+            keep = slice(None) if last is None else slice(int(np.searchsorted(timestamps, last, side="right")), None)
+            timestamps = timestamps[keep]
+            if not len(timestamps):
+                return 0
+
+            offset = self.length * DTYPE.itemsize
+            for name in COLUMNS:
+                data = timestamps if name == "timestamp" else values[name][keep]
+                with open(self._column_path(name), "ab") as f:
+                    f.truncate(offset)  # Drops rows of an append that never committed
+                    f.write(np.ascontiguousarray(data, dtype=DTYPE).tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+
+            tmp_path = f"{self._meta_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"columns": list(COLUMNS), "dtype": DTYPE.str, "length": self.length + len(timestamps)}, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self._meta_path)
+        self.refresh()
+        return len(timestamps)
+
+
+def import_csv(store, path, batch_rows=IMPORT_BATCH_ROWS):
+    """
+    Streams a CSV with a `timestamp` column (seconds or milliseconds) and any
+    of the OHLCV columns into the store, `batch_rows` rows at a time.
+    Returns the number of rows appended.
+    """
+    appended = 0
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = [name.strip().lower() for name in next(reader)]
+        if "timestamp" not in header:
+            raise ValueError(f"{path} has no timestamp column")
+        indices = {name: header.index(name) for name in COLUMNS if name in header}
+        while True:
+            batch = [row for _, row in zip(range(batch_rows), reader)]
+            if not batch:
+                return appended
+            rows = np.array([[row[i] or "nan" for i in indices.values()] for row in batch], dtype=DTYPE)
+            columns = dict(zip(indices, rows.T))
+            timestamps = columns.pop("timestamp")
+            if timestamps[0] < 1e11:
+                timestamps = timestamps * 1000  # Seconds to milliseconds
+            appended += store.append(timestamps, **columns)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar price history store.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    importer = commands.add_parser("import", help="append the rows of a CSV file")
+    importer.add_argument("asset_id")
+    importer.add_argument("csv_path")
+    info = commands.add_parser("info", help="show the stored range of an asset")
+    info.add_argument("asset_id")
+    args = parser.parse_args()
+
+    store = PriceStore(args.asset_id)
+    if args.command == "import":
+        print(f"✅ Appended {import_csv(store, args.csv_path)} row(s) to {store.path}")
+    if not len(store):
+        sys.exit(f"⚠️ {store.path} is empty")
+    print(f"📦 {store.asset_id}: {len(store)} rows from {store.first_timestamp():.0f} to {store.last_timestamp():.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
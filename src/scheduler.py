@@ -0,0 +1,150 @@
+import math
+import signal
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from metrics import metrics
+
+job_duration_seconds = metrics.histogram("job_duration_seconds", "Duration of scheduled job runs", ["job"])
+job_lag_seconds = metrics.histogram("job_lag_seconds", "Delay between a job's scheduled tick and its start", ["job"])
+job_failures = metrics.counter("job_failures_total", "Scheduled job runs that raised", ["job"])
+job_skipped_ticks = metrics.counter("job_skipped_ticks_total", "Ticks skipped because the previous run overran", ["job"])
+
+
+class JobMetrics:
+    """ Timing and outcome counters for one periodic job """
+    def __init__(self):
+        self.runs = 0
+        self.failures = 0
+        self.skipped_ticks = 0
+        self.last_duration = 0.0
+        self.max_duration = 0.0
+        self.total_duration = 0.0
+        self.last_lag = 0.0
+
+    def as_dict(self):
+        return {
+            "runs": self.runs,
+            "failures": self.failures,
+            "skipped_ticks": self.skipped_ticks,
+            "last_duration": self.last_duration,
+            "max_duration": self.max_duration,
+            "mean_duration": self.total_duration / self.runs if self.runs else 0.0,
+            "last_lag": self.last_lag,
+        }
+
+
+class PeriodicJob:
+    """
+    A function run every `interval` seconds at a fixed rate.
+    Coroutine functions are awaited on the loop; plain functions run on the
+    job's own worker thread so a slow job never delays the others.
+    """
+    def __init__(self, name, interval, func):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.metrics = JobMetrics()
+        self.executor = None if asyncio.iscoroutinefunction(func) else ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix=f"job-{name}"
+        )
+
+    async def run_once(self):
+        if self.executor is None:
+            await self.func()
+        else:
+            await asyncio.get_running_loop().run_in_executor(self.executor, self.func)
+
+
+class Scheduler:
+    """
+    Asyncio scheduler running independent periodic jobs.
+    Ticks are anchored to the job's start time (start + k * interval), so the
+    period does not drift by the time the work takes. Ticks missed because a run
+    overran are skipped and counted rather than run back-to-back.
+    """
+
+    def __init__(self):
+        self.jobs = []
+        self._tasks = []
+        self._stop_event = None
+        self._loop = None
+
+    def add_job(self, name, interval, func):
+        job = PeriodicJob(name, interval, func)
+        self.jobs.append(job)
+        return job
+
+    async def _run_job(self, job):
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        tick = 0
+
+        while True:
+            scheduled = start + tick * job.interval
+            delay = scheduled - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            started = loop.time()
+            job.metrics.last_lag = started - scheduled
+            job_lag_seconds.observe(job.metrics.last_lag, job=job.name)
+            try:
+                await job.run_once()
+            except Exception:
+                job.metrics.failures += 1
+                job_failures.inc(job=job.name)
+                logging.exception(f"❌ Job '{job.name}' failed")
+
+            duration = loop.time() - started
+            job.metrics.runs += 1
+            job.metrics.last_duration = duration
+            job.metrics.total_duration += duration
+            job.metrics.max_duration = max(job.metrics.max_duration, duration)
+            job_duration_seconds.observe(duration, job=job.name)
+
+            next_tick = max(tick + 1, math.floor((loop.time() - start) / job.interval) + 1)
+            job.metrics.skipped_ticks += next_tick - tick - 1
+            if next_tick - tick - 1:
+                job_skipped_ticks.inc(next_tick - tick - 1, job=job.name)
+            tick = next_tick
+
+    async def run(self, install_signal_handlers=True):
+        """
+        Runs every job until stop() is called or SIGINT/SIGTERM is received.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+
+        if install_signal_handlers and threading.current_thread() is threading.main_thread():
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                try:
+                    self._loop.add_signal_handler(sig, self._stop_event.set)
+                except (NotImplementedError, RuntimeError):
+                    pass
+
+        self._tasks = [asyncio.create_task(self._run_job(job), name=f"job-{job.name}") for job in self.jobs]
+        try:
+            await self._stop_event.wait()
+        finally:
+            logging.info("🛑 Stopping scheduler...")
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            for job in self.jobs:
+                if job.executor is not None:
+                    job.executor.shutdown(wait=False, cancel_futures=True)
+
+    def stop(self):
+        """
+        Thread-safe request to stop the scheduler.
+        """
+        if self._loop is not None and self._stop_event is not None:
+            self._loop.call_soon_threadsafe(self._stop_event.set)
+
+    def metrics(self):
+        """
+        Returns per-job timing metrics.
+        """
+        return {job.name: job.metrics.as_dict() for job in self.jobs}
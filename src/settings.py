@@ -0,0 +1,148 @@
+import os
+import typing
+from dataclasses import dataclass, fields
+from functools import lru_cache
+from typing import Optional, Tuple
+from dotenv import load_dotenv
+
+
+def _parse_bool(value):
+    value = value.strip().lower()
+    if value in ("1", "true", "yes", "on"):
+        return True
+    if value in ("0", "false", "no", "off", ""):
+        return False
+    raise ValueError(f"expected 0/1, got {value!r}")
+
+
+def _parse_list(value):
+    return tuple(item.strip() for item in value.split(",") if item.strip())
+
+
+_PARSERS = {str: str, int: int, float: float, bool: _parse_bool, Tuple[str, ...]: _parse_list}
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    Typed configuration of the bot. Each field is read from the environment
+    variable of the same name in upper case; fields without a default are
+    None when unset (see `require`).
+    """
+
+    # Telegram
+    telegram_token: Optional[str] = None
+    chat_id: Optional[str] = None
+    telegram_enable: bool = False
+    telegram_api_url: str = "https://api.telegram.org"
+    telegram_coalesce_seconds: float = 1.0  # Seconds to wait for more alerts before sending
+    telegram_min_interval: float = 1.0  # Telegram allows ~1 message/second per chat
+
+    # Market data
+    coingecko_api: Optional[str] = None
+    coingecko_max_connections: int = 8  # Concurrent requests to the API
+    coingecko_min_interval: float = 0.0  # Seconds between request starts
+    coingecko_burst: int = 1  # Requests that may start back to back before the interval applies
+    coingecko_max_retries: int = 4  # Retries of a failed request (connection errors, 429, 5xx)
+    coingecko_backoff: float = 2.0  # Base seconds of the jittered exponential backoff
+    asset_ids: Tuple[str, ...] = ("bitcoin",)
+    price_history_days: int = 7
+    price_cache_dir: str = ".price_cache"
+    price_cache_ttl: int = 60
+    price_store_dir: str = "price_store"  # Columnar long-term history (see price_store.py)
+    price_store_archive: bool = False  # Also append every fetched price to the store
+
+    # Environment and model
+    initial_balance: float = 1000.0
+    model_path: Optional[str] = None
+    observation_features: Tuple[str, ...] = ("price",)
+    checkpoint_dir: Optional[str] = None
+    checkpoint_keep: int = 5
+    episode_length: int = 1440  # Steps per episode of an env reading a time range from the price store
+
+    # Alerts and schedule
+    check_interval: Optional[int] = None
+    model_check_improvement_interval: Optional[int] = None
+    trade_alert_threshold: Optional[float] = None
+
+    # Model health thresholds
+    policy_loss_threshold: Optional[float] = None
+    value_loss_threshold: Optional[float] = None
+    entropy_loss_threshold: Optional[float] = None
+    health_check_rollouts: int = 3  # Recent rollouts averaged by the health check
+    health_check_n_steps: int = 256  # Rollout length when computing fresh losses
+
+    # Training
+    train_timesteps: int = 5000  # Budget of a full run; the cap of an incremental one
+    train_n_envs: int = 1
+    train_parallel: bool = False
+    train_n_steps: int = 2048  # Samples per rollout across all envs
+    train_mode: str = "incremental"  # "incremental" focuses on data newer than the checkpoint, "full" trains on the whole series
+    train_replay_fraction: float = 0.2  # Share of incremental episodes started in older data
+    train_timesteps_per_new_point: int = 64  # Incremental budget per price point added since the checkpoint
+    early_stop_patience: int = 2  # Rollouts without value-loss improvement before stopping (0 disables)
+    early_stop_min_delta: float = 0.01  # Relative value-loss decrease that counts as an improvement
+
+    # Promotion
+    shadow_training: bool = True  # Retrain a challenger and publish it only if it beats the serving model
+    promotion_holdout: int = 48  # Most recent price points kept out of challenger training to score both models on (>= EVAL_STEPS + 2)
+    promotion_margin: float = 0.0  # Mean held-out reward (% of INITIAL_BALANCE) the challenger must gain
+
+    # Evaluation
+    eval_mode: str = "monte_carlo"  # "monte_carlo", or "single" for one rollout from the oldest point
+    eval_rollouts: int = 32  # Monte-Carlo rollouts per asset
+    eval_steps: int = 10  # Steps per evaluation rollout
+    eval_rollout_stride: int = 1  # Steps between consecutive rollout starts
+    inference_backend: str = "numpy"  # "numpy" serves the .npz export when current, "torch" always SB3
+    eval_cache_ttl: float = 30.0  # Seconds an evaluation result is reused
+    eval_workers: int = 2
+
+    # Backtesting
+    backtest_fee: float = 0.001  # Fee per trade, as a fraction of its value
+    backtest_slippage: float = 0.0005  # Adverse price move per fill, as a fraction of the price
+
+    # Monitoring
+    metrics_host: str = "127.0.0.1"
+    metrics_port: int = 9108  # 0 disables the endpoint
+    profile_dir: str = "profiles"
+
+    @classmethod
+    def from_env(cls, environ=None):
+        """
+        Parses the settings from `environ` (os.environ by default).
+        Raises ValueError naming the variable when a value does not parse.
+        """
+        environ = os.environ if environ is None else environ
+        hints = typing.get_type_hints(cls)
+        values = {}
+        for field in fields(cls):
+            name = field.name.upper()
+            raw = environ.get(name)
+            if raw is None:
+                continue
+            hint = hints[field.name]
+            if typing.get_origin(hint) is typing.Union:
+                hint = next(arg for arg in typing.get_args(hint) if arg is not type(None))
+            try:
+                values[field.name] = _PARSERS[hint](raw)
+            except ValueError as e:
+                raise ValueError(f"Invalid value for {name}: {raw!r} ({e})") from None
+        return cls(**values)
+
+    def require(self, *names):
+        """
+        Raises ValueError listing every named setting that is not set.
+        """
+        missing = [name.upper() for name in names if getattr(self, name) is None]
+        if missing:
+            raise ValueError(f"Missing required environment variable(s): {', '.join(missing)}")
+        return self
+
+
+@lru_cache(maxsize=None)
+def get_settings():
+    """
+    Loads `.env` and parses the environment once; every module shares the result.
+    """
+    load_dotenv()
+    return Settings.from_env()
@@ -0,0 +1,310 @@
+"""
+Hyperparameter sweep runner.
+
+Trains one model per trial with `continue_training`, fanning the trials out
+across a process pool. Trials come from a seeded grid or random search; each
+trial's intermediate losses, final metrics and checkpoint path go to a SQLite
+results store, so an interrupted sweep resumes where it stopped:
+
+    python src/sweep.py --name lr --search random --trials 32 --timesteps 20000
+    python src/sweep.py --name lr --search random --trials 32 --timesteps 20000   # resumes
+"""
+import os
+import json
+import time
+import shutil
+import random
+import sqlite3
+import argparse
+import itertools
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+
+SWEEP_DIR = "sweeps"
+PPO_PARAMS = ("learning_rate", "n_steps", "batch_size", "ent_coef", "gamma", "gae_lambda", "clip_range", "n_epochs")
+THRESHOLD_PARAMS = ("policy_loss_threshold", "value_loss_threshold", "entropy_loss_threshold")
+
+# A list is a set of choices; {"low", "high", "log"} a range (random search only)
+DEFAULT_SPACE = {
+    "learning_rate": [1e-4, 3e-4, 1e-3],
+    "n_steps": [512, 1024, 2048],
+    "batch_size": [32, 64, 128],
+    "ent_coef": [0.0, 0.01],
+}
+
+
+def grid_configs(space):
+    """
+    Every combination of the listed choices, in a stable order.
+    """
+    names = sorted(space)
+    for name in names:
+        if not isinstance(space[name], list):
+            raise ValueError(f"Grid search needs a list of choices for '{name}'")
+    return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+
+def random_configs(space, trials, seed=0):
+    """
+    `trials` configurations sampled from the space; the same seed gives the same configurations.
+    """
+    rng = random.Random(seed)
+    configs = []
+    for _ in range(trials):
+        config = {}
+        for name in sorted(space):
+            choices = space[name]
+            if isinstance(choices, list):
+                config[name] = rng.choice(choices)
+            elif choices.get("log"):
+                config[name] = float(np.exp(rng.uniform(np.log(choices["low"]), np.log(choices["high"]))))
+            else:
+                config[name] = rng.uniform(choices["low"], choices["high"])
+        configs.append(config)
+    return configs
+
+
+class SweepStore:
+    """
+    SQLite results store of one sweep, shared by every worker process.
+    Each call opens its own short-lived connection, so it is safe across
+    processes; trials are keyed by their index in the sweep.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("""CREATE TABLE IF NOT EXISTS trials (
+                trial_id INTEGER PRIMARY KEY, params TEXT NOT NULL, status TEXT NOT NULL,
+                score REAL, metrics TEXT, checkpoint TEXT, started REAL, finished REAL)""")
+            db.execute("""CREATE TABLE IF NOT EXISTS losses (
+                trial_id INTEGER, rollout INTEGER, policy_loss REAL, value_loss REAL, entropy_loss REAL,
+                PRIMARY KEY (trial_id, rollout))""")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=60)
+
+    def add_trials(self, configs):
+        """
+        Registers the sweep's trials; on resume they must match the stored ones.
+        """
+        with self._connect() as db:
+            stored = dict(db.execute("SELECT trial_id, params FROM trials"))
+            for trial_id, params in enumerate(configs):
+                encoded = json.dumps(params, sort_keys=True)
+                if trial_id in stored and stored[trial_id] != encoded:
+                    raise ValueError(f"{self.path} holds a different sweep (trial {trial_id} differs)")
+                if trial_id not in stored:
+                    db.execute("INSERT INTO trials (trial_id, params, status) VALUES (?, ?, 'pending')", (trial_id, encoded))
+
+    def unfinished(self):
+        """
+        Returns [(trial_id, params)] of trials that are pending or were interrupted.
+        """
+        with self._connect() as db:
+            rows = db.execute("SELECT trial_id, params FROM trials WHERE status IN ('pending', 'running') ORDER BY trial_id")
+            return [(trial_id, json.loads(params)) for trial_id, params in rows]
+
+    def start(self, trial_id):
+        with self._connect() as db:
+            db.execute("DELETE FROM losses WHERE trial_id = ?", (trial_id,))
+            db.execute("UPDATE trials SET status = 'running', started = ? WHERE trial_id = ?", (time.time(), trial_id))
+
+    def report(self, trial_id, rollout, policy_loss, value_loss, entropy_loss):
+        with self._connect() as db:
+            db.execute("INSERT OR REPLACE INTO losses VALUES (?, ?, ?, ?, ?)",
+                       (trial_id, rollout, policy_loss, value_loss, entropy_loss))
+
+    def value_losses(self, rollout, exclude=None):
+        """
+        Value losses other trials reported at `rollout`.
+        """
+        with self._connect() as db:
+            rows = db.execute("SELECT value_loss FROM losses WHERE rollout = ? AND trial_id != ?",
+                              (rollout, -1 if exclude is None else exclude))
+            return [value for (value,) in rows if value is not None]
+
+    def finish(self, trial_id, status, score=None, metrics=None, checkpoint=None):
+        with self._connect() as db:
+            db.execute("UPDATE trials SET status = ?, score = ?, metrics = ?, checkpoint = ?, finished = ? WHERE trial_id = ?",
+                       (status, score, json.dumps(metrics), checkpoint, time.time(), trial_id))
+
+    def trials(self):
+        """
+        Returns every trial as a dict, best score first.
+        """
+        with self._connect() as db:
+            rows = db.execute("""SELECT trial_id, params, status, score, metrics, checkpoint FROM trials
+                                 ORDER BY score IS NULL, score DESC, trial_id""").fetchall()
+        return [
+            {"trial_id": trial_id, "params": json.loads(params), "status": status, "score": score,
+             "metrics": json.loads(metrics) if metrics else None, "checkpoint": checkpoint}
+            for trial_id, params, status, score, metrics, checkpoint in rows
+        ]
+
+
+class MedianPruner:
+    """
+    Training monitor that reports each rollout's losses to the store and
+    stops the trial when its value loss is above the median other trials
+    reached at the same rollout (once `min_trials` have reported it).
+    """
+
+    def __init__(self, store, trial_id, min_trials=3, warmup_rollouts=1):
+        self.store = store
+        self.trial_id = trial_id
+        self.min_trials = min_trials
+        self.warmup_rollouts = warmup_rollouts
+        self.pruned = False
+
+    def __call__(self, callback):
+        rollout = len(callback.value_loss)
+        value_loss = callback.value_loss[-1]
+        self.store.report(self.trial_id, rollout, callback.policy_loss[-1] if callback.policy_loss else None,
+                          value_loss, callback.entropy_loss[-1] if callback.entropy_loss else None)
+        if rollout <= self.warmup_rollouts:
+            return True
+        others = self.store.value_losses(rollout, exclude=self.trial_id)
+        if len(others) >= self.min_trials and value_loss > float(np.median(others)):
+            logging.info(f"✂️ Pruning trial {self.trial_id} at rollout {rollout}: "
+                         f"value loss {value_loss:.4g} > median {np.median(others):.4g}")
+            self.pruned = True
+            return False
+        return True
+
+
+def _init_worker():
+    # One core per trial: the pool, not torch, spreads the work over the cores
+    import torch
+
+    torch.set_num_threads(1)
+    logging.basicConfig(level=logging.WARNING)
+
+
+def run_trial(store_path, trial_id, params, prices, timestamps, timesteps, holdout, trial_dir, pruning=True):
+    """
+    Trains and scores one trial; runs in a worker process.
+    The model trains on all but the last `holdout` prices and is scored by
+    its mean Monte-Carlo reward on rollouts that start within them.
+    """
+    import inference
+    import model_training
+    from vec_trading_env import BatchedCryptoTradingEnv
+
+    store = SweepStore(store_path)
+    store.start(trial_id)
+    shutil.rmtree(trial_dir, ignore_errors=True)  # Left by an interrupted attempt: train from scratch
+    os.makedirs(trial_dir)
+    model_path = os.path.join(trial_dir, "model.zip")
+
+    seed = params.get("seed", trial_id)
+    env = BatchedCryptoTradingEnv(n_envs=params.get("n_envs", 1), data=prices[:-holdout], seed=seed)
+    env.timestamps = timestamps[:-holdout] if timestamps is not None else None
+    pruner = MedianPruner(store, trial_id) if pruning else None
+    ppo_kwargs = {name: params[name] for name in PPO_PARAMS if name in params}
+    start = time.perf_counter()
+    try:
+        result = model_training.continue_training(
+            total_timesteps=timesteps, mode="full", model_path=model_path, env=env,
+            ppo_kwargs={"seed": seed, "verbose": 0, **ppo_kwargs}, monitor=pruner,
+            checkpoint_dir=os.path.join(trial_dir, "checkpoints"))
+    except Exception as e:
+        logging.exception(f"❌ Trial {trial_id} failed")
+        store.finish(trial_id, "failed", metrics={"error": str(e)})
+        return trial_id, "failed", None
+
+    losses = result["losses"]
+    metrics = {
+        "timesteps": result["timesteps"],
+        "seconds": time.perf_counter() - start,
+        "stopped_early": result["stopped_early"],
+        "losses": losses,
+    }
+    if pruner is not None and pruner.pruned:
+        store.finish(trial_id, "pruned", metrics=metrics, checkpoint=model_path)
+        return trial_id, "pruned", None
+
+    rollouts = max(1, holdout - inference.EVAL_STEPS)
+    rewards = inference.monte_carlo_rewards(inference.inference_model(model_path), prices, rollouts=rollouts)
+    score = float(rewards.mean())
+    metrics["reward"] = inference.reward_statistics(rewards[:, 0])
+    if all(name in params for name in THRESHOLD_PARAMS) and None not in losses.values():
+        thresholds = tuple(params[name] for name in THRESHOLD_PARAMS)
+        metrics["healthy"] = not model_training.needs_retraining(
+            losses["policy_loss"], losses["value_loss"], losses["entropy_loss"], thresholds)
+    store.finish(trial_id, "complete", score, metrics, model_path)
+    return trial_id, "complete", score
+
+
+def run_sweep(name, configs, timesteps, workers=None, holdout=None, pruning=True, sweep_dir=None):
+    """
+    Runs every unfinished trial of a sweep on a pool of `workers` processes
+    (one per core by default) and returns the store's trials, best first.
+    """
+    from inference import EVAL_ROLLOUTS, EVAL_STEPS
+    from trading_env import load_price_history
+
+    root = os.path.join(sweep_dir or SWEEP_DIR, name)
+    os.makedirs(root, exist_ok=True)
+    store = SweepStore(os.path.join(root, "results.sqlite"))
+    store.add_trials(configs)
+    todo = store.unfinished()
+    if not todo:
+        logging.info(f"✅ Sweep '{name}' is already complete")
+        return store.trials()
+
+    timestamps, prices = load_price_history()
+    holdout = holdout or EVAL_ROLLOUTS + EVAL_STEPS
+    workers = min(workers or os.cpu_count() or 1, len(todo))
+    logging.info(f"🧪 Sweep '{name}': {len(todo)} of {len(configs)} trial(s) to run on {workers} process(es)")
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker) as pool:
+        futures = [
+            pool.submit(run_trial, store.path, trial_id, params, prices, timestamps, timesteps, holdout,
+                        os.path.join(root, f"trial-{trial_id:04d}"), pruning)
+            for trial_id, params in todo
+        ]
+        try:
+            for future in as_completed(futures):
+                trial_id, status, score = future.result()
+                logging.info(f"🏁 Trial {trial_id}: {status}" + (f", score {score:.2f}" if score is not None else ""))
+        except KeyboardInterrupt:
+            logging.warning("⏸️ Sweep interrupted; run it again to resume")
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+    return store.trials()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel PPO hyperparameter sweep.")
+    parser.add_argument("--name", required=True, help="sweep name; results go to sweeps/<name>/")
+    parser.add_argument("--search", choices=("grid", "random"), default="random")
+    parser.add_argument("--trials", type=int, default=16, help="number of random-search trials")
+    parser.add_argument("--seed", type=int, default=0, help="random-search seed")
+    parser.add_argument("--space", help="JSON file with the search space (default: learning rate, n_steps, batch size, ent_coef)")
+    parser.add_argument("--timesteps", type=int, default=10000, help="training budget per trial")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per core)")
+    parser.add_argument("--holdout", type=int, help="most recent prices kept out of training for scoring")
+    parser.add_argument("--no-pruning", action="store_true", help="train every trial for the full budget")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    space = DEFAULT_SPACE
+    if args.space:
+        with open(args.space) as f:
+            space = json.load(f)
+    configs = grid_configs(space) if args.search == "grid" else random_configs(space, args.trials, args.seed)
+
+    trials = run_sweep(args.name, configs, args.timesteps, args.workers, args.holdout, not args.no_pruning)
+    print(f"\n{'trial':>5}  {'status':<9} {'score':>10}  params")
+    for trial in trials:
+        score = f"{trial['score']:.2f}" if trial["score"] is not None else "-"
+        print(f"{trial['trial_id']:>5}  {trial['status']:<9} {score:>10}  {json.dumps(trial['params'], sort_keys=True)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,22 @@
 import logging
 import asyncio
-import aiohttp
 from telegram import Update
 from telegram.ext import Application, CommandHandler, CallbackContext
-import os
-from dotenv import load_dotenv
-from model_training import evaluate_model, continue_training
+from evaluation_service import opportunity_evaluator, rank_opportunities
+from lazy_imports import LazyFunction
+from metrics import metrics, profiler
+from settings import get_settings
+from telegram_sender import TelegramSender
 
-# Load environment variables
-load_dotenv()
-TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
-CHAT_ID = os.getenv("CHAT_ID")
+settings = get_settings()
+TELEGRAM_TOKEN = settings.telegram_token
+CHAT_ID = settings.chat_id
+
+# Loaded on first use so the bot answers /start and /help without importing torch
+continue_training = LazyFunction("model_training", "continue_training")
+rollback_model = LazyFunction("model_training", "rollback_model")
+
+telegram_commands = metrics.counter("telegram_commands_total", "Bot commands received", ["command"])
 
 # Configure logging for debugging
 logging.basicConfig(
@@ -30,84 +36,141 @@ class TelegramBot:
         self.token = token
         self.chat_id = chat_id
         self.application = Application.builder().token(token).build()
+        self.sender = TelegramSender(token, chat_id)
+        self.retrainer = None  # main.py's BackgroundRetrainer, shared with the health checks
 
         # Register bot commands
         self.application.add_handler(CommandHandler("start", self.start))
         self.application.add_handler(CommandHandler("check", self.check))
         self.application.add_handler(CommandHandler("retrain", self.retrain))
+        self.application.add_handler(CommandHandler("rollback", self.rollback))
+        self.application.add_handler(CommandHandler("profile", self.profile))
         self.application.add_handler(CommandHandler("help", self.help))  # Ahora la función existe
+        profiler.on_dump.append(self.send_profile)
 
     async def start(self, update: Update, context: CallbackContext) -> None:
         """
         Responds to the /start command and provides usage instructions.
         """
         logging.info("Command /start received")
+        telegram_commands.inc(command="start")
         message = (
             "🤖 **AI Trading Bot is running!**\n"
             "Use the following commands:\n"
             "🔹 `/check` - Check for trading opportunities\n"
             "🔹 `/retrain` - Retrain the model if needed\n"
+            "🔹 `/rollback` - Restore the previous model version\n"
             "🔹 `/help` - Show this help menu"
         )
         await update.message.reply_text(message, parse_mode="Markdown")
 
     async def check(self, update: Update, context: CallbackContext) -> None:
         """
-        Evaluates the model and sends an alert if a profitable trade is detected.
+        Evaluates the model on every watched asset and lists the profitable ones, best first.
+        The evaluation runs on a worker thread and is shared with concurrent checks.
         """
         logging.info("Command /check received")
-        reward = evaluate_model()
-        message = f"📊 **Trading Evaluation**\n✅ Estimated Profit: **${reward:.2f}**" if reward > 0 else "⚠️ No profitable trade detected."
+        telegram_commands.inc(command="check")
+        ranked = rank_opportunities(await opportunity_evaluator.evaluate_async(), min_reward=0)
+        if ranked:
+            lines = [f"✅ {asset_id}: Estimated Profit **${reward:.2f}**" for asset_id, reward in ranked]
+            message = "📊 **Trading Evaluation**\n" + "\n".join(lines)
+        else:
+            message = "⚠️ No profitable trade detected."
         await update.message.reply_text(message, parse_mode="Markdown")
 
     async def retrain(self, update: Update, context: CallbackContext) -> None:
         """
-        Retrains the model asynchronously.
+        Retrains the model asynchronously, through the shared background
+        retrainer when one is attached so it never overlaps another retraining.
         """
         logging.info("Command /retrain received")
+        telegram_commands.inc(command="retrain")
+        if self.retrainer is not None and self.retrainer.running:
+            await update.message.reply_text("⏳ Retraining already in progress.", parse_mode="Markdown")
+            return
         await update.message.reply_text("🔄 Retraining model... Please wait.", parse_mode="Markdown")
-        await asyncio.to_thread(continue_training)
-        await update.message.reply_text("✅ Model retrained successfully!", parse_mode="Markdown")
+        if self.retrainer is not None:
+            message = await self.retrainer.run(notify=False)
+            await update.message.reply_text(message or "⏳ Retraining already in progress.", parse_mode="Markdown")
+            return
+        result = await asyncio.to_thread(continue_training)
+        promotion = result.get("promotion") if isinstance(result, dict) else None
+        if promotion and not promotion["promoted"]:
+            message = (f"🛡️ Challenger v{result['version']} scored ${promotion['challenger_score']:.2f} "
+                       f"vs ${promotion['champion_score']:.2f}; the current model keeps serving.")
+        else:
+            message = "✅ Model retrained successfully!"
+        await update.message.reply_text(message, parse_mode="Markdown")
+
+    async def rollback(self, update: Update, context: CallbackContext) -> None:
+        """
+        Restores the previous model checkpoint.
+        """
+        logging.info("Command /rollback received")
+        telegram_commands.inc(command="rollback")
+        try:
+            version = await asyncio.to_thread(rollback_model)
+            message = f"⏪ Rolled back to model version **v{version}**"
+        except (ValueError, FileNotFoundError) as e:
+            message = f"⚠️ Rollback failed: {e}"
+        await update.message.reply_text(message, parse_mode="Markdown")
+
+    async def profile(self, update: Update, context: CallbackContext) -> None:
+        """
+        Admin command: profiles the next evaluation and sends the report to the bot's chat.
+        """
+        logging.info("Command /profile received")
+        telegram_commands.inc(command="profile")
+        if str(update.effective_chat.id) != str(self.chat_id):
+            await update.message.reply_text("⛔ /profile is only available in the admin chat.")
+            return
+        profiler.arm()
+        await update.message.reply_text("🧪 Profiling the next evaluation, the report will follow.")
+
+    def send_profile(self, path, summary):
+        """
+        Sends the top functions of a finished profile to the chat.
+        """
+        lines = summary.strip().splitlines()
+        self.send_message(f"🧪 Profile saved to {path}\n```\n" + "\n".join(lines[:40]) + "\n```")
 
     async def help(self, update: Update, context: CallbackContext) -> None:
         """
         Provides a help message listing available commands.
         """
         logging.info("Command /help received")
+        telegram_commands.inc(command="help")
         message = (
             "📌 **Available Commands:**\n"
             "🔹 `/start` - Start the bot\n"
             "🔹 `/check` - Check for trading opportunities\n"
             "🔹 `/retrain` - Retrain the AI model\n"
+            "🔹 `/rollback` - Restore the previous model version\n"
+            "🔹 `/profile` - Profile the next evaluation (admin chat only)\n"
             "🔹 `/help` - Show this menu"
         )
         await update.message.reply_text(message, parse_mode="Markdown")
 
     async def send_message_async(self, message: str) -> None:
         """
-        Sends a message to the Telegram chat asynchronously.
+        Sends a message to the Telegram chat right away through the pooled session.
         """
-        url = f"https://api.telegram.org/bot{self.token}/sendMessage"
-        payload = {"chat_id": self.chat_id, "text": message, "parse_mode": "Markdown"}
-
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, json=payload) as response:
-                if response.status != 200:
-                    logging.error(f"⚠️ Telegram Error: {await response.text()}")
+        await self.sender.send(message)
 
     def send_message(self, message: str) -> None:
         """
-        Ensures that messages are sent safely from different threads.
+        Queues a message for delivery; safe to call from any thread and never blocks.
+        Bursts of messages are coalesced and sent within Telegram's rate limits.
         """
-        asyncio.run(self.send_message_async(message))
-
-    async def start_polling(application):
-        await application.run_polling()
+        self.sender.enqueue(message)
 
     def run(self):
         """
-        Starts the Telegram bot in an asyncio event loop.
+        Starts the Telegram bot in its own asyncio event loop, which the
+        outbound message sender shares.
         """
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
-        loop.run_until_complete(start_polling(self.application))
\ No newline at end of file
+        self.sender.start(loop)
+        self.application.run_polling(stop_signals=None, close_loop=False)
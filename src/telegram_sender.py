@@ -0,0 +1,236 @@
+import json
+import time
+import asyncio
+import logging
+import threading
+from metrics import metrics
+from settings import get_settings
+
+settings = get_settings()
+TELEGRAM_API_URL = settings.telegram_api_url
+TELEGRAM_COALESCE_SECONDS = settings.telegram_coalesce_seconds
+TELEGRAM_MIN_INTERVAL = settings.telegram_min_interval  # Telegram allows ~1 message/second per chat
+
+MAX_MESSAGE_LENGTH = 4096
+
+telegram_request_seconds = metrics.histogram("telegram_request_seconds", "Latency of sendMessage POSTs", ["status"])
+telegram_messages = metrics.counter("telegram_messages_total", "Messages handed to Telegram, by outcome", ["result"])
+telegram_queue_depth = metrics.gauge("telegram_queue_depth", "Messages queued and not yet delivered")
+
+
+class TelegramSender:
+    """
+    Long-lived outbound message sender.
+    Messages are queued from any thread, coalesced into as few Telegram messages
+    as possible and posted through one pooled aiohttp session, respecting the
+    per-chat rate limit and backing off on 429 and server errors.
+    """
+
+    def __init__(self, token, chat_id, api_url=None, coalesce_seconds=None, min_interval=None, max_retries=5):
+        self.url = f"{api_url or TELEGRAM_API_URL}/bot{token}/sendMessage"
+        self.chat_id = chat_id
+        self.coalesce_seconds = TELEGRAM_COALESCE_SECONDS if coalesce_seconds is None else coalesce_seconds
+        self.min_interval = TELEGRAM_MIN_INTERVAL if min_interval is None else min_interval
+        self.max_retries = max_retries
+        self.sent_count = 0
+        self.failed_count = 0
+
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._queue = None
+        self._worker = None
+        self._task = None
+        self._session = None
+        self._next_send_at = 0.0
+
+    def start(self, loop=None):
+        """
+        Starts the sender on `loop`, or on a dedicated background thread.
+        Calling it again is a no-op.
+        """
+        with self._lock:
+            if self._loop is not None:
+                return
+            if loop is None:
+                loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=loop.run_forever, name="telegram-sender", daemon=True)
+                self._thread.start()
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.run_coroutine_threadsafe(self._run(), loop)
+
+    def enqueue(self, text):
+        """
+        Thread-safe: queues a message for delivery and returns immediately.
+        """
+        self.start()
+        telegram_queue_depth.inc()
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, text)
+
+    async def send(self, text):
+        """
+        Delivers one message right away through the pooled session.
+        Returns True if Telegram accepted it.
+        """
+        self.start()
+        if self._is_sender_loop():
+            return await self._deliver(text)
+        future = asyncio.run_coroutine_threadsafe(self._deliver(text), self._loop)
+        return await asyncio.wrap_future(future)
+
+    def flush(self, timeout=None):
+        """
+        Blocks until every queued message has been handled.
+        """
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._queue.join(), self._loop).result(timeout)
+
+    def stop(self, timeout=5):
+        """
+        Delivers what is still queued, then closes the session.
+        """
+        if self._loop is None:
+            return
+        try:
+            self.flush(timeout)
+        finally:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(timeout)
+            if self._thread is not None:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._thread.join(timeout)
+            with self._lock:
+                self._loop = None
+
+    async def _shutdown(self):
+        """
+        Cancels the worker and waits for it to close the session.
+        """
+        if self._task is None:
+            # The worker has not started yet, so there is no session to close
+            self._worker.cancel()
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+
+    def _is_sender_loop(self):
+        try:
+            return asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    async def _get_session(self):
+        import aiohttp  # Deferred: only needed once a message is sent
+
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=10),
+                connector=aiohttp.TCPConnector(limit=4),
+            )
+        return self._session
+
+    async def _run(self):
+        """
+        Worker loop: waits for a message, collects the burst that follows it
+        and delivers the coalesced result.
+        """
+        self._task = asyncio.current_task()
+        try:
+            while True:
+                batch = [await self._queue.get()]
+                deadline = self._loop.time() + self.coalesce_seconds
+                while True:
+                    remaining = deadline - self._loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+                try:
+                    for text in self.coalesce(batch):
+                        await self._deliver(text)
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+                    telegram_queue_depth.dec(len(batch))
+        finally:
+            if self._session is not None:
+                await self._session.close()
+
+    @staticmethod
+    def coalesce(messages):
+        """
+        Joins messages into as few texts as fit within Telegram's length limit.
+        """
+        texts = []
+        current = ""
+        for message in messages:
+            message = message[:MAX_MESSAGE_LENGTH]
+            candidate = f"{current}\n\n{message}" if current else message
+            if len(candidate) > MAX_MESSAGE_LENGTH:
+                texts.append(current)
+                candidate = message
+            current = candidate
+        if current:
+            texts.append(current)
+        return texts
+
+    async def _deliver(self, text):
+        """
+        Posts one message, waiting for the chat's rate limit and retrying with
+        exponential backoff. Returns True on success.
+        """
+        import aiohttp
+
+        payload = {"chat_id": self.chat_id, "text": text, "parse_mode": "Markdown"}
+        session = await self._get_session()
+        retry_delay = 1.0
+
+        for attempt in range(self.max_retries):
+            # Reserve the next free slot for this chat before waiting for it
+            now = self._loop.time()
+            send_at = max(now, self._next_send_at)
+            self._next_send_at = send_at + self.min_interval
+            if send_at > now:
+                await asyncio.sleep(send_at - now)
+
+            start = time.perf_counter()
+            try:
+                async with session.post(self.url, json=payload) as response:
+                    body = await response.text()  # Read fully so the connection goes back to the pool
+                    telegram_request_seconds.observe(time.perf_counter() - start, status=response.status)
+                    if response.status == 200:
+                        self.sent_count += 1
+                        telegram_messages.inc(result="sent")
+                        return True
+                    if response.status == 429:
+                        retry_after = self._retry_after(body, retry_delay)
+                        logging.warning(f"⏳ Telegram rate limit hit, retrying in {retry_after}s")
+                        self._next_send_at = self._loop.time() + retry_after
+                        continue
+                    if response.status < 500:
+                        logging.error(f"⚠️ Telegram Error: {body}")
+                        break
+                    logging.warning(f"⚠️ Telegram server error {response.status} (Attempt {attempt + 1}/{self.max_retries})")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                telegram_request_seconds.observe(time.perf_counter() - start, status="error")
+                logging.warning(f"⚠️ Telegram connection error (Attempt {attempt + 1}/{self.max_retries}): {e}")
+
+            await asyncio.sleep(retry_delay)
+            retry_delay *= 2  # Exponential backoff
+
+        self.failed_count += 1
+        telegram_messages.inc(result="failed")
+        return False
+
+    @staticmethod
+    def _retry_after(body, default):
+        """
+        Reads `parameters.retry_after` from a Telegram 429 response.
+        """
+        try:
+            return float(json.loads(body)["parameters"]["retry_after"])
+        except (ValueError, KeyError, TypeError):
+            return default
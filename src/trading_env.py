@@ -1,66 +1,237 @@
-import os
 import time
 import gym
 import numpy as np
-import requests
-from dotenv import load_dotenv
+from features import OBSERVATION_FEATURES, FeaturePipeline, feature_cache
+from market_data import get_client
+from metrics import metrics
+from price_cache import PriceCache
+from price_store import PriceStore
+from settings import get_settings
 
-# Load environment variables
-load_dotenv()
-COINGECKO_API = os.getenv("COINGECKO_API")
+settings = get_settings()
+PRICE_HISTORY_DAYS = settings.price_history_days
+INITIAL_BALANCE = settings.initial_balance
+ASSET_IDS = list(settings.asset_ids)
+PRICE_STORE_ARCHIVE = settings.price_store_archive
+EPISODE_LENGTH = settings.episode_length
+OBSERVATION_WINDOW = 10
+FEATURE_WARMUP = 256  # Extra points read before a lazily loaded episode so its EMAs settle
+
+price_history_loads = metrics.counter("price_history_loads_total", "Price history loads by data source", ["source"])
+env_build_seconds = metrics.histogram(
+    "env_build_seconds", "Time to build a trading environment, including loading prices", ["env"])
+
+def fetch_market_chart(asset_id="bitcoin", since=None):
+    """
+    Fetches (timestamp_ms, price) rows of the last PRICE_HISTORY_DAYS through
+    the market-data client; with `since` (ms) only the newer points.
+    Returns None if the API is unavailable.
+    """
+    return get_client().market_chart(asset_id, days=PRICE_HISTORY_DAYS, since=since)
+
+
+def build_observation_windows(prices, window=OBSERVATION_WINDOW):
+    """
+    Precomputes every observation of a price series as a read-only float32 view.
+    Row t holds [p[t], p[t-1], ..., p[t-window+1]]; steps before the start of
+    the series are padded with the first price instead of wrapping around.
+    A (n_series, length) matrix gives one (length, window) block per series.
+    """
+    prices = np.asarray(prices, dtype=np.float32)
+    padded = np.empty(prices.shape[:-1] + (prices.shape[-1] + window - 1,), dtype=np.float32)
+    padded[..., :window - 1] = prices[..., :1]
+    padded[..., window - 1:] = prices
+    return np.lib.stride_tricks.sliding_window_view(padded, window, axis=-1)[..., ::-1]
+
+
+def observation_windows(prices, features=None, window=OBSERVATION_WINDOW, asset_ids=None, timestamps=None):
+    """
+    Precomputes the observation of every step: the last `window` values of each
+    selected feature (OBSERVATION_FEATURES by default), feature by feature, newest first.
+    Raw prices alone stay a zero-copy view; other features come from the feature
+    pipeline, extended incrementally per asset when `asset_ids` and `timestamps` are known.
+    Returns an array of shape (..., length, n_features * window).
+    """
+    features = list(features or OBSERVATION_FEATURES)
+    if features == ["price"]:
+        return build_observation_windows(prices, window)
+
+    prices = np.asarray(prices, dtype=np.float64)
+    series = prices.reshape(-1, prices.shape[-1])
+    series_timestamps = None if timestamps is None else np.asarray(timestamps).reshape(series.shape)
+    matrices = []
+    for i, values in enumerate(series):
+        if asset_ids is not None and series_timestamps is not None:
+            matrices.append(feature_cache.matrix(asset_ids[i], series_timestamps[i], values, features))
+        else:
+            matrices.append(FeaturePipeline(features).fit(values).matrix)
+
+    windows = build_observation_windows(np.stack(matrices), window)  # (series, feature, step, window)
+    windows = np.ascontiguousarray(np.moveaxis(windows, 1, 2))       # (series, step, feature, window)
+    return windows.reshape(prices.shape[:-1] + (prices.shape[-1], len(features) * window))
+
+
+def observation_size(features=None, window=OBSERVATION_WINDOW):
+    """ Length of one observation vector """
+    return window * len(features or OBSERVATION_FEATURES)
+
+
+def load_price_history(asset_id="bitcoin"):
+    """
+    Returns (timestamps, prices) for the asset, served from the local price cache.
+    A stale cache is topped up with only the points newer than its last timestamp.
+    If nothing is cached and the API fails, falls back to synthetic price data.
+    """
+    cache = PriceCache(asset_id)
+
+    if cache.is_fresh():
+        rows = cache.load()
+        if rows is not None:
+            price_history_loads.inc(source="cache")
+            return rows[:, 0], rows[:, 1]
+
+    last_timestamp = cache.last_timestamp()
+    new_rows = fetch_market_chart(asset_id, since=last_timestamp)
+    if new_rows is not None and last_timestamp is not None and not np.any(new_rows[:, 0] > last_timestamp):
+        cache.touch()  # Nothing new upstream: the cached rows are current again
+        rows = cache.load()
+        source = "api"
+        print("✅ Cached price data is up to date")
+    elif new_rows is not None:
+        rows = cache.append(new_rows)
+        source = "api"
+        if PRICE_STORE_ARCHIVE and len(rows):
+            PriceStore(asset_id).append(rows[:, 0], price=rows[:, 1])
+        print(f"✅ Loaded real price data from CoinGecko ({len(new_rows)} new points)")
+    else:
+        rows = cache.load()
+        source = "stale_cache"
+        if rows is not None:
+            print("📦 Using cached price data.")
+
+    if rows is not None and len(rows) >= 2:
+        price_history_loads.inc(source=source)
+        return rows[:, 0], rows[:, 1]
+
+    price_history_loads.inc(source="synthetic")
+    print("⚙️ Using synthetic price data instead.")
+    rng = np.random.RandomState(42)  # Local generator: histories may load on several threads
+    prices = np.linspace(30000, 35000, num=500) + rng.randn(500) * 500  # Synthetic data
+    timestamps = time.time() * 1000 - np.arange(499, -1, -1) * 3600 * 1000.0
+    return timestamps, prices
+
+
+def load_price_histories(asset_ids=None):
+    """
+    Loads the price history of every asset concurrently through the market-data client.
+    Returns {asset_id: (timestamps, prices)} in the order of `asset_ids`.
+    """
+    asset_ids = list(asset_ids or ASSET_IDS)
+    return dict(zip(asset_ids, get_client().map(load_price_history, asset_ids)))
+
+
+def align_price_histories(histories):
+    """
+    Stacks several histories into (n_assets, length) timestamp and price matrices,
+    keeping each asset's most recent `length` points (the shortest history's length).
+    """
+    length = min(len(prices) for _, prices in histories.values())
+    timestamps = np.stack([np.asarray(ts, dtype=np.float64)[-length:] for ts, _ in histories.values()])
+    prices = np.stack([np.asarray(p, dtype=np.float64)[-length:] for _, p in histories.values()])
+    return timestamps, prices
 
 class CryptoTradingEnv(gym.Env):
     """
     Custom OpenAI Gym environment for cryptocurrency trading.
     The agent learns to Buy, Hold, or Sell based on past prices.
+
+    With `time_range` = (start_ms, end_ms) the env trades the asset's close
+    prices in that range of the columnar price store instead, reading one
+    episode of `episode_length` steps at a time from the memory-mapped file:
+    episodes start at random points of the range with `random_start`,
+    otherwise one after the other.
+
+    With `copy_data=False` a price-only env reads the given `data` array in
+    place (e.g. a shared-memory buffer) and builds each observation when it
+    is needed, instead of keeping its own copies of the series.
     """
 
-    def __init__(self):
+    def __init__(self, data=None, random_start=False, asset_id="bitcoin", time_range=None, episode_length=None,
+                 copy_data=True):
         super(CryptoTradingEnv, self).__init__()
+        start = time.perf_counter()
         self.action_space = gym.spaces.Discrete(3)  # 0: Buy, 1: Hold, 2: Sell
-        self.observation_space = gym.spaces.Box(low=-np.inf, high=np.inf, shape=(10,), dtype=np.float32)
-        self.data = self.get_crypto_data()
+        self.observation_space = gym.spaces.Box(low=-np.inf, high=np.inf, shape=(observation_size(),), dtype=np.float32)
+        self.asset_id = asset_id
+        self.store = None
+        if time_range is not None:
+            self.store = PriceStore(asset_id)
+            self._rows = self.store.row_range(*time_range)
+            if self._rows[1] - self._rows[0] < 2:
+                raise ValueError(f"Fewer than 2 stored {asset_id} prices in {time_range}")
+            self.timestamps = self.store.column("timestamp", *self._rows)
+            self.data = self.store.column("close", *self._rows)
+            self.episode_length = episode_length or EPISODE_LENGTH
+            self._load_episode(self._rows[0])
+            self._next_episode = self._rows[0]
+        else:
+            if data is None:
+                self.timestamps, self.data = load_price_history(asset_id)
+            else:
+                self.timestamps, self.data = None, data
+            if not copy_data and OBSERVATION_FEATURES == ["price"]:
+                self.windows = None
+                self._prices = self.data
+            else:
+                self.windows = observation_windows(
+                    self.data, asset_ids=[asset_id] if self.timestamps is not None else None, timestamps=self.timestamps
+                )
+                self._prices = np.asarray(self.data, dtype=np.float64).tolist()
+            self._last_step = len(self._prices) - 1
+        self.initial_balance = INITIAL_BALANCE
+        self.random_start = random_start
+        self._rng = np.random.default_rng()
         self.current_step = 0
-        self.balance = float(os.getenv("INITIAL_BALANCE", 1000))  # Initial balance
+        self.balance = self.initial_balance  # Initial balance
         self.crypto_held = 0
+        env_build_seconds.observe(time.perf_counter() - start, env="single")
+
+    def _load_episode(self, row):
+        """
+        Reads the prices of the episode starting at store row `row`, plus the
+        points before it that its first observations look back on.
+        """
+        stop = min(row + self.episode_length + 1, self._rows[1])
+        lookback = min(row, OBSERVATION_WINDOW - 1 + FEATURE_WARMUP)
+        prices = np.asarray(self.store.column("close", row - lookback, stop), dtype=np.float64)
+        self.windows = observation_windows(prices)[lookback:]
+        self._prices = prices[lookback:].tolist()
+        self._last_step = len(self._prices) - 1
+        self._episode_start = row
+
+    def _observation(self, step):
+        """
+        The observation at `step`: a row of the precomputed windows, or with
+        `copy_data=False` the last prices read straight from `data`.
+        """
+        if self.windows is not None:
+            return self.windows[step]
+        recent = self._prices[max(0, step - OBSERVATION_WINDOW + 1):step + 1][::-1]
+        observation = np.full(OBSERVATION_WINDOW, self._prices[0], dtype=np.float32)
+        observation[:len(recent)] = recent
+        return observation
 
     def get_crypto_data(self):
         """
-        Fetches BTC/USDT price data from CoinGecko with exponential backoff.
-        If API fails, falls back to synthetic price data.
+        Returns the USD price series of the env's asset (see `load_price_history`).
         """
-        url = f"{COINGECKO_API}/coins/bitcoin/market_chart?vs_currency=usd&days=7"
-        max_retries = 5
-        retry_delay = 2  # Start with 2 seconds
-
-        for attempt in range(max_retries):
-            try:
-                response = requests.get(url, timeout=5)
-                response.raise_for_status()
-
-                prices = response.json()["prices"]
-                prices = np.array([p[1] for p in prices])  # Extract closing prices
-                print("✅ Loaded real price data from CoinGecko (Hourly Data)")
-                return prices
-
-            except requests.exceptions.RequestException as e:
-                print(f"⚠️ API Error (Attempt {attempt + 1}/{max_retries}): {e}")
-                if response.status_code == 429:  # Too Many Requests
-                    print(f"⏳ Waiting {retry_delay} seconds before retrying...")
-                    time.sleep(retry_delay)
-                    retry_delay *= 2  # Exponential backoff
-                else:
-                    break  # Exit loop if it's another kind of failure
-
-        print("⚙️ Using synthetic price data instead.")
-        np.random.seed(42)
-        return np.linspace(30000, 35000, num=500) + np.random.randn(500) * 500  # Synthetic data
+        return self.data
 
     def step(self, action):
         """
         Executes a trade and updates balance.
         """
-        current_price = self.data[self.current_step]
+        current_price = self._prices[self.current_step]
         reward = 0
 
         if action == 0:  # Buy
@@ -70,19 +241,33 @@ class CryptoTradingEnv(gym.Env):
         elif action == 2 and self.crypto_held > 0:  # Sell
             self.balance += self.crypto_held * current_price
             self.crypto_held = 0
-            reward = self.balance - float(os.getenv("INITIAL_BALANCE", 1000))  # Profit/Loss
+            reward = self.balance - self.initial_balance  # Profit/Loss
 
         self.current_step += 1
-        done = self.current_step >= len(self.data) - 1
-        obs = np.array([self.data[max(0, self.current_step - i)] for i in range(10)])
+        done = self.current_step >= self._last_step
 
-        return obs, reward, done, {}
+        return self._observation(self.current_step), reward, done, {}
 
     def reset(self):
         """
-        Resets the environment.
+        Resets the environment, optionally at a random offset into the series.
         """
+        if self.store is not None:
+            return self._reset_episode()
+        self.current_step = int(self._rng.integers(0, max(1, self._last_step))) if self.random_start else 0
+        self.balance = self.initial_balance
+        self.crypto_held = 0
+        return self._observation(self.current_step)
+
+    def _reset_episode(self):
+        """ Loads the next episode of a store-backed env """
+        first, stop = self._rows
+        row = int(self._rng.integers(first, stop - 1)) if self.random_start else self._next_episode
+        if row != self._episode_start:
+            self._load_episode(row)
+        following = row + self._last_step
+        self._next_episode = first if following >= stop - 1 else following
         self.current_step = 0
-        self.balance = float(os.getenv("INITIAL_BALANCE", 1000))
+        self.balance = self.initial_balance
         self.crypto_held = 0
-        return np.array([self.data[self.current_step - i] for i in range(10)])
\ No newline at end of file
+        return self.windows[0]
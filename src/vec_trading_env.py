@@ -0,0 +1,112 @@
+from multiprocessing import shared_memory
+import numpy as np
+from stable_baselines3.common.vec_env import SubprocVecEnv
+from stable_baselines3.common.vec_env.base_vec_env import VecEnv
+from lockstep_env import LockstepTradingEnv
+from trading_env import CryptoTradingEnv, load_price_history
+
+
+class BatchedCryptoTradingEnv(LockstepTradingEnv, VecEnv):
+    """
+    LockstepTradingEnv as an SB3 VecEnv, for training and health checks.
+    """
+
+    def _init_spaces(self, n_envs, observation_space, action_space):
+        VecEnv.__init__(self, n_envs, observation_space, action_space)
+
+    def get_attr(self, attr_name, indices=None):
+        indices = list(self._get_indices(indices))
+        value = getattr(self, attr_name)
+        if attr_name in self.STATE_ATTRIBUTES:
+            return [value[i].item() for i in indices]
+        return [value for _ in indices]
+
+    def set_attr(self, attr_name, value, indices=None):
+        if attr_name not in self.STATE_ATTRIBUTES:
+            setattr(self, attr_name, value)
+            return
+        state = getattr(self, attr_name)
+        for i in self._get_indices(indices):
+            state[i] = value
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        """
+        Calls a CryptoTradingEnv method on the selected envs, answered from the
+        batched state: `reset` restarts them and returns their observations,
+        `get_crypto_data` returns their price series and `get_wrapper_attr(name)`
+        an attribute (see `get_attr`).
+        """
+        method = getattr(self, f"_env_{method_name}", None)
+        if method is None:
+            raise AttributeError(f"BatchedCryptoTradingEnv envs have no method {method_name!r}")
+        return [method(i, *method_args, **method_kwargs) for i in self._get_indices(indices)]
+
+    def _env_reset(self, index):
+        mask = np.zeros(self.num_envs, dtype=bool)
+        mask[index] = True
+        self._reset_envs(mask)
+        return self._obs[index].copy()
+
+    def _env_get_crypto_data(self, index):
+        return self._series[self.series_index[index]]
+
+    def _env_get_wrapper_attr(self, index, name):
+        return self.get_attr(name, [index])[0]
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self._get_indices(indices)]
+
+
+class SharedPriceEnvFactory:
+    """
+    Picklable environment factory for subprocess workers.
+    Each worker attaches to the price series in shared memory and its env
+    reads the mapped buffer in place, instead of holding its own copy.
+    """
+
+    def __init__(self, shm_name, length):
+        self.shm_name = shm_name
+        self.length = length
+
+    def __call__(self):
+        shm = shared_memory.SharedMemory(name=self.shm_name)
+        prices = np.ndarray((self.length,), dtype=np.float64, buffer=shm.buf)
+        env = CryptoTradingEnv(data=prices, random_start=True, copy_data=False)
+        env.shared_memory = shm  # Keep the mapping alive as long as the env
+        return env
+
+
+class SharedPriceSubprocVecEnv(SubprocVecEnv):
+    """
+    SubprocVecEnv whose workers share one copy of the price series.
+    The shared memory block is owned by this object and released on close().
+    """
+
+    def __init__(self, n_envs, data=None, start_method=None):
+        self.timestamps = None
+        if data is None:
+            self.timestamps, data = load_price_history()
+        data = np.asarray(data, dtype=np.float64)
+
+        self.shared_memory = shared_memory.SharedMemory(create=True, size=data.nbytes)
+        np.ndarray(data.shape, dtype=np.float64, buffer=self.shared_memory.buf)[:] = data
+
+        factory = SharedPriceEnvFactory(self.shared_memory.name, len(data))
+        try:
+            super().__init__([factory for _ in range(n_envs)], start_method=start_method)
+        except Exception:
+            self._release_shared_memory()
+            raise
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self._release_shared_memory()
+
+    def _release_shared_memory(self):
+        if self.shared_memory is None:
+            return
+        self.shared_memory.close()
+        self.shared_memory.unlink()
+        self.shared_memory = None
@@ -0,0 +1,103 @@
+import unittest
+import os
+import tempfile
+import numpy as np
+from unittest.mock import patch
+from stable_baselines3 import PPO
+from src.backtest import positions, simulate, risk_metrics, backtest, compare_checkpoints
+from src.checkpoint_store import CheckpointStore
+from src.vec_trading_env import BatchedCryptoTradingEnv
+
+
+def simulate_loop(prices, actions, fee, slippage, balance=1000.0):
+    """Reference: the env's all-in trades, one tick at a time."""
+    held = 0.0
+    equity = []
+    for t, price in enumerate(prices):
+        action = actions[t] if t < len(actions) else 1
+        if action == 0 and balance > 0:
+            held, balance = balance * (1 - fee) / (price * (1 + slippage)), 0.0
+        elif action == 2 and held > 0:
+            held, balance = 0.0, held * price * (1 - slippage) * (1 - fee)
+        equity.append(balance + held * price)
+    return np.array(equity)
+
+
+class ConstantModel:
+    """Predicts a fixed action sequence, recording the batch it was given."""
+
+    def __init__(self, actions):
+        self.actions = np.asarray(actions)
+        self.batches = []
+
+    def predict(self, observation, deterministic=False):
+        self.batches.append(observation.shape)
+        return self.actions[:len(observation)], None
+
+
+class TestBacktest(unittest.TestCase):
+    """Tests for the vectorized backtest engine."""
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.prices = 30000 * np.exp(np.cumsum(rng.normal(0, 0.01, 500)))
+        self.actions = rng.integers(0, 3, size=499)
+
+    def test_positions_carry_the_last_trade_forward(self):
+        np.testing.assert_array_equal(positions([1, 0, 1, 1, 2, 1, 0, 0]), [0, 1, 1, 1, 0, 0, 1, 1])
+
+    def test_simulate_matches_a_per_tick_loop(self):
+        """The vectorized equity path equals stepping through every tick, fees included."""
+        equity, _ = simulate(self.prices, self.actions, fee=0.001, slippage=0.0005, initial_balance=1000.0)
+        np.testing.assert_allclose(equity, simulate_loop(self.prices, self.actions, 0.001, 0.0005), rtol=1e-10)
+
+    def test_simulate_matches_the_env_without_costs(self):
+        """Without costs, the balance after a sell is the env's balance."""
+        env = BatchedCryptoTradingEnv(n_envs=1, data=self.prices, start_offsets=[0])
+        env.reset()
+        balances = []
+        for action in self.actions[:-1]:
+            env.step(np.array([action]))
+            balances.append(env.balance[0] + env.crypto_held[0] * self.prices[env.current_step[0] - 1])
+        equity, _ = simulate(self.prices, self.actions, fee=0.0, slippage=0.0, initial_balance=1000.0)
+        np.testing.assert_allclose(equity[:len(balances)], balances, rtol=1e-9)
+
+    def test_risk_metrics(self):
+        equity = np.array([100.0, 110.0, 99.0, 121.0])
+        metrics = risk_metrics(equity, np.array([1, 1, 0]), np.array([1.0, 1.1, 0.99]))
+        self.assertAlmostEqual(metrics["pnl"], 21.0)
+        self.assertAlmostEqual(metrics["max_drawdown"], 0.1)
+        self.assertEqual(metrics["trades"], 2)
+        self.assertAlmostEqual(metrics["exposure"], 2 / 3)
+
+    def test_backtest_predicts_in_one_batch(self):
+        """Every step's action comes from a single forward pass over all windows."""
+        model = ConstantModel(self.actions)
+        with patch("src.backtest.BACKTEST_FEE", 0.0), patch("src.backtest.BACKTEST_SLIPPAGE", 0.0):
+            metrics = backtest(model, self.prices)
+        self.assertEqual(model.batches, [(499, 10)])
+        expected = simulate_loop(self.prices, self.actions, 0.0, 0.0)[-1] - 1000.0
+        self.assertAlmostEqual(metrics["pnl"], expected, places=6)
+
+    def test_compare_checkpoints(self):
+        """Every stored version is backtested, and the published one is marked."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            model_path = os.path.join(tmp_dir, "agent.zip")
+            store = CheckpointStore(model_path)
+            env = BatchedCryptoTradingEnv(n_envs=1, data=self.prices)
+            for seed in (0, 1):
+                store.save(PPO("MlpPolicy", env, n_steps=16, seed=seed, verbose=0))
+
+            timestamps = np.arange(len(self.prices)) * 3600_000.0
+            with patch("src.backtest.load_price_history", return_value=(timestamps, self.prices)):
+                results = compare_checkpoints(model_path)
+
+        self.assertEqual([result["version"] for result in results], [1, 2])
+        self.assertEqual([result["current"] for result in results], [False, True])
+        for result in results:
+            self.assertGreaterEqual(result["max_drawdown"], 0)
+            self.assertIn("sharpe", result)
+
+
+if __name__ == '__main__':
+    unittest.main()
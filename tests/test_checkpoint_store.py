@@ -0,0 +1,123 @@
+import os
+import tempfile
+import threading
+import unittest
+from src.checkpoint_store import CheckpointStore
+
+
+class FakeModel:
+    """Minimal stand-in for a PPO model that writes its name on save."""
+
+    def __init__(self, name, num_timesteps=0):
+        self.name = name
+        self.num_timesteps = num_timesteps
+
+    def save(self, path):
+        with open(path, "w") as f:
+            f.write(self.name)
+
+
+class TestCheckpointStore(unittest.TestCase):
+    """Unit tests for the atomic, versioned checkpoint store."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.model_path = os.path.join(self.tmp_dir.name, "agent.zip")
+        self.store = CheckpointStore(self.model_path, keep=3)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def read_model(self):
+        with open(self.model_path) as f:
+            return f.read()
+
+    def test_save_publishes_and_records_metadata(self):
+        """A save publishes the model and stores its metadata."""
+        version = self.store.save(FakeModel("first", 5000), metadata={"losses": {"value_loss": 1.5}})
+
+        self.assertEqual(version, 1)
+        self.assertEqual(self.read_model(), "first")
+        self.assertEqual(self.store.current_version(), 1)
+        metadata = self.store.versions()[0]
+        self.assertEqual(metadata["num_timesteps"], 5000)
+        self.assertEqual(metadata["losses"], {"value_loss": 1.5})
+        self.assertIn("timestamp", metadata)
+
+    def test_unpublished_save(self):
+        """A candidate can be stored without replacing the live model."""
+        self.store.save(FakeModel("live"))
+        version = self.store.save(FakeModel("candidate"), publish=False)
+
+        self.assertEqual(self.read_model(), "live")
+        self.assertEqual(self.store.current_version(), 1)
+        with open(self.store.path_for(version)) as f:
+            self.assertEqual(f.read(), "candidate")
+
+    def test_rollback(self):
+        """Rollback publishes the previous version, or an explicit one."""
+        for name in ("a", "b", "c"):
+            self.store.save(FakeModel(name))
+
+        self.assertEqual(self.store.rollback(), 2)
+        self.assertEqual(self.read_model(), "b")
+        self.assertEqual(self.store.rollback(1), 1)
+        self.assertEqual(self.read_model(), "a")
+        with self.assertRaises(ValueError):
+            self.store.rollback()
+
+    def test_prune_keeps_latest_versions(self):
+        """Only the newest `keep` versions stay on disk."""
+        for i in range(5):
+            self.store.save(FakeModel(str(i)))
+
+        self.assertEqual([v["version"] for v in self.store.versions()], [3, 4, 5])
+        self.assertFalse(os.path.exists(self.store.path_for(1)))
+
+    def test_readers_never_see_missing_model(self):
+        """The published file exists and is complete throughout repeated saves."""
+        self.store.save(FakeModel("model-0"))
+        stop = threading.Event()
+        failures = []
+
+        def reader():
+            while not stop.is_set():
+                try:
+                    if not self.read_model().startswith("model-"):
+                        failures.append("partial")
+                except FileNotFoundError:
+                    failures.append("missing")
+
+        thread = threading.Thread(target=reader)
+        thread.start()
+        for i in range(1, 30):
+            self.store.save(FakeModel(f"model-{i}"))
+        stop.set()
+        thread.join()
+
+        self.assertEqual(failures, [])
+
+    def test_concurrent_saves_get_distinct_versions(self):
+        """Overlapping saves from several writers never reuse a version number."""
+        store = CheckpointStore(self.model_path, keep=0)
+        versions = []
+
+        def writer(name):
+            for i in range(10):
+                versions.append(CheckpointStore(self.model_path, keep=0).save(FakeModel(f"{name}-{i}")))
+
+        threads = [threading.Thread(target=writer, args=(name,)) for name in "abcd"]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(versions), list(range(1, 41)))
+        names = set()
+        for version in versions:
+            with open(store.path_for(version)) as f:
+                names.add(f.read())
+        self.assertEqual(len(names), 40)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import time
+import asyncio
+import threading
+import unittest
+from src.evaluation_service import SingleFlightEvaluator, rank_opportunities
+
+
+class TestSingleFlightEvaluator(unittest.TestCase):
+    """Unit tests for the shared, short-lived evaluation cache."""
+
+    def setUp(self):
+        self.calls = 0
+        self.key = ("model-v1", 1000)
+        self.release = threading.Event()
+
+    def evaluate(self):
+        self.calls += 1
+        self.release.wait(5)
+        return 42.0 + self.calls
+
+    def make_evaluator(self, ttl=30):
+        evaluator = SingleFlightEvaluator(self.evaluate, lambda: self.key, ttl=ttl, max_workers=2)
+        self.addCleanup(evaluator.shutdown)
+        return evaluator
+
+    def test_concurrent_requests_share_one_evaluation(self):
+        """Ten simultaneous callers trigger a single evaluation."""
+        evaluator = self.make_evaluator()
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(evaluator.evaluate(timeout=5))) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.05)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results, [43.0] * 10)
+        self.assertEqual(evaluator.evaluations, 1)
+
+    def test_result_is_cached_until_ttl_or_key_changes(self):
+        """Results are reused within the TTL for the same key only."""
+        self.release.set()
+        evaluator = self.make_evaluator(ttl=0.2)
+
+        self.assertEqual(evaluator.evaluate(timeout=5), 43.0)
+        self.assertEqual(evaluator.evaluate(timeout=5), 43.0)
+        self.assertEqual(evaluator.cache_hits, 1)
+
+        self.key = ("model-v2", 1000)
+        self.assertEqual(evaluator.evaluate(timeout=5), 44.0)
+
+        time.sleep(0.25)
+        self.assertEqual(evaluator.evaluate(timeout=5), 45.0)
+
+    def test_result_is_cached_under_refreshed_key(self):
+        """An evaluation that refreshes the price cache is reused for the new data."""
+        self.release.set()
+
+        def refreshing():
+            self.key = ("model-v1", 2000)  # The evaluation appended newer prices
+            return self.evaluate()
+
+        evaluator = SingleFlightEvaluator(refreshing, lambda: self.key, ttl=30, max_workers=1)
+        self.addCleanup(evaluator.shutdown)
+
+        self.assertEqual(evaluator.evaluate(timeout=5), 43.0)
+        self.assertEqual(evaluator.evaluate(timeout=5), 43.0)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(evaluator.cache_hits, 1)
+
+    def test_async_callers_do_not_block_the_loop(self):
+        """The awaitable path runs the evaluation off the event loop."""
+        evaluator = self.make_evaluator()
+
+        async def scenario():
+            checks = [asyncio.ensure_future(evaluator.evaluate_async()) for _ in range(5)]
+            await asyncio.sleep(0.05)  # The loop keeps running while evaluation is blocked
+            self.release.set()
+            return await asyncio.gather(*checks)
+
+        self.assertEqual(asyncio.run(scenario()), [43.0] * 5)
+        self.assertEqual(self.calls, 1)
+
+    def test_errors_are_not_cached(self):
+        """A failed evaluation is reported to every waiter and retried next time."""
+        self.release.set()
+        failures = iter([RuntimeError("boom")])
+
+        def flaky():
+            error = next(failures, None)
+            if error:
+                raise error
+            return 1.0
+
+        evaluator = SingleFlightEvaluator(flaky, lambda: self.key, ttl=30, max_workers=1)
+        self.addCleanup(evaluator.shutdown)
+        with self.assertRaises(RuntimeError):
+            evaluator.evaluate(timeout=5)
+        self.assertEqual(evaluator.evaluate(timeout=5), 1.0)
+
+
+class TestRankOpportunities(unittest.TestCase):
+    """Tests for the ranking of per-asset opportunities."""
+
+    def test_ranks_best_first_above_threshold(self):
+        rewards = {"bitcoin": 12.0, "ethereum": 30.0, "solana": -4.0, "cardano": 10.0}
+        self.assertEqual(rank_opportunities(rewards, min_reward=10.0), [("ethereum", 30.0), ("bitcoin", 12.0)])
+        self.assertEqual([asset for asset, _ in rank_opportunities(rewards)], ["ethereum", "bitcoin", "cardano", "solana"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+import numpy as np
+from unittest.mock import patch
+from src import trading_env
+from src.features import FEATURES, FeatureCache, FeaturePipeline, ema
+
+
+def random_walk(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return 30000 * np.exp(np.cumsum(rng.normal(0, 0.01, count)))
+
+
+class TestFeaturePipeline(unittest.TestCase):
+    """Unit tests for the vectorized and incremental feature computation."""
+
+    def test_ema_matches_recursion_across_chunks(self):
+        """The chunked closed form equals the plain recursion over long series."""
+        values = random_walk(3000)
+        expected = []
+        average = values[0]
+        for value in values:
+            average += 0.1 * (value - average)
+            expected.append(average)
+
+        averages, last = ema(values, 0.1, values[0])
+        np.testing.assert_allclose(averages, expected, rtol=1e-10)
+        self.assertAlmostEqual(last, expected[-1], delta=1e-6)
+
+    def test_incremental_updates_match_a_full_fit(self):
+        """Appending ticks one by one gives the same matrix as fitting the whole series."""
+        prices = random_walk(1500)
+        full = FeaturePipeline().fit(prices).matrix
+        incremental = FeaturePipeline(capacity=16).fit(prices[:200]).extend(prices[200:]).matrix
+
+        self.assertEqual(full.dtype, np.float32)
+        self.assertEqual(full.shape, (len(FEATURES), 1500))
+        np.testing.assert_allclose(incremental, full, rtol=1e-5, atol=1e-7)
+
+    def test_feature_values(self):
+        """Returns, RSI and normalized prices behave as expected on simple series."""
+        rising = FeaturePipeline(["return", "rsi", "norm_price"]).fit(np.linspace(100, 200, 50)).matrix
+        self.assertEqual(rising[0, 0], 0)
+        self.assertTrue(np.all(rising[0, 1:] > 0))
+        np.testing.assert_allclose(rising[1, 1:], 1.0)
+        self.assertTrue(np.all(rising[2, 1:] > 0))
+
+        with self.assertRaises(ValueError):
+            FeaturePipeline(["price", "sentiment"])
+
+    def test_cache_extends_instead_of_refitting(self):
+        """A series that only gained new ticks is extended, not recomputed."""
+        prices = random_walk(300)
+        timestamps = np.arange(300) * 60_000.0
+        cache = FeatureCache()
+
+        with patch("src.features.FeaturePipeline.fit", autospec=True, side_effect=FeaturePipeline.fit) as mock_fit:
+            cache.matrix("bitcoin", timestamps[:250], prices[:250], ["return", "rsi"])
+            matrix = cache.matrix("bitcoin", timestamps[10:], prices[10:], ["return", "rsi"])
+
+        self.assertEqual(mock_fit.call_count, 1)
+        self.assertEqual(matrix.shape, (2, 290))
+        expected = FeaturePipeline(["return", "rsi"]).fit(prices).matrix[:, 10:]
+        np.testing.assert_allclose(matrix, expected, rtol=1e-5, atol=1e-7)
+
+
+class TestFeatureObservations(unittest.TestCase):
+    """Tests for observations built from the feature matrix."""
+
+    def test_env_observes_selected_features(self):
+        """Each observation holds a window of every selected feature, newest first."""
+        prices = random_walk(40)
+        with patch.object(trading_env, "OBSERVATION_FEATURES", ["return", "rsi"]):
+            env = trading_env.CryptoTradingEnv(data=prices)
+
+        self.assertEqual(env.observation_space.shape, (20,))
+        env.reset()
+        for _ in range(15):
+            obs, _, _, _ = env.step(1)
+
+        matrix = FeaturePipeline(["return", "rsi"]).fit(prices).matrix
+        np.testing.assert_array_equal(obs[:10], matrix[0, 6:16][::-1])
+        np.testing.assert_array_equal(obs[10:], matrix[1, 6:16][::-1])
+
+if __name__ == '__main__':
+    unittest.main()
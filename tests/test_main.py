@@ -0,0 +1,45 @@
+import os
+import asyncio
+import tempfile
+import unittest
+from unittest.mock import patch
+from src.checkpoint_store import CheckpointStore
+from src.main import BackgroundRetrainer
+
+
+class TestBackgroundRetrainer(unittest.TestCase):
+    """
+    Tests for retraining in a separate process.
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.model_path = os.path.join(self.tmp_dir.name, "agent.zip")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_parallel_retraining_starts_env_workers(self):
+        """A retrain with subprocess env workers runs to completion and publishes a model."""
+        env = {
+            "MODEL_PATH": self.model_path,
+            "PRICE_CACHE_DIR": os.path.join(self.tmp_dir.name, "prices"),
+            "TRAIN_PARALLEL": "1",
+            "TRAIN_N_ENVS": "2",
+            "TRAIN_TIMESTEPS": "64",
+            "TRAIN_N_STEPS": "64",
+            "TRAIN_MODE": "full",
+        }
+        with patch.dict(os.environ, env):  # The spawned process reads its settings from the environment
+            retrainer = BackgroundRetrainer()
+            retrainer.store = CheckpointStore(self.model_path)
+            message = asyncio.run(retrainer.run(notify=False))
+
+        self.assertEqual(retrainer.process.exitcode, 0)
+        self.assertTrue(message.startswith("✅ **Retraining finished**"))
+        self.assertTrue(os.path.exists(self.model_path))
+        self.assertEqual(len(retrainer.store.versions()), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
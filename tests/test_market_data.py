@@ -0,0 +1,113 @@
+import unittest
+import time
+import threading
+import numpy as np
+from unittest.mock import patch
+from benchmarks.stubs import CoinGeckoStub
+from src.market_data import MarketDataClient, MarketDataError, TokenBucket
+
+
+class TestTokenBucket(unittest.TestCase):
+    """Tests for the shared request rate limiter."""
+
+    def test_burst_then_rate(self):
+        """A full bucket serves `burst` requests at once, then one per 1/rate seconds."""
+        bucket = TokenBucket(rate=50, burst=3)
+        start = time.monotonic()
+        for _ in range(8):
+            bucket.acquire()
+        self.assertAlmostEqual(time.monotonic() - start, 5 / 50, delta=0.05)
+
+    def test_threads_share_the_bucket(self):
+        bucket = TokenBucket(rate=100, burst=1)
+        start = time.monotonic()
+        threads = [threading.Thread(target=lambda: [bucket.acquire() for _ in range(5)]) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertGreaterEqual(time.monotonic() - start, 19 / 100 - 0.01)
+
+    def test_zero_rate_never_waits(self):
+        bucket = TokenBucket(rate=0)
+        self.assertEqual(sum(bucket.acquire() for _ in range(100)), 0.0)
+
+
+class TestMarketDataClient(unittest.TestCase):
+    """Tests for the market-data client against the offline CoinGecko stub."""
+
+    def setUp(self):
+        self.stub = CoinGeckoStub().start()
+        self.addCleanup(self.stub.stop)
+        self.client = MarketDataClient(self.stub.url, max_connections=4, min_interval=0, backoff=0.01)
+        self.addCleanup(self.client.close)
+
+    def test_retries_rate_limits_and_server_errors(self):
+        """429 and 5xx responses are retried with backoff, honouring Retry-After."""
+        self.stub.fail_next(503)
+        self.stub.fail_next(429, retry_after=0)
+        with patch("src.market_data.time.sleep") as mock_sleep:
+            rows = self.client.market_chart("bitcoin", days=7)
+        self.assertEqual(rows.shape, (169, 2))
+        self.assertEqual(len(self.stub.requests), 3)
+        self.assertEqual(mock_sleep.call_count, 2)
+
+        self.stub.fail_next(429, retry_after=7)
+        with patch("src.market_data.time.sleep") as mock_sleep:
+            self.client.market_chart("bitcoin", days=1)
+        mock_sleep.assert_called_once_with(7.0)
+
+    def test_connection_errors_back_off_then_fail(self):
+        """Connection errors are retried too, and give up after max_retries."""
+        client = MarketDataClient("http://127.0.0.1:9", max_retries=2, backoff=0.01, timeout=1)
+        with patch("src.market_data.time.sleep") as mock_sleep, self.assertRaises(MarketDataError) as raised:
+            client.get_json("/ping")
+        self.assertEqual(mock_sleep.call_count, 2)
+        self.assertIsNone(raised.exception.status)
+        self.assertIsNone(client.market_chart("bitcoin", days=7))
+
+    def test_client_errors_are_not_retried(self):
+        with self.assertRaises(MarketDataError) as raised:
+            self.client.get_json("/coins/not-a-coin/market_chart", {"vs_currency": "usd", "days": 7})
+        self.assertEqual(raised.exception.status, 404)
+        self.assertEqual(len(self.stub.requests), 1)
+
+    def test_etag_revalidation(self):
+        """A repeated request is answered with 304 and served from the previous body."""
+        first = self.client.market_chart("bitcoin", days=7)
+        second = self.client.market_chart("bitcoin", days=7)
+        np.testing.assert_array_equal(first, second)
+        self.assertEqual(len(self.stub.requests), 2)
+
+        with patch.object(self.client.session, "get", wraps=self.client.session.get) as mock_get:
+            self.client.market_chart("bitcoin", days=7)
+        self.assertIn("If-None-Match", mock_get.call_args.kwargs["headers"])
+
+    def test_incremental_polls_are_revalidated(self):
+        """Polls for the same new points within one range step repeat the URL, so the second is conditional."""
+        since = self.client.market_chart("bitcoin", days=1)[-5, 0]
+        hour = int(time.time()) // 3600 * 3600
+        clock = [hour + 1.0]
+        with patch("src.market_data.time.time", side_effect=lambda: clock[0]):
+            first = self.client.market_chart("bitcoin", since=since)
+            clock[0] = hour + 3599.0
+            with patch.object(self.client.session, "get", wraps=self.client.session.get) as mock_get:
+                second = self.client.market_chart("bitcoin", since=since)
+
+        self.assertEqual(len(first), 4)
+        np.testing.assert_array_equal(first, second)
+        self.assertEqual(self.stub.requests[-1][1], self.stub.requests[-2][1])
+        self.assertIn("If-None-Match", mock_get.call_args.kwargs["headers"])
+
+    def test_get_many_fetches_concurrently(self):
+        """Endpoints are fetched in parallel and returned in order, failures included."""
+        endpoints = [("/coins/bitcoin/market_chart", {"vs_currency": "usd", "days": days}) for days in (1, 2, 7)]
+        endpoints.append(("/coins/not-a-coin/market_chart", {"vs_currency": "usd", "days": 1}))
+        results = self.client.get_many(endpoints)
+
+        self.assertEqual([len(result["prices"]) for result in results[:3]], [25, 49, 169])
+        self.assertIsInstance(results[3], MarketDataError)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import os
+import socket
+import tempfile
+import unittest
+import urllib.request
+from src.metrics import MetricsRegistry, Profiler, start_metrics_server
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    """Unit tests for counters, gauges, histograms and their text export."""
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_counter_and_gauge(self):
+        """Counters add up per label set and gauges hold the last value."""
+        requests = self.registry.counter("requests_total", "Requests", ["status"])
+        requests.inc(status="ok")
+        requests.inc(2, status="ok")
+        requests.inc(status="error")
+        depth = self.registry.gauge("queue_depth", "Queue depth")
+        depth.inc(3)
+        depth.dec()
+
+        self.assertEqual(requests.value(status="ok"), 3)
+        self.assertIs(self.registry.counter("requests_total", "Requests", ["status"]), requests)
+        text = self.registry.render()
+        self.assertIn("# TYPE requests_total counter", text)
+        self.assertIn('requests_total{status="ok"} 3.0', text)
+        self.assertIn('requests_total{status="error"} 1.0', text)
+        self.assertIn("queue_depth 2.0", text)
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Observations land in every bucket at or above them, plus sum and count."""
+        latency = self.registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 5.0):
+            latency.observe(value)
+        with latency.time():
+            pass
+
+        text = self.registry.render()
+        self.assertIn('latency_seconds_bucket{le="0.1"} 2', text)
+        self.assertIn('latency_seconds_bucket{le="1.0"} 4', text)
+        self.assertIn('latency_seconds_bucket{le="+Inf"} 5', text)
+        self.assertIn("latency_seconds_count 5", text)
+        self.assertEqual(latency.value()[0], 5)
+
+    def test_label_mismatch_is_rejected(self):
+        """Observing with the wrong labels fails loudly instead of exporting bad series."""
+        counter = self.registry.counter("events_total", "Events", ["kind"])
+        with self.assertRaises(ValueError):
+            counter.inc(type="x")
+        with self.assertRaises(ValueError):
+            self.registry.gauge("events_total", "Events")
+
+    def test_http_endpoint(self):
+        """The endpoint serves the registry in the Prometheus text format."""
+        self.registry.counter("hits_total", "Hits").inc()
+        server = start_metrics_server(port=free_port(), registry=self.registry)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url, timeout=5) as response:
+            self.assertTrue(response.headers["Content-Type"].startswith("text/plain; version=0.0.4"))
+            self.assertIn("hits_total 1.0", response.read().decode())
+
+    def test_port_zero_disables_the_endpoint(self):
+        self.assertIsNone(start_metrics_server(port=0, registry=self.registry))
+
+
+class TestProfiler(unittest.TestCase):
+    """Tests for the on-demand cProfile dump."""
+
+    def test_profiles_only_when_armed(self):
+        """Only the armed call is profiled; the dump is written and reported."""
+        with tempfile.TemporaryDirectory() as profile_dir:
+            profiler = Profiler(profile_dir=profile_dir)
+            reports = []
+            profiler.on_dump.append(lambda path, summary: reports.append((path, summary)))
+
+            @profiler.profiled("work")
+            def work(n):
+                return sum(range(n))
+
+            self.assertEqual(work(10), 45)
+            self.assertEqual(reports, [])
+
+            profiler.arm()
+            self.assertEqual(work(10), 45)
+            self.assertEqual(work(10), 45)
+
+            self.assertEqual(len(reports), 1)
+            path, summary = reports[0]
+            self.assertTrue(os.path.exists(path))
+            self.assertIn("function calls", summary)
+
+if __name__ == '__main__':
+    unittest.main()
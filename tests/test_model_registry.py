@@ -0,0 +1,86 @@
+import os
+import tempfile
+import threading
+import hashlib
+import unittest
+from unittest.mock import patch
+from src.model_registry import ModelRegistry
+
+
+class TestModelRegistry(unittest.TestCase):
+    """Unit tests for the in-process model registry."""
+
+    def setUp(self):
+        """Creates a model file and a registry with a counting loader."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "model.zip")
+        self.write(b"model-v1")
+        self.loaded = []
+        self.registry = ModelRegistry(loader=self.load)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def load(self, file):
+        content = file.read()
+        self.loaded.append(content)
+        return content
+
+    def write(self, content, mtime=None):
+        with open(self.path, "wb") as f:
+            f.write(content)
+        if mtime is not None:
+            os.utime(self.path, (mtime, mtime))
+
+    def test_cached_until_file_changes(self):
+        """Repeated lookups reuse the loaded model."""
+        self.assertEqual(self.registry.get(self.path), b"model-v1")
+        self.assertEqual(self.registry.get(self.path), b"model-v1")
+        self.assertEqual(len(self.loaded), 1)
+        self.assertEqual(self.registry.stats()["hits"], 1)
+
+    def test_reload_on_new_content(self):
+        """A new checkpoint is picked up on the next lookup."""
+        self.registry.get(self.path)
+        version = self.registry.version(self.path)
+        self.write(b"model-v2", mtime=os.path.getmtime(self.path) + 10)
+
+        self.assertEqual(self.registry.get(self.path), b"model-v2")
+        self.assertEqual(len(self.loaded), 2)
+        self.assertNotEqual(self.registry.version(self.path), version)
+
+    def test_touch_without_change_does_not_reload(self):
+        """A new mtime with identical content keeps the cached model."""
+        self.registry.get(self.path)
+        self.write(b"model-v1", mtime=os.path.getmtime(self.path) + 10)
+
+        self.registry.get(self.path)
+        self.assertEqual(len(self.loaded), 1)
+
+    def test_concurrent_lookups_load_once(self):
+        """Threads asking for the same model share a single load."""
+        threads = [threading.Thread(target=self.registry.get, args=(self.path,)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = self.registry.stats()
+        self.assertEqual(stats["loads"], 1)
+        self.assertEqual(stats["hits"], 7)
+        self.assertGreaterEqual(stats["last_load_seconds"], 0.0)
+
+    def test_digest_rehashes_only_changed_files(self):
+        """The content hash is cached until the file's mtime or size changes."""
+        expected = hashlib.sha256(b"model-v2").hexdigest()
+        with patch("src.model_registry.hashlib.sha256", wraps=hashlib.sha256) as mock_sha256:
+            digest = self.registry.digest(self.path)
+            self.assertEqual(self.registry.digest(self.path), digest)
+            self.assertEqual(mock_sha256.call_count, 1)
+
+            self.write(b"model-v2", mtime=os.path.getmtime(self.path) + 10)
+            self.assertEqual(self.registry.digest(self.path), expected)
+            self.assertEqual(mock_sha256.call_count, 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,20 @@
 import unittest
 import os
 import time
+import tempfile
+import numpy as np
+import torch
 from unittest.mock import patch
-from src.model_training import continue_training, is_model_optimal, evaluate_model
+from stable_baselines3 import PPO
+from src.model_training import (
+    continue_training, is_model_optimal, scale_rollout,
+    TrainingMetricsCallback, compute_rollout_losses, load_training_metrics, metrics_path,
+    new_data_start, incremental_timesteps
+)
+from src.inference import evaluate_model, monte_carlo_rewards, recent_start_offsets, reward_statistics
+from src import model_training
+from src.checkpoint_store import CheckpointStore
+from src.vec_trading_env import BatchedCryptoTradingEnv
 
 class TestModelTraining(unittest.TestCase):
     """
@@ -18,6 +30,7 @@ class TestModelTraining(unittest.TestCase):
             with open(self.model_file, "w") as f:
                 f.write("Initial Model")
 
+    @patch("src.model_training.SHADOW_TRAINING", False)
     @patch("src.model_training.is_model_optimal", return_value=(False, 0.1, 0.2, 0.3))
     def test_model_training(self, mock_is_model_optimal):
         """Tests if the model retrains successfully and updates the model file."""
@@ -63,5 +76,283 @@ class TestModelTraining(unittest.TestCase):
             self.assertIsInstance(value_loss, float, "Value loss should be a float")
             self.assertIsInstance(entropy_loss, float, "Entropy loss should be a float")
 
+    def test_scale_rollout(self):
+        """The rollout is split across workers and the budget covers whole rollouts."""
+        n_steps, total_timesteps = scale_rollout(5000, 1)
+        self.assertEqual(n_steps, 2048)
+        self.assertEqual(total_timesteps, 3 * 2048)
+
+        n_steps, total_timesteps = scale_rollout(5000, 8)
+        self.assertEqual(n_steps, 256)
+        self.assertEqual(total_timesteps, 3 * 2048)
+
+
+class TestTrainingMetrics(unittest.TestCase):
+    """
+    Tests for the persisted training metrics and the side-effect-free loss computation.
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.model_path = os.path.join(self.tmp_dir.name, "agent.zip")
+        self.env = BatchedCryptoTradingEnv(n_envs=2, data=np.linspace(100, 200, num=40), random_start=False)
+        self.model = PPO("MlpPolicy", self.env, n_steps=16, batch_size=32, n_epochs=1, verbose=0)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_callback_records_one_entry_per_rollout(self):
+        """Each gradient update is recorded once, and the sidecar round-trips."""
+        callback = TrainingMetricsCallback()
+        self.model.learn(total_timesteps=96, callback=callback)
+
+        self.assertEqual(len(callback.value_loss), 3)
+        self.assertEqual(len(callback.policy_loss), 3)
+        self.assertEqual(len(callback.entropy_loss), 3)
+
+        self.model.save(self.model_path)
+        callback.save(self.model_path)
+        metrics = load_training_metrics(self.model_path)
+        self.assertEqual(metrics["value_loss"], callback.value_loss)
+        self.assertEqual(metrics["num_timesteps"], 96)
+
+    def test_stale_sidecar_is_ignored(self):
+        """Metrics saved for another version of the model file are not used."""
+        callback = TrainingMetricsCallback()
+        self.model.learn(total_timesteps=32, callback=callback)
+        self.model.save(self.model_path)
+        callback.save(self.model_path)
+
+        self.model.learn(total_timesteps=32)
+        self.model.save(self.model_path)
+        self.assertTrue(os.path.exists(metrics_path(self.model_path)))
+        self.assertIsNone(load_training_metrics(self.model_path))
+
+    def test_rollout_losses_are_deterministic_and_side_effect_free(self):
+        """Computing losses leaves the weights untouched and repeats exactly."""
+        before = [p.detach().clone() for p in self.model.policy.parameters()]
+
+        first = compute_rollout_losses(self.model, self.env, n_steps=16)
+        second = compute_rollout_losses(self.model, self.env, n_steps=16)
+
+        self.assertEqual(first, second)
+        self.assertTrue(all(isinstance(loss, float) for loss in first))
+        for old, new in zip(before, self.model.policy.parameters()):
+            self.assertTrue(torch.equal(old, new))
+
+
+class TestIncrementalTraining(unittest.TestCase):
+    """
+    Tests for warm-start training on new data with early stopping.
+    """
+
+    def test_new_data_start(self):
+        """New data starts after the last timestamp the checkpoint was trained on."""
+        timestamps = np.arange(0.0, 100.0, 10.0)
+        self.assertEqual(new_data_start(timestamps, {"data_range": [0, 70]}), 8)
+        self.assertEqual(new_data_start(timestamps, {"data_range": [0, 95]}), 10)
+        self.assertIsNone(new_data_start(timestamps, {}))
+        self.assertIsNone(new_data_start(None, {"data_range": [0, 70]}))
+
+        with patch.object(model_training, "TRAIN_TIMESTEPS_PER_NEW_POINT", 64):
+            self.assertEqual(incremental_timesteps(3, 5000), 192)
+            self.assertEqual(incremental_timesteps(1000, 5000), 5000)
+
+    def test_early_stopping_after_patience(self):
+        """Training stops once the value loss fails to improve for `patience` rollouts."""
+        callback = TrainingMetricsCallback(patience=2, min_delta=0.01)
+        for value_loss in [10.0, 8.0, 7.99, 8.5]:
+            self.assertTrue(callback._on_step())
+            callback.value_loss.append(value_loss)
+            callback._check_improvement()
+        self.assertTrue(callback.stopped_early)
+        self.assertFalse(callback._on_step())
+
+        never = TrainingMetricsCallback()
+        never.value_loss.extend([1.0, 2.0, 3.0])
+        never._check_improvement()
+        self.assertFalse(never.stopped_early)
+
+    def test_incremental_budget_and_metadata(self):
+        """A warm start trains one rollout for a few new points and records them."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            model_path = os.path.join(tmp_dir, "agent.zip")
+            prices = np.linspace(100, 200, num=60)
+            env = BatchedCryptoTradingEnv(n_envs=2, data=prices)
+            env.timestamps = np.arange(60) * 3600_000.0
+            store = CheckpointStore(model_path)
+            store.save(PPO("MlpPolicy", env, n_steps=16, verbose=0), metadata={"data_range": [0, 54 * 3600_000]})
+
+            with patch.object(model_training, "MODEL_PATH", model_path), \
+                 patch.object(model_training, "TRAIN_N_STEPS", 64), \
+                 patch.object(model_training, "EARLY_STOP_PATIENCE", 0), \
+                 patch.object(model_training, "SHADOW_TRAINING", False), \
+                 patch.object(model_training, "make_training_env", return_value=env), \
+                 patch.object(model_training, "is_model_optimal", return_value=(False, 1.0, 1.0, 1.0)):
+                continue_training(n_envs=2, total_timesteps=5000, mode="incremental")
+
+            metadata = store.metadata()
+            self.assertEqual(metadata["version"], 2)
+            self.assertEqual(metadata["new_points"], 5)
+            self.assertEqual(metadata["mode"], "incremental")
+            self.assertEqual(metadata["timesteps"], 5 * 64)
+            self.assertEqual(env.recent_start, 55)
+
+    def test_incremental_without_new_data_trains_on_everything(self):
+        """With nothing newer than the checkpoint, episodes start anywhere for the full budget."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            model_path = os.path.join(tmp_dir, "agent.zip")
+            prices = np.linspace(100, 200, num=60)
+            env = BatchedCryptoTradingEnv(n_envs=2, data=prices)
+            env.timestamps = np.arange(60) * 3600_000.0
+            store = CheckpointStore(model_path)
+            store.save(PPO("MlpPolicy", env, n_steps=16, verbose=0), metadata={"data_range": [0, 59 * 3600_000]})
+
+            with patch.object(model_training, "MODEL_PATH", model_path), \
+                 patch.object(model_training, "TRAIN_N_STEPS", 64), \
+                 patch.object(model_training, "EARLY_STOP_PATIENCE", 0), \
+                 patch.object(model_training, "SHADOW_TRAINING", False), \
+                 patch.object(model_training, "make_training_env", return_value=env), \
+                 patch.object(model_training, "is_model_optimal", return_value=(False, 1.0, 1.0, 1.0)):
+                continue_training(n_envs=2, total_timesteps=128, mode="incremental")
+
+            metadata = store.metadata()
+            self.assertEqual(metadata["new_points"], 0)
+            self.assertEqual(metadata["mode"], "full")
+            self.assertEqual(metadata["timesteps"], 128)
+            self.assertIsNone(env.recent_start)
+
+
+class TestShadowTraining(unittest.TestCase):
+    """
+    Tests for champion/challenger retraining with gated promotion.
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.model_path = os.path.join(self.tmp_dir.name, "agent.zip")
+        self.prices = 30000 + np.cumsum(np.random.default_rng(0).normal(0, 100, 120))
+        self.timestamps = np.arange(120) * 3600_000.0
+        env = BatchedCryptoTradingEnv(n_envs=1, data=self.prices)
+        self.store = CheckpointStore(self.model_path)
+        self.store.save(PPO("MlpPolicy", env, n_steps=16, seed=0, verbose=0), metadata={"data_range": [0, 3600_000.0 * 60]})
+        with open(self.model_path, "rb") as f:
+            self.champion_bytes = f.read()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def retrain(self, scores, holdout=30):
+        with patch.object(model_training, "TRAIN_N_STEPS", 64), \
+             patch.object(model_training, "EARLY_STOP_PATIENCE", 0), \
+             patch.object(model_training, "PROMOTION_HOLDOUT", holdout), \
+             patch.object(model_training, "PROMOTION_MARGIN", 1.0), \
+             patch.object(model_training, "load_price_history", return_value=(self.timestamps, self.prices)), \
+             patch.object(model_training, "is_model_optimal", return_value=(False, 1.0, 1.0, 1.0)), \
+             patch.object(model_training, "score_models", return_value=np.array(scores)) as mock_score:
+            result = continue_training(n_envs=1, total_timesteps=64, mode="full", model_path=self.model_path, shadow=True)
+        return result, mock_score
+
+    def test_losing_challenger_is_stored_but_not_served(self):
+        """A challenger short of the margin is kept as a version; the champion file is untouched."""
+        result, mock_score = self.retrain([5.0, 15.0])  # Margin: 1% of 1000 = 10
+
+        self.assertFalse(result["promotion"]["promoted"])
+        self.assertEqual(result["data_range"], [0, int(self.timestamps[89])])  # Trained without the holdout
+        self.assertEqual(mock_score.call_args.args[2], 19)
+        np.testing.assert_array_equal(mock_score.call_args.args[1], self.prices)
+        self.assertEqual(self.store.current_version(), 1)
+        self.assertEqual(self.store.metadata(2)["promotion"]["champion_version"], 1)
+        with open(self.model_path, "rb") as f:
+            self.assertEqual(f.read(), self.champion_bytes)
+        self.assertFalse(os.path.exists(metrics_path(self.model_path)))
+
+    def test_winning_challenger_is_promoted(self):
+        result, _ = self.retrain([5.0, 15.5])
+
+        self.assertTrue(result["promotion"]["promoted"])
+        self.assertEqual(self.store.current_version(), 2)
+        self.assertIsNotNone(load_training_metrics(self.model_path))
+
+    def test_short_holdout_publishes_directly(self):
+        """A holdout with no room for an unseen rollout falls back to direct publishing."""
+        minimum = model_training.EVAL_STEPS + 2
+        for version, holdout in enumerate((0, minimum - 1), start=2):
+            with self.subTest(holdout=holdout), self.assertLogs(level="WARNING") as logs:
+                result, mock_score = self.retrain([5.0, 15.0], holdout=holdout)
+
+            mock_score.assert_not_called()
+            self.assertNotIn("promotion", result)
+            self.assertEqual(result["data_range"], [0, int(self.timestamps[-1])])  # Trained on everything
+            self.assertEqual(self.store.current_version(), version)
+            self.assertTrue(any("holdout cannot score" in line for line in logs.output))
+
+        _, mock_score = self.retrain([5.0, 15.0], holdout=minimum)
+        self.assertEqual(mock_score.call_args.args[2], 1)  # One rollout, from the first held-out point
+
+    def test_unreadable_champion_is_not_hidden(self):
+        """A missing champion lets the challenger win; a corrupt one raises and is logged."""
+        self.assertIsNone(model_training.load_champion(os.path.join(self.tmp_dir.name, "missing.zip")))
+
+        corrupt = os.path.join(self.tmp_dir.name, "corrupt.zip")
+        with open(corrupt, "wb") as f:
+            f.write(b"not a checkpoint")
+        with self.assertLogs(level="ERROR"), self.assertRaises(Exception):
+            model_training.load_champion(corrupt)
+
+    def test_score_models_in_one_pass(self):
+        """Every model trades the same held-out windows, marked to market at the end."""
+        class Constant:
+            def __init__(self, action):
+                self.action = action
+                self.batches = 0
+
+            def predict(self, obs, deterministic=False):
+                self.batches += 1
+                return np.full(len(obs), self.action), None
+
+        hold, buy = Constant(1), Constant(0)
+        scores = model_training.score_models([hold, buy], self.prices, rollouts=8, steps=5)
+        self.assertEqual(scores[0], 0.0)
+        self.assertEqual((hold.batches, buy.batches), (5, 5))
+        starts = np.arange(113, 105, -1)
+        expected = 1000.0 * (self.prices[starts + 5] / self.prices[starts] - 1)
+        self.assertAlmostEqual(scores[1], expected.mean(), places=6)
+
+        model = PPO("MlpPolicy", BatchedCryptoTradingEnv(n_envs=1, data=self.prices), n_steps=16, seed=1, verbose=0)
+        same = model_training.score_models([model, model], self.prices, rollouts=8, steps=5)
+        self.assertEqual(same[0], same[1])
+
+
+class TestMonteCarloEvaluation(unittest.TestCase):
+    """
+    Tests for the batched multi-rollout evaluation.
+    """
+
+    def test_recent_start_offsets(self):
+        """Rollouts start at the newest windows that fit, spaced by the stride."""
+        np.testing.assert_array_equal(recent_start_offsets(100, 4, 10, stride=2), [89, 87, 85, 83])
+        np.testing.assert_array_equal(recent_start_offsets(12, 3, 10), [1, 0, 0])
+
+    def test_reward_statistics(self):
+        stats = reward_statistics([1.0, 2.0, 3.0, 4.0, 5.0])
+        self.assertEqual(stats["mean"], 3.0)
+        self.assertEqual(stats["variance"], 2.5)
+        self.assertEqual(stats["quantiles"]["p50"], 3.0)
+        self.assertEqual(stats["rollouts"], 5)
+
+    def test_one_batched_predict_per_step(self):
+        """All rollouts of all series share a single forward pass per step."""
+        data = np.stack([np.linspace(100, 200, num=60), np.linspace(200, 100, num=60)])
+        env = BatchedCryptoTradingEnv(n_envs=2, data=data)
+        model = PPO("MlpPolicy", env, n_steps=16, batch_size=32, n_epochs=1, verbose=0)
+
+        with patch.object(model, "predict", wraps=model.predict) as mock_predict:
+            rewards = monte_carlo_rewards(model, data, rollouts=8, steps=5)
+
+        self.assertEqual(rewards.shape, (8, 2))
+        self.assertEqual(mock_predict.call_count, 5)
+        self.assertEqual(mock_predict.call_args[0][0].shape, (16, 10))
+
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
@@ -0,0 +1,82 @@
+import os
+import sys
+import subprocess
+import tempfile
+import unittest
+import numpy as np
+from unittest.mock import patch
+from stable_baselines3 import PPO
+from src import inference, model_training
+from src.model_registry import ModelRegistry
+from src.numpy_policy import NumpyPolicy, export_policy, policy_path
+from src.price_cache import PriceCache
+from src.vec_trading_env import BatchedCryptoTradingEnv
+
+
+class TestNumpyPolicy(unittest.TestCase):
+    """Parity of the NumPy inference runtime with PPO.predict."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.model_path = os.path.join(self.tmp_dir.name, "agent.zip")
+        env = BatchedCryptoTradingEnv(n_envs=2, data=np.linspace(100, 200, num=40), random_start=False)
+        self.model = PPO("MlpPolicy", env, n_steps=16, batch_size=32, n_epochs=1, verbose=0)
+        self.model.learn(total_timesteps=32)
+
+    def test_argmax_actions_match_ppo_predict(self):
+        """Deterministic actions agree with PPO on a batch and on a single observation."""
+        policy = NumpyPolicy.load(export_policy(self.model, policy_path(self.model_path)))
+        obs = np.random.default_rng(0).normal(150, 30, size=(512, 10)).astype(np.float32)
+
+        expected, _ = self.model.predict(obs, deterministic=True)
+        actions, _ = policy.predict(obs, deterministic=True)
+        np.testing.assert_array_equal(actions, expected)
+
+        single, _ = policy.predict(obs[0], deterministic=True)
+        self.assertEqual(np.shape(single), np.shape(self.model.predict(obs[0], deterministic=True)[0]))
+        self.assertEqual(single, expected[0])
+
+    def test_sampled_actions_follow_the_softmax(self):
+        """Stochastic actions are drawn with the policy's action probabilities."""
+        policy = NumpyPolicy.load(export_policy(self.model, policy_path(self.model_path)))
+        obs = np.full((20000, 10), 150, dtype=np.float32)
+
+        actions, _ = policy.predict(obs)
+        logits = policy.logits(obs[:1])[0]
+        probs = np.exp(logits - logits.max()) / np.exp(logits - logits.max()).sum()
+        np.testing.assert_allclose(np.bincount(actions, minlength=3) / len(actions), probs, atol=0.02)
+
+    def test_stale_export_falls_back_to_the_sb3_model(self):
+        """The export is served only while it matches the checkpoint file."""
+        self.model.save(self.model_path)
+        export_policy(self.model, policy_path(self.model_path), model_training.file_sha256(self.model_path))
+
+        with patch.object(inference, "policy_registry", ModelRegistry(loader=NumpyPolicy.load)), \
+             patch.object(inference, "model_registry", ModelRegistry()):
+            self.assertIsInstance(inference.inference_model(self.model_path), NumpyPolicy)
+
+            self.model.learn(total_timesteps=32)
+            self.model.save(self.model_path)
+            self.assertIsInstance(inference.inference_model(self.model_path), PPO)
+
+    def test_evaluation_without_torch(self):
+        """A process serving a current export evaluates every asset without importing torch."""
+        self.model.save(self.model_path)
+        export_policy(self.model, policy_path(self.model_path), model_training.file_sha256(self.model_path))
+        cache_dir = os.path.join(self.tmp_dir.name, "cache")
+        timestamps = 1_600_000_000_000 + np.arange(100) * 3600_000.0
+        PriceCache("bitcoin", cache_dir=cache_dir).append(np.column_stack([timestamps, np.linspace(100, 200, 100)]))
+
+        code = (
+            "import sys; from inference import evaluate_assets; "
+            "rewards = evaluate_assets(['bitcoin']); "
+            "print(sorted(rewards), 'torch' in sys.modules, 'stable_baselines3' in sys.modules)"
+        )
+        env = dict(os.environ, PYTHONPATH="src", MODEL_PATH=self.model_path, PRICE_CACHE_DIR=cache_dir,
+                   INFERENCE_BACKEND="numpy")
+        output = subprocess.check_output([sys.executable, "-c", code], env=env, text=True)
+        self.assertEqual(output.strip().splitlines()[-1], "['bitcoin'] False False")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,166 @@
+import os
+import time
+import tempfile
+import threading
+import unittest
+import numpy as np
+from unittest.mock import patch
+from src.price_cache import PriceCache, MS_PER_DAY
+from src import trading_env
+
+HOUR_MS = 3600 * 1000.0
+
+
+def hourly_rows(start, count, price=100.0):
+    """Builds `count` hourly (timestamp, price) rows starting at `start`."""
+    timestamps = start + np.arange(count) * HOUR_MS
+    return np.column_stack([timestamps, price + np.arange(count)])
+
+
+class TestPriceCache(unittest.TestCase):
+    """Unit tests for the disk-backed price cache."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = PriceCache("bitcoin", cache_dir=self.tmp_dir.name, ttl=60, history_days=7)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_empty_cache(self):
+        """An empty cache has no rows, no timestamp and is never fresh."""
+        self.assertIsNone(self.cache.load())
+        self.assertIsNone(self.cache.last_timestamp())
+        self.assertFalse(self.cache.is_fresh())
+
+    def test_append_only_newer_rows(self):
+        """Appending keeps existing rows and skips points that are already cached."""
+        self.cache.append(hourly_rows(0, 10))
+        rows = self.cache.append(hourly_rows(5 * HOUR_MS, 10))
+
+        self.assertEqual(len(rows), 15)
+        self.assertTrue(np.all(np.diff(rows[:, 0]) > 0), "Timestamps should be strictly increasing")
+        self.assertEqual(self.cache.last_timestamp(), int(14 * HOUR_MS))
+        self.assertTrue(self.cache.is_fresh())
+
+    def test_append_matches_cached_spacing(self):
+        """Finer-grained incremental points are thinned to the cached spacing."""
+        self.cache.append(hourly_rows(0, 10))
+        five_minutes = np.column_stack([9 * HOUR_MS + np.arange(1, 25) * 300000.0, np.ones(24)])
+        rows = self.cache.append(five_minutes)
+
+        self.assertEqual(len(rows), 12)
+        self.assertTrue(np.allclose(np.diff(rows[:, 0]), HOUR_MS))
+
+    def test_history_window_is_trimmed(self):
+        """Rows older than the history window are dropped."""
+        rows = self.cache.append(hourly_rows(0, 10 * 24))
+        self.assertLessEqual(rows[-1, 0] - rows[0, 0], 7 * MS_PER_DAY)
+
+    def test_concurrent_appends(self):
+        """Threads appending to one asset neither collide on temp files nor lose rows."""
+        errors = []
+
+        def append(thread):
+            try:
+                for i in range(25):
+                    PriceCache("bitcoin", cache_dir=self.tmp_dir.name, history_days=7).append(
+                        hourly_rows((thread * 25 + i) * HOUR_MS, 1))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=append, args=(thread,)) for thread in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(os.listdir(self.tmp_dir.name), ["bitcoin_usd.npy"])
+        self.assertGreater(len(self.cache.load()), 1)
+
+    def test_ttl_expiry(self):
+        """The cache goes stale once its file is older than the TTL."""
+        self.cache.append(hourly_rows(0, 3))
+        old = time.time() - 120
+        os.utime(self.cache.path, (old, old))
+        self.assertFalse(self.cache.is_fresh())
+
+
+class TestLoadPriceHistory(unittest.TestCase):
+    """Tests for the cache-backed price loading used by the environment."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        patcher = patch.object(trading_env, "PriceCache",
+                               lambda asset_id: PriceCache(asset_id, cache_dir=self.tmp_dir.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def test_fresh_cache_skips_fetch(self):
+        """A fresh cache is served without any HTTP call."""
+        PriceCache("bitcoin", cache_dir=self.tmp_dir.name).append(hourly_rows(0, 20))
+
+        with patch.object(trading_env, "fetch_market_chart") as mock_fetch:
+            timestamps, prices = trading_env.load_price_history()
+
+        mock_fetch.assert_not_called()
+        self.assertEqual(len(prices), 20)
+        self.assertEqual(timestamps[-1], 19 * HOUR_MS)
+
+    def test_stale_cache_fetches_incrementally(self):
+        """A stale cache only asks for points newer than its last timestamp."""
+        cache = PriceCache("bitcoin", cache_dir=self.tmp_dir.name)
+        cache.append(hourly_rows(0, 20))
+        old = time.time() - 3600
+        os.utime(cache.path, (old, old))
+
+        with patch.object(trading_env, "fetch_market_chart", return_value=hourly_rows(20 * HOUR_MS, 2)) as mock_fetch:
+            _, prices = trading_env.load_price_history()
+
+        mock_fetch.assert_called_once_with("bitcoin", since=int(19 * HOUR_MS))
+        self.assertEqual(len(prices), 22)
+
+    def test_nothing_new_refreshes_the_cache(self):
+        """When the API has no newer points, the cache is marked fresh without a rewrite."""
+        cache = PriceCache("bitcoin", cache_dir=self.tmp_dir.name)
+        cache.append(hourly_rows(0, 20))
+        old = time.time() - 3600
+        os.utime(cache.path, (old, old))
+
+        with patch.object(trading_env, "fetch_market_chart", return_value=hourly_rows(18 * HOUR_MS, 2)), \
+                patch.object(PriceCache, "append") as mock_append:
+            _, prices = trading_env.load_price_history()
+
+        mock_append.assert_not_called()
+        self.assertEqual(len(prices), 20)
+        self.assertTrue(cache.is_fresh())
+
+    def test_synthetic_fallback_without_cache(self):
+        """With no cache and no API, synthetic prices are returned."""
+        with patch.object(trading_env, "fetch_market_chart", return_value=None):
+            timestamps, prices = trading_env.load_price_history()
+
+        self.assertEqual(len(prices), 500)
+        self.assertEqual(len(timestamps), 500)
+
+    def test_histories_load_concurrently_in_order(self):
+        """Several assets are fetched at once and returned in the requested order."""
+        started = []
+        barrier = threading.Barrier(3, timeout=5)
+
+        def fetch(asset_id, since=None):
+            started.append(asset_id)
+            barrier.wait()  # Fails unless all three fetches are in flight together
+            return hourly_rows(0, 5, price={"bitcoin": 100.0, "ethereum": 10.0, "solana": 1.0}[asset_id])
+
+        with patch.object(trading_env, "fetch_market_chart", side_effect=fetch):
+            histories = trading_env.load_price_histories(["bitcoin", "ethereum", "solana"])
+
+        self.assertEqual(sorted(started), ["bitcoin", "ethereum", "solana"])
+        self.assertEqual(list(histories), ["bitcoin", "ethereum", "solana"])
+        self.assertEqual(histories["ethereum"][1][0], 10.0)
+
+if __name__ == '__main__':
+    unittest.main()
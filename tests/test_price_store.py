@@ -0,0 +1,136 @@
+import unittest
+import os
+import sys
+import subprocess
+import tempfile
+import numpy as np
+from unittest.mock import patch
+from src import trading_env
+from src.price_store import PriceStore, import_csv
+
+
+def minute_prices(count, seed=0):
+    rng = np.random.default_rng(seed)
+    timestamps = 1_600_000_000_000 + np.arange(count) * 60_000.0
+    return timestamps, 30000 * np.exp(np.cumsum(rng.normal(0, 0.001, count)))
+
+
+class TestPriceStore(unittest.TestCase):
+    """Tests for the columnar memory-mapped price store."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = self.tmp_dir.name
+        self.timestamps, self.prices = minute_prices(5000)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_append_and_range_lookup(self):
+        """Time ranges resolve to row ranges, read as views of the mapped columns."""
+        store = PriceStore("bitcoin", root=self.root)
+        self.assertEqual(store.append(self.timestamps[:3000], close=self.prices[:3000], volume=1.0), 3000)
+        self.assertEqual(store.append(self.timestamps[2000:], close=self.prices[2000:]), 2000)  # Overlap skipped
+
+        start, stop = store.row_range(self.timestamps[100], self.timestamps[200])
+        self.assertEqual((start, stop), (100, 200))
+        self.assertEqual(store.row_range(self.timestamps[100] + 1, None), (101, 5000))
+
+        data = store.read(self.timestamps[100], self.timestamps[200], columns=("close", "volume", "open"))
+        self.assertIsInstance(data["close"], np.memmap)
+        np.testing.assert_array_equal(data["close"], self.prices[100:200])
+        np.testing.assert_array_equal(data["volume"], 1.0)
+        self.assertTrue(np.isnan(data["open"]).all())
+
+        with self.assertRaises(ValueError):
+            store.append(self.timestamps[::-1] + 1e9, close=self.prices)
+
+    def test_readers_see_only_committed_rows(self):
+        """A reader maps the committed rows, and sees later appends after refresh."""
+        writer = PriceStore("bitcoin", root=self.root)
+        writer.append(self.timestamps[:1000], price=self.prices[:1000])
+        reader = PriceStore("bitcoin", root=self.root)
+
+        # An append that died before committing leaves extra bytes behind
+        with open(os.path.join(writer.path, "close.f8"), "ab") as f:
+            f.write(b"\0" * 80)
+        self.assertEqual(PriceStore("bitcoin", root=self.root).refresh(), 1000)
+
+        writer.append(self.timestamps[1000:], price=self.prices[1000:])
+        self.assertEqual(len(reader), 1000)
+        self.assertEqual(reader.refresh(), 5000)
+        np.testing.assert_array_equal(reader.column("close"), self.prices)
+        np.testing.assert_array_equal(reader.column("high"), self.prices)
+
+    def test_processes_share_the_mapped_file(self):
+        """Another process reads the same rows straight from the store files."""
+        PriceStore("bitcoin", root=self.root).append(self.timestamps, close=self.prices)
+        code = (
+            "import sys; sys.path.insert(0, 'src'); from price_store import PriceStore; "
+            f"store = PriceStore('bitcoin', root={self.root!r}); "
+            "print(float(store.column('close', 4000, 4100).sum()))"
+        )
+        output = subprocess.check_output([sys.executable, "-c", code], text=True)
+        self.assertAlmostEqual(float(output.strip().splitlines()[-1]), self.prices[4000:4100].sum(), places=4)
+
+    def test_import_csv(self):
+        """CSV rows stream in by batch, with timestamps in seconds converted to ms."""
+        path = os.path.join(self.root, "btc.csv")
+        with open(path, "w") as f:
+            f.write("Timestamp,Open,High,Low,Close,Volume\n")
+            for ts, price in zip(self.timestamps[:250], self.prices[:250]):
+                f.write(f"{ts / 1000:.0f},{price},{price + 1},{price - 1},{price},2.5\n")
+
+        store = PriceStore("bitcoin", root=self.root)
+        self.assertEqual(import_csv(store, path, batch_rows=100), 250)
+        self.assertEqual(import_csv(store, path, batch_rows=100), 0)
+        np.testing.assert_array_equal(store.column("timestamp"), self.timestamps[:250])
+        np.testing.assert_allclose(store.column("high"), self.prices[:250] + 1)
+
+
+class TestStoreBackedEnv(unittest.TestCase):
+    """Tests for envs that read episodes lazily from the price store."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.timestamps, self.prices = minute_prices(3000, seed=1)
+        PriceStore("bitcoin", root=self.tmp_dir.name).append(self.timestamps, close=self.prices)
+        self.patcher = patch.object(trading_env, "PriceStore", lambda asset_id: PriceStore(asset_id, root=self.tmp_dir.name))
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        self.tmp_dir.cleanup()
+
+    def test_episodes_match_the_full_series(self):
+        """Episodes walk the time range in order with the observations of the full series."""
+        env = trading_env.CryptoTradingEnv(time_range=(self.timestamps[1000], self.timestamps[2000]), episode_length=300)
+        np.testing.assert_array_equal(env.get_crypto_data(), self.prices[1000:2000])
+        windows = trading_env.build_observation_windows(self.prices)
+
+        row = 1000
+        for _ in range(4):
+            obs = env.reset()
+            np.testing.assert_array_equal(obs, windows[row])
+            done = False
+            while not done:
+                obs, _, done, _ = env.step(1)
+                row += 1
+                np.testing.assert_array_equal(obs, windows[row])
+        self.assertEqual(row, 1999)  # The last episode ends with the range
+        env.reset()
+        self.assertEqual(env._episode_start, 1000)
+
+    def test_random_episodes_stay_in_range(self):
+        env = trading_env.CryptoTradingEnv(time_range=(self.timestamps[500], None), episode_length=50, random_start=True)
+        for _ in range(20):
+            env.reset()
+            self.assertTrue(500 <= env._episode_start < 2999)
+            self.assertLessEqual(env._episode_start + env._last_step, 2999)
+
+        with self.assertRaises(ValueError):
+            trading_env.CryptoTradingEnv(time_range=(0, self.timestamps[0]))
+
+
+if __name__ == '__main__':
+    unittest.main()
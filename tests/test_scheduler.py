@@ -0,0 +1,67 @@
+import time
+import asyncio
+import unittest
+from src.scheduler import Scheduler
+
+
+class TestScheduler(unittest.TestCase):
+    """Unit tests for the fixed-rate asyncio scheduler."""
+
+    def run_for(self, scheduler, seconds):
+        async def scenario():
+            asyncio.get_running_loop().call_later(seconds, scheduler.stop)
+            await scheduler.run(install_signal_handlers=False)
+        asyncio.run(scenario())
+
+    def test_fixed_rate_does_not_drift(self):
+        """Runs start on the interval grid even when each run takes time."""
+        starts = []
+
+        def work():
+            starts.append(time.monotonic())
+            time.sleep(0.03)
+
+        scheduler = Scheduler()
+        scheduler.add_job("work", 0.1, work)
+        self.run_for(scheduler, 0.55)
+
+        self.assertEqual(len(starts), 6)
+        offsets = [start - starts[0] for start in starts]
+        for tick, offset in enumerate(offsets):
+            self.assertAlmostEqual(offset, tick * 0.1, delta=0.03)
+
+    def test_slow_job_does_not_delay_others(self):
+        """A long-running job leaves other jobs on schedule."""
+        scheduler = Scheduler()
+        fast = scheduler.add_job("fast", 0.05, lambda: None)
+        slow = scheduler.add_job("slow", 1.0, lambda: time.sleep(0.4))
+        self.run_for(scheduler, 0.3)
+
+        self.assertGreaterEqual(fast.metrics.runs, 5)
+        self.assertEqual(slow.metrics.runs, 0)  # Still running when stopped
+
+    def test_overruns_skip_ticks(self):
+        """Ticks missed by an overrunning job are skipped and counted."""
+        scheduler = Scheduler()
+        job = scheduler.add_job("overrun", 0.05, lambda: time.sleep(0.12))
+        self.run_for(scheduler, 0.3)
+
+        self.assertGreaterEqual(job.metrics.skipped_ticks, 2)
+        self.assertGreaterEqual(job.metrics.max_duration, 0.12)
+
+    def test_failures_are_counted_and_job_keeps_running(self):
+        """An exception is recorded without stopping the job."""
+        async def failing():
+            raise RuntimeError("boom")
+
+        scheduler = Scheduler()
+        job = scheduler.add_job("failing", 0.05, failing)
+        with self.assertLogs(level="ERROR"):
+            self.run_for(scheduler, 0.22)
+
+        self.assertGreaterEqual(job.metrics.runs, 4)
+        self.assertEqual(job.metrics.failures, job.metrics.runs)
+        self.assertIn("failing", scheduler.metrics())
+
+if __name__ == '__main__':
+    unittest.main()
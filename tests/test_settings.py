@@ -0,0 +1,67 @@
+import os
+import sys
+import json
+import pickle
+import subprocess
+import unittest
+from src.lazy_imports import LazyFunction
+from src.settings import Settings
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+
+class TestSettings(unittest.TestCase):
+    """Unit tests for the typed settings parsed from the environment."""
+
+    def test_values_are_parsed_by_type(self):
+        settings = Settings.from_env({
+            "CHECK_INTERVAL": "60",
+            "TRADE_ALERT_THRESHOLD": "1.5",
+            "TELEGRAM_ENABLE": "1",
+            "ASSET_IDS": "bitcoin, ethereum,,solana",
+            "MODEL_PATH": "agent.zip",
+        })
+        self.assertEqual(settings.check_interval, 60)
+        self.assertEqual(settings.trade_alert_threshold, 1.5)
+        self.assertIs(settings.telegram_enable, True)
+        self.assertEqual(settings.asset_ids, ("bitcoin", "ethereum", "solana"))
+        self.assertEqual(settings.model_path, "agent.zip")
+
+    def test_defaults(self):
+        settings = Settings.from_env({})
+        self.assertEqual(settings.asset_ids, ("bitcoin",))
+        self.assertIs(settings.telegram_enable, False)
+        self.assertEqual(settings.metrics_port, 9108)
+        self.assertIsNone(settings.model_path)
+
+    def test_invalid_and_missing_values_name_the_variable(self):
+        with self.assertRaisesRegex(ValueError, "CHECK_INTERVAL"):
+            Settings.from_env({"CHECK_INTERVAL": "often"})
+        with self.assertRaisesRegex(ValueError, "TELEGRAM_ENABLE"):
+            Settings.from_env({"TELEGRAM_ENABLE": "maybe"})
+        with self.assertRaisesRegex(ValueError, "MODEL_PATH, CHECK_INTERVAL"):
+            Settings.from_env({}).require("model_path", "check_interval", "initial_balance")
+
+
+class TestLazyImports(unittest.TestCase):
+    """Tests for deferred imports of the heavy dependencies."""
+
+    def test_lazy_function_calls_through_and_pickles(self):
+        dumps = LazyFunction("json", "dumps")
+        self.assertEqual(dumps({"a": 1}), json.dumps({"a": 1}))
+
+        restored = pickle.loads(pickle.dumps(dumps))
+        self.assertEqual(restored([1, 2]), "[1, 2]")
+
+    def test_bot_modules_do_not_import_torch(self):
+        """Importing main and the bot leaves torch and stable-baselines3 unloaded."""
+        code = (
+            "import sys, main, telegram_bot; "
+            "print([name for name in ('torch', 'stable_baselines3', 'gym') if name in sys.modules])"
+        )
+        env = dict(os.environ, PYTHONPATH=SRC_DIR)
+        output = subprocess.check_output([sys.executable, "-c", code], env=env, text=True, timeout=120)
+        self.assertEqual(output.strip().splitlines()[-1], "[]")
+
+if __name__ == '__main__':
+    unittest.main()
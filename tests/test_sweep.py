@@ -0,0 +1,103 @@
+import unittest
+import os
+import tempfile
+import numpy as np
+from types import SimpleNamespace
+from src.sweep import SweepStore, MedianPruner, grid_configs, random_configs, run_trial
+
+
+class TestSweepConfigs(unittest.TestCase):
+    """Tests for grid and random search configurations."""
+
+    def test_grid_configs(self):
+        """The grid holds every combination, in a stable order."""
+        configs = grid_configs({"n_steps": [512, 1024], "learning_rate": [1e-4, 3e-4, 1e-3]})
+        self.assertEqual(len(configs), 6)
+        self.assertEqual(configs[0], {"learning_rate": 1e-4, "n_steps": 512})
+        with self.assertRaises(ValueError):
+            grid_configs({"learning_rate": {"low": 1e-5, "high": 1e-3}})
+
+    def test_random_configs_are_seeded(self):
+        """The same seed samples the same trials, within the given ranges."""
+        space = {"learning_rate": {"low": 1e-5, "high": 1e-2, "log": True}, "batch_size": [32, 64]}
+        configs = random_configs(space, 20, seed=3)
+        self.assertEqual(configs, random_configs(space, 20, seed=3))
+        self.assertNotEqual(configs, random_configs(space, 20, seed=4))
+        for config in configs:
+            self.assertTrue(1e-5 <= config["learning_rate"] <= 1e-2)
+            self.assertIn(config["batch_size"], (32, 64))
+
+
+class TestSweepStore(unittest.TestCase):
+    """Tests for the SQLite results store and the median pruner."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "results.sqlite")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_resume_skips_finished_trials(self):
+        """Reopening a sweep leaves only its unfinished trials to run."""
+        configs = [{"learning_rate": lr} for lr in (1e-4, 3e-4, 1e-3)]
+        store = SweepStore(self.path)
+        store.add_trials(configs)
+        store.start(0)
+        store.finish(0, "complete", 2.5, {"timesteps": 100}, "trial-0000/model.zip")
+        store.start(1)  # Interrupted while running
+
+        resumed = SweepStore(self.path)
+        resumed.add_trials(configs)
+        self.assertEqual([trial_id for trial_id, _ in resumed.unfinished()], [1, 2])
+        best = resumed.trials()[0]
+        self.assertEqual((best["trial_id"], best["score"], best["checkpoint"]), (0, 2.5, "trial-0000/model.zip"))
+
+        with self.assertRaises(ValueError):
+            resumed.add_trials([{"learning_rate": 1.0}])
+
+    def test_median_pruner(self):
+        """A trial is pruned once its value loss is above the median of its peers."""
+        store = SweepStore(self.path)
+        store.add_trials([{}] * 4)
+        for trial_id, value_loss in enumerate((1.0, 2.0, 3.0)):
+            store.report(trial_id, 2, 0.0, value_loss, 0.0)
+
+        def callback(*value_losses):
+            return SimpleNamespace(policy_loss=[0.0] * len(value_losses), value_loss=list(value_losses),
+                                   entropy_loss=[0.0] * len(value_losses))
+
+        pruner = MedianPruner(store, 3)
+        self.assertTrue(pruner(callback(9.0)))  # Warm-up rollout
+        self.assertTrue(pruner(callback(9.0, 1.5)))
+        self.assertFalse(pruner(callback(9.0, 2.5)))
+        self.assertTrue(pruner.pruned)
+        self.assertEqual(store.value_losses(2, exclude=0), [2.0, 3.0, 2.5])
+
+
+class TestRunTrial(unittest.TestCase):
+    """Tests for training and scoring a single trial."""
+
+    def test_run_trial_records_score_and_checkpoint(self):
+        """A trial trains its own model and stores its holdout score and checkpoint."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "results.sqlite")
+            params = {"n_steps": 64, "batch_size": 32, "policy_loss_threshold": 1.0,
+                      "value_loss_threshold": 1e12, "entropy_loss_threshold": 0.0}
+            SweepStore(path).add_trials([params])
+            prices = np.linspace(100, 200, num=80)
+            timestamps = np.arange(80) * 3600_000.0
+
+            trial_id, status, score = run_trial(path, 0, params, prices, timestamps, 128, 20,
+                                                os.path.join(tmp_dir, "trial-0000"), pruning=False)
+
+            trial = SweepStore(path).trials()[0]
+            self.assertEqual((trial_id, status), (0, "complete"))
+            self.assertEqual(trial["score"], score)
+            self.assertTrue(os.path.exists(trial["checkpoint"]))
+            self.assertEqual(trial["metrics"]["reward"]["rollouts"], 10)
+            self.assertIn("healthy", trial["metrics"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,6 @@
+import asyncio
 import unittest
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 from src.telegram_bot import TelegramBot
 
 class TestTelegramBot(unittest.TestCase):
@@ -12,18 +13,18 @@ class TestTelegramBot(unittest.TestCase):
         """Initialize the bot with test token and chat_id."""
         self.bot = TelegramBot("TEST_TOKEN", "TEST_CHAT_ID")
 
-    @patch("src.telegram_bot.TelegramBot.send_message_async", new_callable=AsyncMock)
-    def test_send_message(self, mock_send_message):
-        """Ensure the bot sends messages correctly."""
+    @patch("src.telegram_bot.TelegramSender.enqueue")
+    def test_send_message(self, mock_enqueue):
+        """Ensure the bot queues messages for the background sender."""
         message = "Test message"
         self.bot.send_message(message)
-        mock_send_message.assert_called_once_with(message)
+        mock_enqueue.assert_called_once_with(message)
 
-    @patch("src.telegram_bot.evaluate_model", return_value=5.0)
+    @patch("src.telegram_bot.opportunity_evaluator.evaluate_async", new_callable=AsyncMock, return_value={"bitcoin": 5.0})
     async def test_check_command(self, mock_evaluate, mock_update, mock_context):
         """Ensure the /check command works correctly."""
         await self.bot.check(mock_update, mock_context)
-        mock_update.message.reply_text.assert_called_with("📊 **Trading Evaluation**\n✅ Estimated Profit: **$5.00**", parse_mode="Markdown")
+        mock_update.message.reply_text.assert_called_with("📊 **Trading Evaluation**\n✅ bitcoin: Estimated Profit **$5.00**", parse_mode="Markdown")
 
     @patch("src.telegram_bot.continue_training")
     async def test_retrain_command(self, mock_retrain, mock_update, mock_context):
@@ -31,5 +32,22 @@ class TestTelegramBot(unittest.TestCase):
         await self.bot.retrain(mock_update, mock_context)
         mock_update.message.reply_text.assert_called_with("✅ Model retrained successfully!", parse_mode="Markdown")
 
+    @patch("src.telegram_bot.continue_training")
+    def test_retrain_goes_through_the_shared_retrainer(self, mock_retrain):
+        """With a retrainer attached, /retrain uses it and never overlaps a running retraining."""
+        update = MagicMock()
+        update.message.reply_text = AsyncMock()
+        self.bot.retrainer = MagicMock(running=False, run=AsyncMock(return_value="✅ **Retraining finished** in 3s"))
+
+        asyncio.run(self.bot.retrain(update, None))
+        self.bot.retrainer.run.assert_awaited_once_with(notify=False)
+        update.message.reply_text.assert_called_with("✅ **Retraining finished** in 3s", parse_mode="Markdown")
+
+        self.bot.retrainer.running = True
+        asyncio.run(self.bot.retrain(update, None))
+        self.bot.retrainer.run.assert_awaited_once()
+        update.message.reply_text.assert_called_with("⏳ Retraining already in progress.", parse_mode="Markdown")
+        mock_retrain.assert_not_called()
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,126 @@
+import json
+import time
+import asyncio
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src.telegram_sender import TelegramSender, MAX_MESSAGE_LENGTH
+
+
+class StubTelegramHandler(BaseHTTPRequestHandler):
+    """Records sendMessage calls and replays the server's scripted statuses."""
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        server = self.server
+        with server.lock:
+            server.requests.append((time.monotonic(), self.path, json.loads(body)))
+            server.client_ports.add(self.client_address[1])
+            status = server.statuses.pop(0) if server.statuses else 200
+        if status == 429:
+            response = {"ok": False, "error_code": 429, "parameters": {"retry_after": 0.1}}
+        else:
+            response = {"ok": status == 200}
+        payload = json.dumps(response).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestTelegramSender(unittest.TestCase):
+    """Tests for the queued Telegram sender against a local stub server."""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubTelegramHandler)
+        self.server.lock = threading.Lock()
+        self.server.requests = []
+        self.server.client_ports = set()
+        self.server.statuses = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        api_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.sender = TelegramSender("TOKEN", "CHAT", api_url=api_url, coalesce_seconds=0.2, min_interval=0.3)
+
+    def tearDown(self):
+        self.sender.stop()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def texts(self):
+        return [payload["text"] for _, _, payload in self.server.requests]
+
+    def test_burst_is_coalesced(self):
+        """Messages queued within the coalesce window are sent as one."""
+        for i in range(3):
+            self.sender.enqueue(f"alert {i}")
+        self.sender.flush(timeout=5)
+
+        self.assertEqual(self.texts(), ["alert 0\n\nalert 1\n\nalert 2"])
+        _, path, payload = self.server.requests[0]
+        self.assertEqual(path, "/botTOKEN/sendMessage")
+        self.assertEqual(payload["chat_id"], "CHAT")
+
+    def test_rate_limit_and_connection_reuse(self):
+        """Consecutive sends respect the per-chat interval over one connection."""
+        self.sender.enqueue("first")
+        self.sender.flush(timeout=5)
+        self.sender.enqueue("second")
+        self.sender.flush(timeout=5)
+
+        self.assertEqual(self.texts(), ["first", "second"])
+        first_at, second_at = (at for at, _, _ in self.server.requests)
+        self.assertGreaterEqual(second_at - first_at, 0.25)
+        self.assertEqual(len(self.server.client_ports), 1)
+
+    def test_retries_after_429(self):
+        """A 429 is retried after Telegram's retry_after."""
+        self.server.statuses = [429]
+        self.sender.enqueue("retry me")
+        self.sender.flush(timeout=5)
+
+        self.assertEqual(self.texts(), ["retry me", "retry me"])
+        self.assertEqual(self.sender.sent_count, 1)
+        self.assertEqual(self.sender.failed_count, 0)
+
+    def test_client_error_is_not_retried(self):
+        """A 400 is logged and dropped without retrying."""
+        self.server.statuses = [400]
+        self.sender.enqueue("bad")
+        self.sender.flush(timeout=5)
+
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(self.sender.failed_count, 1)
+
+    def test_enqueue_does_not_block(self):
+        """Queueing returns immediately even while the sender waits on the rate limit."""
+        start = time.monotonic()
+        for i in range(20):
+            self.sender.enqueue(f"alert {i}")
+        self.assertLess(time.monotonic() - start, 0.1)
+
+    def test_shutdown_before_worker_starts(self):
+        """Shutting down before the worker's first step cancels it cleanly."""
+        loop = asyncio.new_event_loop()
+        sender = TelegramSender("TOKEN", "CHAT", api_url="http://127.0.0.1:1")
+        try:
+            sender.start(loop)
+            loop.run_until_complete(sender._shutdown())
+            loop.run_until_complete(asyncio.sleep(0))
+        finally:
+            loop.close()
+
+        self.assertTrue(sender._worker.cancelled())
+
+    def test_coalesce_respects_length_limit(self):
+        """Coalesced texts never exceed Telegram's message length."""
+        texts = TelegramSender.coalesce(["a" * 3000, "b" * 3000, "c"])
+        self.assertEqual(len(texts), 2)
+        self.assertTrue(all(len(text) <= MAX_MESSAGE_LENGTH for text in texts))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,10 @@
 import unittest
 import numpy as np
-from src.trading_env import CryptoTradingEnv
+from unittest.mock import patch
+from benchmarks.stubs import CoinGeckoStub
+from src import trading_env
+from src.market_data import MarketDataClient
+from src.trading_env import CryptoTradingEnv, build_observation_windows
 
 class TestCryptoTradingEnv(unittest.TestCase):
     """Unit tests for the custom trading environment."""
@@ -39,5 +43,53 @@ class TestCryptoTradingEnv(unittest.TestCase):
         self.assertLessEqual(self.env.balance, 1000, "Balance should decrease after buying")
         self.assertGreaterEqual(self.env.crypto_held, 0, "Crypto holdings should increase after buying")
 
+    def test_observation_matches_price_history(self):
+        """Observations hold the latest prices, newest first."""
+        self.env.reset()
+        for _ in range(12):
+            obs, _, _, _ = self.env.step(1)
+        step = self.env.current_step
+        expected = np.asarray(self.env.data[step - 9:step + 1][::-1], dtype=np.float32)
+        np.testing.assert_array_equal(obs, expected)
+
+    def test_reset_does_not_wrap_around(self):
+        """The first observation is padded with the first price, not the series tail."""
+        obs = self.env.reset()
+        np.testing.assert_array_equal(obs, np.full(10, self.env.data[0], dtype=np.float32))
+
+    def test_observation_windows(self):
+        """The precomputed window matrix is a read-only float32 view."""
+        windows = build_observation_windows(np.arange(1, 6, dtype=np.float64), window=3)
+        self.assertEqual(windows.dtype, np.float32)
+        self.assertFalse(windows.flags.writeable)
+        np.testing.assert_array_equal(windows, [[1, 1, 1], [2, 1, 1], [3, 2, 1], [4, 3, 2], [5, 4, 3]])
+
+
+class TestFetchMarketChart(unittest.TestCase):
+    """Tests for the CoinGecko client against the offline stub."""
+
+    def setUp(self):
+        self.stub = CoinGeckoStub().start()
+        self.addCleanup(self.stub.stop)
+        client = MarketDataClient(self.stub.url)
+        self.addCleanup(client.close)
+        patcher = patch.object(trading_env, "get_client", return_value=client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_full_and_incremental_fetch(self):
+        """The full history is returned once; `since` only asks for newer points."""
+        rows = trading_env.fetch_market_chart("bitcoin")
+        self.assertEqual(rows.shape, (169, 2))
+        self.assertTrue(np.all(np.diff(rows[:, 0]) > 0))
+
+        newer = trading_env.fetch_market_chart("bitcoin", since=rows[-3, 0])
+        np.testing.assert_array_equal(newer, rows[-2:])
+        self.assertIn("/market_chart/range?", self.stub.requests[-1][1])
+
+    def test_unknown_asset_returns_none(self):
+        """A failed request yields None so callers can fall back."""
+        self.assertIsNone(trading_env.fetch_market_chart("not-a-coin"))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
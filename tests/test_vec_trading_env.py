@@ -0,0 +1,174 @@
+import unittest
+import numpy as np
+from unittest.mock import patch
+from stable_baselines3 import PPO
+from src.trading_env import CryptoTradingEnv
+from multiprocessing import shared_memory
+from src.vec_trading_env import BatchedCryptoTradingEnv, LockstepTradingEnv, SharedPriceEnvFactory, SharedPriceSubprocVecEnv
+
+
+class TestBatchedCryptoTradingEnv(unittest.TestCase):
+    """Unit tests for the vectorized trading environment."""
+
+    def setUp(self):
+        """Builds a small deterministic price series."""
+        self.prices = np.linspace(100, 200, num=30)
+
+    def test_matches_single_env(self):
+        """Every batched environment follows the same path as CryptoTradingEnv."""
+        batched = BatchedCryptoTradingEnv(n_envs=4, data=self.prices, random_start=False)
+
+        single_env = CryptoTradingEnv(data=self.prices)
+
+        obs = batched.reset()
+        single_obs = single_env.reset()
+        np.testing.assert_array_equal(obs, np.tile(single_obs, (4, 1)))
+
+        actions = [0, 1, 1, 2, 1, 0, 2, 1]
+        for action in actions:
+            single_obs, single_reward, _, _ = single_env.step(action)
+            obs, rewards, dones, _ = batched.step(np.full(4, action))
+            np.testing.assert_array_equal(obs[0], single_obs)
+            np.testing.assert_allclose(rewards, single_reward, rtol=1e-6)
+            self.assertFalse(dones.any())
+
+        np.testing.assert_allclose(batched.balance, single_env.balance)
+
+    def test_auto_reset_sets_terminal_observation(self):
+        """Finished environments are reset and report their final observation."""
+        env = BatchedCryptoTradingEnv(n_envs=2, data=self.prices, random_start=False)
+        env.reset()
+        for _ in range(len(self.prices) - 2):
+            _, _, dones, infos = env.step(np.ones(2))
+        self.assertFalse(dones.any())
+
+        obs, _, dones, infos = env.step(np.ones(2))
+        self.assertTrue(dones.all())
+        np.testing.assert_array_equal(infos[0]["terminal_observation"][0], np.float32(self.prices[-1]))
+        np.testing.assert_array_equal(obs[0], np.full(10, self.prices[0], dtype=np.float32))
+        np.testing.assert_array_equal(env.current_step, [0, 0])
+
+    def test_random_start_offsets(self):
+        """Random starts stay inside the series and are reproducible with a seed."""
+        env = BatchedCryptoTradingEnv(n_envs=64, data=self.prices, seed=7)
+        env.reset()
+        starts = env.current_step.copy()
+        self.assertTrue(np.all((starts >= 0) & (starts < len(self.prices) - 1)))
+        self.assertGreater(len(np.unique(starts)), 1)
+
+        env.seed(7)
+        env.reset()
+        np.testing.assert_array_equal(env.current_step, starts)
+
+    def test_focus_on_recent_starts(self):
+        """Random starts land in the recent data except for the replay fraction."""
+        env = BatchedCryptoTradingEnv(n_envs=4000, data=self.prices, seed=3)
+        env.focus_on_recent(20, replay_fraction=0.25)
+        env.reset()
+        starts = env.current_step
+
+        self.assertTrue(np.all(starts < len(self.prices) - 1))
+        self.assertAlmostEqual(np.mean(starts < 20), 0.25, delta=0.03)
+        self.assertEqual(set(np.unique(starts[starts >= 20])), set(range(20, 29)))
+
+    def test_each_env_trades_its_own_series(self):
+        """With a price matrix, env i follows series i % n_series like a single env on that series."""
+        series = np.stack([self.prices, self.prices * 3, self.prices[::-1]])
+        batched = BatchedCryptoTradingEnv(n_envs=4, data=series, random_start=False)
+        singles = [CryptoTradingEnv(data=series[i % 3]) for i in range(4)]
+
+        obs = batched.reset()
+        np.testing.assert_array_equal(obs, [env.reset() for env in singles])
+
+        for action in [0, 1, 2, 0, 1, 2]:
+            obs, rewards, _, _ = batched.step(np.full(4, action))
+            results = [env.step(action) for env in singles]
+            np.testing.assert_array_equal(obs, [result[0] for result in results])
+            np.testing.assert_allclose(rewards, [result[1] for result in results], rtol=1e-6)
+
+    def test_asset_ids_build_one_env_per_asset(self):
+        """Asset histories are loaded together and aligned on their most recent points."""
+        histories = {
+            "bitcoin": (np.arange(30.0), self.prices),
+            "ethereum": (np.arange(5.0, 30.0), self.prices[5:] / 10),
+        }
+        with patch(f"{LockstepTradingEnv.__module__}.load_price_histories", return_value=histories) as mock_load:
+            env = BatchedCryptoTradingEnv(asset_ids=["bitcoin", "ethereum"], random_start=False)
+
+        mock_load.assert_called_once_with(["bitcoin", "ethereum"])
+        self.assertEqual(env.num_envs, 2)
+        self.assertEqual(env.data.shape, (2, 25))
+        obs = env.reset()
+        np.testing.assert_allclose(obs[:, 0], [self.prices[5], self.prices[5] / 10], rtol=1e-6)
+
+    def test_env_method_answers_per_env(self):
+        """Per-env method calls are answered from the batched state of the selected envs."""
+        series = np.stack([self.prices, self.prices * 3])
+        env = BatchedCryptoTradingEnv(n_envs=3, data=series, random_start=False)
+        env.reset()
+        env.step(np.array([0, 0, 0]))
+
+        obs = env.env_method("reset", indices=[1])
+        np.testing.assert_array_equal(obs[0], np.full(10, self.prices[0] * 3, dtype=np.float32))
+        np.testing.assert_array_equal(env.current_step, [1, 0, 1])
+        self.assertEqual(env.env_method("get_wrapper_attr", "balance"), [0.0, 1000.0, 0.0])
+
+        data = env.env_method("get_crypto_data", indices=[1, 2])
+        np.testing.assert_array_equal(data[0], self.prices * 3)
+        np.testing.assert_array_equal(data[1], self.prices)
+        with self.assertRaises(AttributeError):
+            env.env_method("render")
+
+    def test_ppo_learns_on_batched_env(self):
+        """PPO can collect rollouts from the batched env directly."""
+        env = BatchedCryptoTradingEnv(n_envs=4, data=self.prices)
+        model = PPO("MlpPolicy", env, n_steps=8, batch_size=16, n_epochs=1, verbose=0)
+        model.learn(total_timesteps=32)
+        self.assertGreaterEqual(model.num_timesteps, 32)
+
+
+class TestSharedPriceSubprocVecEnv(unittest.TestCase):
+    """Tests for the subprocess env whose workers share the price series."""
+
+    def test_workers_read_shared_prices(self):
+        """Workers step over the shared series and the block is released on close."""
+        prices = np.linspace(100, 200, num=30)
+        env = SharedPriceSubprocVecEnv(2, data=prices)
+        shm_name = env.shared_memory.name
+        try:
+            obs = env.reset()
+            self.assertEqual(obs.shape, (2, 10))
+            self.assertTrue(np.all((obs >= 100) & (obs <= 200)))
+            obs, rewards, dones, _ = env.step(np.array([0, 2]))
+            self.assertEqual(rewards.shape, (2,))
+        finally:
+            env.close()
+
+        with self.assertRaises(FileNotFoundError):
+            shared_memory.SharedMemory(name=shm_name)
+
+    def test_worker_env_reads_the_shared_buffer(self):
+        """A worker's env indexes the shared block in place and observes what a copying env does."""
+        prices = np.linspace(100, 200, num=30)
+        shm = shared_memory.SharedMemory(create=True, size=prices.nbytes)
+        self.addCleanup(shm.unlink)
+        self.addCleanup(shm.close)
+        np.ndarray(prices.shape, dtype=np.float64, buffer=shm.buf)[:] = prices
+
+        env = SharedPriceEnvFactory(shm.name, len(prices))()
+        self.addCleanup(env.shared_memory.close)
+        self.assertIs(env.get_crypto_data().base, env.shared_memory._mmap)
+        self.assertIsNone(env.windows)
+
+        reference = CryptoTradingEnv(data=prices)
+        env.random_start = False
+        np.testing.assert_array_equal(env.reset(), reference.reset())
+        for action in [0, 1, 2, 1, 0, 1, 1, 1, 1, 1, 2]:
+            obs, reward, _, _ = env.step(action)
+            expected_obs, expected_reward, _, _ = reference.step(action)
+            np.testing.assert_array_equal(obs, expected_obs)
+            self.assertAlmostEqual(reward, expected_reward)
+        del env
+
+if __name__ == '__main__':
+    unittest.main()